@@ -0,0 +1,43 @@
+"""Add biometric rollups
+
+Revision ID: 0f79ca528165
+Revises: 57c47b5cd7e8
+Create Date: 2026-10-19 11:20:54.318870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f79ca528165'
+down_revision: Union[str, None] = '57c47b5cd7e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('biometric_rollups',
+    sa.Column('resolution', sa.String(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('bucket_start', postgresql.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('samples', sa.Integer(), nullable=True),
+    sa.Column('sprint_count_sum', sa.Integer(), nullable=True),
+    sa.Column('hrv_sum', sa.Float(), nullable=True),
+    sa.Column('hrv_min', sa.Float(), nullable=True),
+    sa.Column('hrv_max', sa.Float(), nullable=True),
+    sa.Column('minutes_played_sum', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('resolution', 'player_id', 'bucket_start')
+    )
+    op.create_index('ix_biometric_rollups_resolution_bucket_start', 'biometric_rollups', ['resolution', 'bucket_start'], unique=False)
+    op.create_index('ix_fact_biometric_minute_player_id_timestamp', 'fact_biometric_minute', ['player_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_fact_biometric_minute_player_id_timestamp', table_name='fact_biometric_minute')
+    op.drop_index('ix_biometric_rollups_resolution_bucket_start', table_name='biometric_rollups')
+    op.drop_table('biometric_rollups')
@@ -0,0 +1,66 @@
+"""Add insight batches and cards
+
+Revision ID: 4e1a9c7d2b85
+Revises: db36ff17c36a
+Create Date: 2026-10-19 15:12:44.530218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e1a9c7d2b85'
+down_revision: Union[str, None] = 'db36ff17c36a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('insight_batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('model_version', sa.String(), nullable=False),
+    sa.Column('generated_at', postgresql.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('players', sa.Integer(), nullable=True),
+    sa.Column('cards', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_insight_batches_id'), 'insight_batches', ['id'], unique=False)
+    op.create_table('insight_cards',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('card_id', sa.String(), nullable=False),
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=True),
+    sa.Column('i18n_key', sa.String(), nullable=False),
+    sa.Column('match_scope', sa.String(), nullable=True),
+    sa.Column('confidence', sa.Float(), nullable=True),
+    sa.Column('evidence', sa.JSON(), nullable=True),
+    sa.Column('recommendation', sa.Text(), nullable=True),
+    sa.Column('model_version', sa.String(), nullable=True),
+    sa.Column('generated_at', postgresql.TIMESTAMP(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['insight_batches.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('card_id')
+    )
+    op.create_index(op.f('ix_insight_cards_id'), 'insight_cards', ['id'], unique=False)
+    op.create_index('ix_insight_cards_batch_id_rank', 'insight_cards', ['batch_id', 'rank'], unique=False)
+    op.create_index('ix_insight_cards_batch_id_i18n_key_rank', 'insight_cards', ['batch_id', 'i18n_key', 'rank'], unique=False)
+    op.create_index('ix_insight_cards_batch_id_team_id_rank', 'insight_cards', ['batch_id', 'team_id', 'rank'], unique=False)
+    op.create_index('ix_insight_cards_batch_id_player_id', 'insight_cards', ['batch_id', 'player_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_insight_cards_batch_id_player_id', table_name='insight_cards')
+    op.drop_index('ix_insight_cards_batch_id_team_id_rank', table_name='insight_cards')
+    op.drop_index('ix_insight_cards_batch_id_i18n_key_rank', table_name='insight_cards')
+    op.drop_index('ix_insight_cards_batch_id_rank', table_name='insight_cards')
+    op.drop_index(op.f('ix_insight_cards_id'), table_name='insight_cards')
+    op.drop_table('insight_cards')
+    op.drop_index(op.f('ix_insight_batches_id'), table_name='insight_batches')
+    op.drop_table('insight_batches')
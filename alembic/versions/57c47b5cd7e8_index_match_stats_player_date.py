@@ -0,0 +1,26 @@
+"""Index match_stats on player_id, match_date
+
+Revision ID: 57c47b5cd7e8
+Revises: 9613fa1b5f60
+Create Date: 2026-10-19 10:03:17.552091
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '57c47b5cd7e8'
+down_revision: Union[str, None] = '9613fa1b5f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_match_stats_player_id_match_date', 'match_stats', ['player_id', 'match_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_match_stats_player_id_match_date', table_name='match_stats')
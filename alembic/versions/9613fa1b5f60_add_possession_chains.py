@@ -0,0 +1,55 @@
+"""Add possession chains
+
+Revision ID: 9613fa1b5f60
+Revises: c72181ba6823
+Create Date: 2026-10-19 09:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9613fa1b5f60'
+down_revision: Union[str, None] = 'c72181ba6823'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('possession_chains',
+    sa.Column('match_id', sa.Integer(), nullable=False),
+    sa.Column('possession', sa.Integer(), nullable=False),
+    sa.Column('statsbomb_team_id', sa.Integer(), nullable=True),
+    sa.Column('period', sa.Integer(), nullable=True),
+    sa.Column('start_second', sa.Float(), nullable=True),
+    sa.Column('end_second', sa.Float(), nullable=True),
+    sa.Column('duration', sa.Float(), nullable=True),
+    sa.Column('start_x', sa.Float(), nullable=True),
+    sa.Column('end_x', sa.Float(), nullable=True),
+    sa.Column('progression', sa.Float(), nullable=True),
+    sa.Column('passes', sa.Integer(), nullable=True),
+    sa.Column('events', sa.Integer(), nullable=True),
+    sa.Column('outcome', sa.String(), nullable=True),
+    sa.Column('source_mtime', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('match_id', 'possession')
+    )
+    op.create_index(op.f('ix_possession_chains_statsbomb_team_id'), 'possession_chains', ['statsbomb_team_id'], unique=False)
+    op.create_table('possession_chain_players',
+    sa.Column('match_id', sa.Integer(), nullable=False),
+    sa.Column('possession', sa.Integer(), nullable=False),
+    sa.Column('statsbomb_player_id', sa.Integer(), nullable=False),
+    sa.Column('actions', sa.Integer(), nullable=True),
+    sa.Column('passes', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('match_id', 'possession', 'statsbomb_player_id')
+    )
+    op.create_index(op.f('ix_possession_chain_players_statsbomb_player_id'), 'possession_chain_players', ['statsbomb_player_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_possession_chain_players_statsbomb_player_id'), table_name='possession_chain_players')
+    op.drop_table('possession_chain_players')
+    op.drop_index(op.f('ix_possession_chains_statsbomb_team_id'), table_name='possession_chains')
+    op.drop_table('possession_chains')
@@ -0,0 +1,49 @@
+"""Add StatsBomb natural keys and player match minutes
+
+Revision ID: a3f5e2c81d47
+Revises: 4e1a9c7d2b85
+Create Date: 2026-10-19 15:40:52.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f5e2c81d47'
+down_revision: Union[str, None] = '4e1a9c7d2b85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('teams', sa.Column('statsbomb_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_teams_statsbomb_id'), 'teams', ['statsbomb_id'], unique=True)
+    op.add_column('players', sa.Column('statsbomb_id', sa.Integer(), nullable=True))
+    op.add_column('players', sa.Column('nickname', sa.String(), nullable=True))
+    op.create_index(op.f('ix_players_statsbomb_id'), 'players', ['statsbomb_id'], unique=True)
+    op.create_table('player_match_minutes',
+    sa.Column('match_id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=True),
+    sa.Column('match_date', sa.Date(), nullable=True),
+    sa.Column('started', sa.Boolean(), nullable=True),
+    sa.Column('minutes_played', sa.Float(), nullable=True),
+    sa.Column('position', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('match_id', 'player_id')
+    )
+    op.create_index('ix_player_match_minutes_player_id_match_date', 'player_match_minutes', ['player_id', 'match_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_player_match_minutes_player_id_match_date', table_name='player_match_minutes')
+    op.drop_table('player_match_minutes')
+    op.drop_index(op.f('ix_players_statsbomb_id'), table_name='players')
+    op.drop_column('players', 'nickname')
+    op.drop_column('players', 'statsbomb_id')
+    op.drop_index(op.f('ix_teams_statsbomb_id'), table_name='teams')
+    op.drop_column('teams', 'statsbomb_id')
@@ -0,0 +1,52 @@
+"""Add player birth dates and the player entity-resolution links
+
+Revision ID: a7c4e9b3f158
+Revises: f2b7d1e94c63
+Create Date: 2026-10-19 21:48:12.604417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c4e9b3f158'
+down_revision: Union[str, None] = 'f2b7d1e94c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('players', sa.Column('birth_date', sa.Date(), nullable=True))
+    op.create_table('player_links',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('csv_player_id', sa.Integer(), nullable=False),
+    sa.Column('statsbomb_player_id', sa.Integer(), nullable=False),
+    sa.Column('csv_name', sa.String(), nullable=True),
+    sa.Column('statsbomb_name', sa.String(), nullable=True),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('name_similarity', sa.Float(), nullable=True),
+    sa.Column('block', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('merged_at', postgresql.TIMESTAMP(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['statsbomb_player_id'], ['players.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_player_links_id'), 'player_links', ['id'], unique=False)
+    op.create_index('ux_player_links_pair', 'player_links', ['csv_player_id', 'statsbomb_player_id'], unique=True)
+    op.create_index('ix_player_links_statsbomb_player_id', 'player_links', ['statsbomb_player_id'], unique=False)
+    op.create_index('ix_player_links_status_score', 'player_links', ['status', 'score'], unique=False)
+    # Existing CSV rows get birth dates from scripts/resolve_players.py --backfill-birth-dates
+
+
+def downgrade() -> None:
+    op.drop_index('ix_player_links_status_score', table_name='player_links')
+    op.drop_index('ix_player_links_statsbomb_player_id', table_name='player_links')
+    op.drop_index('ux_player_links_pair', table_name='player_links')
+    op.drop_index(op.f('ix_player_links_id'), table_name='player_links')
+    op.drop_table('player_links')
+    op.drop_column('players', 'birth_date')
@@ -0,0 +1,28 @@
+"""Count HRV readings separately in biometric rollups
+
+Revision ID: b6d08e2f4a71
+Revises: a7c4e9b3f158
+Create Date: 2026-10-20 09:12:44.603118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d08e2f4a71'
+down_revision: Union[str, None] = 'a7c4e9b3f158'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('biometric_rollups', sa.Column('hrv_samples', sa.Integer(), nullable=True, server_default='0'))
+    # Buckets that saw any HRV are assumed fully covered; scripts/backfill_biometric_rollups.py recounts them exactly
+    op.execute("UPDATE biometric_rollups SET hrv_samples = samples WHERE hrv_max IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('biometric_rollups', 'hrv_samples')
@@ -0,0 +1,90 @@
+"""Native UTC log timestamps, time indexes and monthly partitions
+
+Revision ID: b81e4d0c9f3a
+Revises: a3f5e2c81d47
+Create Date: 2026-10-19 17:12:08.431920
+
+"""
+from typing import Sequence, Union
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e4d0c9f3a'
+down_revision: Union[str, None] = 'a3f5e2c81d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOG_TABLES = ['feedback_log', 'search_log', 'chat_prompt_log']
+PARTITIONS_AHEAD = 3
+
+
+def _add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _partition(table: str, month: datetime) -> None:
+    op.execute(
+        f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for table in LOG_TABLES:
+        op.execute(f'UPDATE {table} SET "timestamp" = CURRENT_TIMESTAMP WHERE "timestamp" IS NULL')
+        if bind.dialect.name != 'postgresql':
+            op.create_index(f'ix_{table}_timestamp', table, ['timestamp'], unique=False)
+            continue
+
+        # Rebuild as a range-partitioned table; the partition key has to be part of the primary key
+        old = f'{table}_unpartitioned'
+        op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+        op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+        op.execute(f'ALTER INDEX IF EXISTS ix_{table}_id RENAME TO ix_{old}_id')
+        op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE ("timestamp")')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN "timestamp" SET NOT NULL')
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, "timestamp")')
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+        months = {
+            m.replace(tzinfo=timezone.utc)
+            for m in bind.execute(sa.text(
+                f"SELECT DISTINCT date_trunc('month', \"timestamp\" AT TIME ZONE 'UTC') FROM {old}"
+            )).scalars()
+        }
+        current = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        months.update(_add_months(current, n) for n in range(PARTITIONS_AHEAD + 1))
+        for month in sorted(months):
+            _partition(table, month)
+
+        op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+        op.execute(f'ALTER SEQUENCE IF EXISTS {table}_id_seq OWNED BY {table}.id')
+        op.execute(f'DROP TABLE {old}')
+        op.create_index(f'ix_{table}_id', table, ['id'], unique=False)
+        op.create_index(f'ix_{table}_timestamp', table, ['timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for table in LOG_TABLES:
+        op.drop_index(f'ix_{table}_timestamp', table_name=table)
+        if bind.dialect.name != 'postgresql':
+            continue
+
+        old = f'{table}_partitioned'
+        op.drop_index(f'ix_{table}_id', table_name=table)
+        op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+        op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+        op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN "timestamp" DROP NOT NULL')
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)')
+        op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+        op.execute(f'ALTER SEQUENCE IF EXISTS {table}_id_seq OWNED BY {table}.id')
+        op.execute(f'DROP TABLE {old} CASCADE')
+        op.create_index(f'ix_{table}_id', table, ['id'], unique=False)
@@ -0,0 +1,28 @@
+"""Add row versions to players and status intervals
+
+Revision ID: c3e95a7d1f42
+Revises: b6d08e2f4a71
+Create Date: 2026-10-20 10:03:18.227410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e95a7d1f42'
+down_revision: Union[str, None] = 'b6d08e2f4a71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('players', sa.Column('row_version', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('status_intervals', sa.Column('row_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('status_intervals', 'row_version')
+    op.drop_column('players', 'row_version')
@@ -0,0 +1,38 @@
+"""Add query analytics sketches
+
+Revision ID: c4d27a9e6b10
+Revises: b81e4d0c9f3a
+Create Date: 2026-10-19 18:26:44.905113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d27a9e6b10'
+down_revision: Union[str, None] = 'b81e4d0c9f3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('query_sketches',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('model_version', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('zero_results', sa.Integer(), nullable=False),
+    sa.Column('count_min', sa.LargeBinary(), nullable=False),
+    sa.Column('hll', sa.LargeBinary(), nullable=False),
+    sa.Column('heavy_hitters', sa.JSON(), nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('day', 'source', 'model_version')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('query_sketches')
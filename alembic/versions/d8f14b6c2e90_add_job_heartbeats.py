@@ -0,0 +1,27 @@
+"""Add job heartbeats
+
+Revision ID: d8f14b6c2e90
+Revises: c3e95a7d1f42
+Create Date: 2026-10-20 10:41:52.918734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f14b6c2e90'
+down_revision: Union[str, None] = 'c3e95a7d1f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('heartbeat_at', postgresql.TIMESTAMP(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'heartbeat_at')
@@ -0,0 +1,28 @@
+"""Index players by rating and team
+
+Revision ID: d93b6f1a0e27
+Revises: c4d27a9e6b10
+Create Date: 2026-10-19 19:02:31.557180
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd93b6f1a0e27'
+down_revision: Union[str, None] = 'c4d27a9e6b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_players_rating', 'players', ['rating'], unique=False)
+    op.create_index('ix_players_team_id', 'players', ['team_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_players_team_id', table_name='players')
+    op.drop_index('ix_players_rating', table_name='players')
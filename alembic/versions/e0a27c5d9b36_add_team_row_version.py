@@ -0,0 +1,26 @@
+"""Add a row version to teams
+
+Revision ID: e0a27c5d9b36
+Revises: d8f14b6c2e90
+Create Date: 2026-10-20 11:27:05.481263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e0a27c5d9b36'
+down_revision: Union[str, None] = 'd8f14b6c2e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('teams', sa.Column('row_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('teams', 'row_version')
@@ -0,0 +1,68 @@
+"""Add team rollups and per-match team stats
+
+Revision ID: e5a8c3f72d19
+Revises: d93b6f1a0e27
+Create Date: 2026-10-19 20:14:08.317264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8c3f72d19'
+down_revision: Union[str, None] = 'd93b6f1a0e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('team_rollups',
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('players', sa.Integer(), nullable=False),
+    sa.Column('avg_age', sa.Float(), nullable=True),
+    sa.Column('age_u21', sa.Integer(), nullable=True),
+    sa.Column('age_21_25', sa.Integer(), nullable=True),
+    sa.Column('age_26_29', sa.Integer(), nullable=True),
+    sa.Column('age_30_plus', sa.Integer(), nullable=True),
+    sa.Column('minutes', sa.Integer(), nullable=True),
+    sa.Column('minutes_p25', sa.Float(), nullable=True),
+    sa.Column('minutes_median', sa.Float(), nullable=True),
+    sa.Column('minutes_p75', sa.Float(), nullable=True),
+    sa.Column('regulars', sa.Integer(), nullable=True),
+    sa.Column('goals', sa.Integer(), nullable=False),
+    sa.Column('assists', sa.Integer(), nullable=True),
+    sa.Column('avg_rating', sa.Float(), nullable=True),
+    sa.Column('strength', sa.Float(), nullable=False),
+    sa.Column('matches', sa.Integer(), nullable=True),
+    sa.Column('match_goals', sa.Integer(), nullable=False),
+    sa.Column('match_assists', sa.Integer(), nullable=True),
+    sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('team_id')
+    )
+    op.create_index('ix_team_rollups_strength', 'team_rollups', ['strength', 'team_id'], unique=False)
+    op.create_index('ix_team_rollups_goals', 'team_rollups', ['goals', 'team_id'], unique=False)
+    op.create_index('ix_team_rollups_match_goals', 'team_rollups', ['match_goals', 'team_id'], unique=False)
+    op.create_table('team_match_stats',
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('match_date', sa.Date(), nullable=False),
+    sa.Column('players', sa.Integer(), nullable=False),
+    sa.Column('goals', sa.Integer(), nullable=True),
+    sa.Column('assists', sa.Integer(), nullable=True),
+    sa.Column('pass_accuracy', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('team_id', 'match_date')
+    )
+    # Existing data is rolled up by the team_rollups job or scripts/build_team_rollups.py
+
+
+def downgrade() -> None:
+    op.drop_table('team_match_stats')
+    op.drop_index('ix_team_rollups_match_goals', table_name='team_rollups')
+    op.drop_index('ix_team_rollups_goals', table_name='team_rollups')
+    op.drop_index('ix_team_rollups_strength', table_name='team_rollups')
+    op.drop_table('team_rollups')
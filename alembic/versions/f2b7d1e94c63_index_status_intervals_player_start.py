@@ -0,0 +1,26 @@
+"""Index status intervals by player and start time
+
+Revision ID: f2b7d1e94c63
+Revises: e5a8c3f72d19
+Create Date: 2026-10-19 21:05:47.208931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7d1e94c63'
+down_revision: Union[str, None] = 'e5a8c3f72d19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_status_intervals_player_id_start_time', 'status_intervals', ['player_id', 'start_time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_status_intervals_player_id_start_time', table_name='status_intervals')
@@ -0,0 +1,28 @@
+"""Add reviewed_at to player links
+
+Revision ID: f4c81a9e2d57
+Revises: e0a27c5d9b36
+Create Date: 2026-10-20 14:02:37.915406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c81a9e2d57'
+down_revision: Union[str, None] = 'e0a27c5d9b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('player_links', sa.Column('reviewed_at', sa.TIMESTAMP(timezone=True), nullable=True))
+    # Rejections were already kept across re-runs; date them so the resolver keeps treating them as reviewed
+    op.execute("UPDATE player_links SET reviewed_at = created_at WHERE status = 'rejected'")
+
+
+def downgrade() -> None:
+    op.drop_column('player_links', 'reviewed_at')
@@ -1,15 +1,35 @@
+import json
 import uuid
-from random import uniform, randint
+import asyncio
+from datetime import datetime, timezone
 from decimal import Decimal
-from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import JSONResponse
-from app.db.models import Player, Team, FeedbackLog, SearchLog, ChatPromptLog, MatchStat
-from app.db.session import SessionLocal
-from app.utils.timestamp import format_timestamp
+from fastapi import APIRouter, Request, HTTPException, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import func
+from app.db.models import Player, Team, FeedbackLog, SearchLog, ChatPromptLog, MatchStat, PossessionChain, PossessionChainPlayer, Job
+from app.db.session import SessionLocal, ReadSessionLocal
+from app.utils.timestamp import format_timestamp, utc_now
 from app.utils.trending import get_trending_players
 from app.services.chat_router import classify_prompt
 from app.services.insight_generator import generate_insight
 from app.services.player_comparator import compare_players
+from app.services.pass_network import get_match_analytics, filter_edges
+from app.services.form import get_form_curves, DEFAULT_LAST_N, DEFAULT_WINDOW, DEFAULT_DAY_WINDOW
+from app.services.biometric_rollups import get_workload_series, default_window, DEFAULT_MAX_POINTS
+from app.services.availability import get_availability_index, add_status_interval
+from app.services.replay import hub as replay_hub, start_replay, stop_replay, get_replay, list_replays
+from app.utils.event_index import query_events
+from app.services.jobs import runner as job_runner, serialize_job, JOB_HANDLERS
+from app.services.contract_model import project_contracts, get_contract_scores
+from app.utils.snapshot import get_snapshot
+from app.utils.catalog import get_catalog, match_summary
+from app.utils.admission import admission_stats
+from app.services.insight_cards import get_insight_cards as list_insight_cards, DEFAULT_PAGE_SIZE
+from app.services.query_sketches import record_query, query_analytics, SOURCES as QUERY_SOURCES
+from app.services.team_rollups import get_team_summary, league_table, LEAGUE_TABLE_SORTS
+from app.services.expected_threat import get_threat_model, VALUE_MEASURES
+from app.services.entity_resolution import get_player_links, review_link
+from app.services.timeline import iter_timeline, get_timeline_page, SOURCES as TIMELINE_SOURCES, DEFAULT_PAGE_SIZE as TIMELINE_PAGE_SIZE
 
 router = APIRouter()
 
@@ -45,36 +65,44 @@ def get_schema():
     }
 
 # -------------------------
-# Phase 2a.6 – Insight Cards Dummy
+# Phase 2a.6 – Insight Cards
 # -------------------------
 
 @router.get("/insights")
-def get_insight_cards(request: Request):
+def get_insight_cards(request: Request, key: str = None, player_id: int = None, team_id: int = None,
+                      min_confidence: float = None, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
     tz_str = request.headers.get("X-Timezone", "UTC")
-    now = format_timestamp(tz_str)
-
-    dummy_insights = [
-        {
-            "card_id": str(uuid.uuid4()),
-            "player_id": i,
-            "match_scope": scope,
-            "confidence": conf,
-            "evidence": evidence,
-            "recommendation": reco,
-            "model_version": "v1.0-dummy",
-            "generated_at": now,
-            "i18n_key": key
-        }
-        for i, (scope, conf, evidence, reco, key) in enumerate([
-            ("Season", 0.85, ["High pass accuracy", "Above average interceptions"], "Consider a tactical shift in midfield.", "insight_tactical_misfit"),
-            ("Match", 0.72, ["Improved goal conversion"], "Player trending up; increase usage.", "insight_trending_up"),
-            ("Competition", 0.65, ["Low match time", "High performance metrics when played"], "Underused asset; consider more playing time.", "insight_underused_asset"),
-            ("Season", 0.70, ["Shift in role over recent matches"], "Role drift detected; review player positioning.", "insight_role_drift"),
-            ("Match", 0.40, ["Abnormal biometrics recorded", "Recent injury history"], "Risk alert: Monitor player load and fitness.", "insight_risk_alert"),
-        ], start=1)
-    ]
+    db = ReadSessionLocal()
 
-    return JSONResponse(content={"insights": dummy_insights})
+    try:
+        try:
+            page = list_insight_cards(db, i18n_key=key, player_id=player_id, team_id=team_id,
+                                      min_confidence=min_confidence, limit=limit, cursor=cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        insights = [
+            {
+                "card_id": card.card_id,
+                "player_id": card.player_id,
+                "team_id": card.team_id,
+                "match_scope": card.match_scope,
+                "confidence": card.confidence,
+                "evidence": card.evidence,
+                "recommendation": card.recommendation,
+                "model_version": card.model_version,
+                "generated_at": format_timestamp(tz_str, card.generated_at),
+                "i18n_key": card.i18n_key
+            }
+            for card in page["cards"]
+        ]
+        return JSONResponse(content={
+            "insights": insights,
+            "batch_id": page["batch_id"],
+            "next_cursor": page["next_cursor"],
+        })
+    finally:
+        db.close()
 
 # -------------------------
 # Phase 2a.7 – Feedback Logging
@@ -84,7 +112,7 @@ def get_insight_cards(request: Request):
 async def log_feedback(request: Request):
     body = await request.json()
     tz_str = request.headers.get("X-Timezone", "UTC")
-    timestamp = format_timestamp(tz_str)
+    logged_at = utc_now()
     db = SessionLocal()
 
     try:
@@ -95,17 +123,47 @@ async def log_feedback(request: Request):
             card_id=body.get("card_id", "test-card-id"),
             action=body.get("action", "thumbs_up"),
             model_version=body.get("model_version", "v1.0-dummy"),
-            timestamp=timestamp
+            timestamp=logged_at
         )
         db.add(feedback)
         db.commit()
-        return {"status": "✅ feedback logged"}
+        return {"status": "✅ feedback logged", "timestamp": format_timestamp(tz_str, logged_at)}
     except Exception as e:
         db.rollback()
         return JSONResponse(status_code=500, content={"error": str(e)})
     finally:
         db.close()
 
+@router.get("/feedback")
+def list_feedback(request: Request, start: datetime = None, end: datetime = None, user_id: str = None, limit: int = 100):
+    # Newest first within [start, end); the timestamp index (and partition pruning) keeps windows cheap
+    tz_str = request.headers.get("X-Timezone", "UTC")
+    db = ReadSessionLocal()
+
+    try:
+        query = db.query(FeedbackLog)
+        if start:
+            query = query.filter(FeedbackLog.timestamp >= start)
+        if end:
+            query = query.filter(FeedbackLog.timestamp < end)
+        if user_id:
+            query = query.filter(FeedbackLog.user_id == user_id)
+        rows = query.order_by(FeedbackLog.timestamp.desc(), FeedbackLog.id.desc()).limit(min(limit, 1000)).all()
+        return {"feedback": [
+            {
+                "id": f.id,
+                "user_id": f.user_id,
+                "request_id": f.request_id,
+                "card_id": f.card_id,
+                "action": f.action,
+                "model_version": f.model_version,
+                "timestamp": format_timestamp(tz_str, f.timestamp),
+            }
+            for f in rows
+        ]}
+    finally:
+        db.close()
+
 # -------------------------
 # Phase 2a.8 – Metrics Reporting
 # -------------------------
@@ -113,19 +171,21 @@ async def log_feedback(request: Request):
 @router.get("/metrics")
 def get_metrics(request: Request):
     tz_str = request.headers.get("X-Timezone", "UTC")
-    db = SessionLocal()
+    db = ReadSessionLocal()
 
     try:
         player_count = db.query(Player).count()
         team_count = db.query(Team).count()
         feedback_count = db.query(FeedbackLog).count()
-        latest_feedback = db.query(FeedbackLog).order_by(FeedbackLog.timestamp.desc()).first()
+        # Served by ix_feedback_log_timestamp (one index probe per partition on PostgreSQL)
+        latest_feedback = db.query(func.max(FeedbackLog.timestamp)).scalar()
 
         metrics = {
             "players": player_count,
             "teams": team_count,
             "feedback_logs": feedback_count,
-            "latest_feedback_time": format_timestamp(tz_str, latest_feedback.timestamp) if latest_feedback else None
+            "latest_feedback_time": format_timestamp(tz_str, latest_feedback) if latest_feedback else None,
+            "admission": admission_stats()
         }
 
         return JSONResponse(content={"metrics": metrics})
@@ -136,27 +196,48 @@ def get_metrics(request: Request):
 # Phase 2a.9 – Contract Projection Widget
 # -------------------------
 
+def contract_response(projection: dict, tz_str: str) -> dict:
+    return {
+        **projection,
+        "generated_at": format_timestamp(tz_str),
+        "i18n_key": "contract_projection_summary"
+    }
+
 @router.get("/contracts/{player_id}")
 def get_contract_projection(player_id: int, request: Request):
     tz_str = request.headers.get("X-Timezone", "UTC")
-    db = SessionLocal()
-    player = db.query(Player).filter(Player.id == player_id).first()
-    if not player:
+    db = ReadSessionLocal()
+
+    try:
+        projections = project_contracts(db, [player_id])
+        if not projections:
+            raise HTTPException(status_code=404, detail="Player not found")
+        return contract_response(projections[0], tz_str)
+    finally:
         db.close()
-        raise HTTPException(status_code=404, detail="Player not found")
 
+@router.post("/contracts/bulk")
+async def get_contract_projections(request: Request):
+    body = await request.json()
+    tz_str = request.headers.get("X-Timezone", "UTC")
+    player_ids = body.get("player_ids")
+    team_id = body.get("team_id")
+    if not player_ids and team_id is None:
+        raise HTTPException(status_code=400, detail="Provide player_ids or team_id")
+
+    db = ReadSessionLocal()
     try:
-        contract_data = {
-            "player_id": player.id,
-            "market_value": round(uniform(5.0, 120.0), 2),
-            "contract_length_years": randint(1, 5),
-            "renewal_risk_score": round(uniform(0.1, 1.0), 2),
-            "confidence": round(uniform(0.5, 0.99), 2),
-            "model_version": "v1.0-dummy",
-            "generated_at": format_timestamp(tz_str),
-            "i18n_key": "contract_projection_summary"
+        if team_id is not None:
+            squad = [pid for (pid,) in db.query(Player.id).filter(Player.team_id == team_id).order_by(Player.id)]
+            player_ids = list(dict.fromkeys((player_ids or []) + squad))
+        scores = get_contract_scores(db)
+        projections = scores.rows(player_ids)
+        return {
+            "model_version": scores.model_version,
+            "data_version": scores.data_version,
+            "contracts": [contract_response(p, tz_str) for p in projections],
+            "missing": sorted(set(player_ids) - {p["player_id"] for p in projections}),
         }
-        return contract_data
     finally:
         db.close()
 
@@ -167,7 +248,7 @@ def get_contract_projection(player_id: int, request: Request):
 @router.get("/players/trending")
 def get_trending_players_endpoint(request: Request):
     tz_str = request.headers.get("X-Timezone", "UTC")
-    db = SessionLocal()
+    db = ReadSessionLocal()
 
     try:
         top_players = get_trending_players(db, tz_str)
@@ -190,7 +271,7 @@ def get_trending_players_endpoint(request: Request):
 async def chat_search(request: Request):
     body = await request.json()
     tz_str = request.headers.get("X-Timezone", "UTC")
-    timestamp = format_timestamp(tz_str)
+    logged_at = utc_now()
     db = SessionLocal()
 
     question = body.get("question", "")
@@ -216,10 +297,11 @@ async def chat_search(request: Request):
             response=response_text,
             matched_players=len(matched_players),
             model_version="v1.0-dummy",
-            timestamp=timestamp,
+            timestamp=logged_at,
         )
         db.add(search_log)
         db.commit()
+        record_query("search", search_log.model_version, user_id, question, zero_result=not matched_players, at=logged_at)
     except Exception as e:
         db.rollback()
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -230,7 +312,7 @@ async def chat_search(request: Request):
         "question": question,
         "matched": matched_players,
         "response": response_text,
-        "timestamp": timestamp,
+        "timestamp": format_timestamp(tz_str, logged_at),
     }
 
 # -------------------------
@@ -239,30 +321,36 @@ async def chat_search(request: Request):
 
 @router.post("/chat/prompt")
 async def chat_prompt_log(request: Request):
-    db = SessionLocal()
     body = await request.json()
     tz_str = request.headers.get("X-Timezone", "UTC")
-    timestamp = format_timestamp(tz_str)
+    logged_at = utc_now()
 
     user_id = body.get("user_id", "anon")
     prompt = body.get("prompt", "")
     response = f"🤖 AI says: Based on '{prompt}', here's some tactical insight..."
-    
-    log = ChatPromptLog(
-        user_id=user_id,
-        prompt=prompt,
-        response=response,
-        model_version="v1.0-dummy",
-        timestamp=timestamp
-    )
-    db.add(log)
-    db.commit()
-    db.close()
+    db = SessionLocal()
+
+    try:
+        log = ChatPromptLog(
+            user_id=user_id,
+            prompt=prompt,
+            response=response,
+            model_version="v1.0-dummy",
+            timestamp=logged_at
+        )
+        db.add(log)
+        db.commit()
+        record_query("prompt", log.model_version, user_id, prompt, at=logged_at)
+    except Exception as e:
+        db.rollback()
+        return JSONResponse(status_code=500, content={"error": str(e)})
+    finally:
+        db.close()
 
     return {
         "prompt": prompt,
         "response": response,
-        "timestamp": timestamp
+        "timestamp": format_timestamp(tz_str, logged_at)
     }
 
 # -------------------------
@@ -274,15 +362,19 @@ async def chat_insight(request: Request):
     body = await request.json()
     prompt = body.get("prompt", "")
     context = body.get("context", "")
-    db = SessionLocal()
 
+    def answer():
+        db = ReadSessionLocal()
+        try:
+            return {"insight": generate_insight(prompt=prompt, context=context, db=db)}
+        finally:
+            db.close()
+
+    # Blocking DB work runs in a thread so the event loop keeps serving cheap routes
     try:
-        insight = generate_insight(prompt=prompt, context=context, db=db)
-        return {"insight": insight}
+        return await asyncio.to_thread(answer)
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
-    finally:
-        db.close()
 
 # -------------------------
 # Phase 2b.5
@@ -293,7 +385,10 @@ async def smart_chat_router(request: Request):
     body = await request.json()
     prompt = body.get("prompt", "")
     tz_str = request.headers.get("X-Timezone", "UTC")
-    db = SessionLocal()
+    return await asyncio.to_thread(answer_chat, prompt, tz_str)
+
+def answer_chat(prompt: str, tz_str: str) -> dict:
+    db = ReadSessionLocal()
 
     try:
         result = classify_prompt(prompt)
@@ -311,20 +406,12 @@ async def smart_chat_router(request: Request):
             player = db.query(Player).filter(Player.name.ilike(f"%{result['player_name']}%")).first()
             if not player:
                 return {"type": "contract", "error": f"Player '{result['player_name']}' not found"}
-            # Reuse dummy logic
-            from random import uniform, randint
-            return {
-                "type": "contract",
-                "player_id": player.id,
-                "market_value": round(uniform(5.0, 120.0), 2),
-                "contract_length_years": randint(1, 5),
-                "renewal_risk_score": round(uniform(0.1, 1.0), 2),
-                "confidence": round(uniform(0.5, 0.99), 2),
-                "model_version": "v1.0-dummy",
-                "generated_at": format_timestamp(tz_str),
-                "i18n_key": "contract_projection_summary"
-            }
-        
+            projections = project_contracts(db, [player.id])
+            if not projections:
+                # Players added since the scores were last refreshed have no projection yet
+                return {"type": "contract", "error": f"No contract projection for '{player.name}' yet"}
+            return {"type": "contract", **contract_response(projections[0], tz_str)}
+
         elif result["type"] == "comparison":
             from app.services.player_comparator import compare_players
             comparison = compare_players(result["players"][0], result["players"][1], db)
@@ -344,10 +431,518 @@ async def compare_endpoint(request: Request):
     body = await request.json()
     name1 = body.get("player1", "")
     name2 = body.get("player2", "")
+
+    def compare():
+        db = ReadSessionLocal()
+        try:
+            return compare_players(name1, name2, db)
+        finally:
+            db.close()
+
+    return await asyncio.to_thread(compare)
+
+# -------------------------
+# Phase 3.1 – Pass Networks & Touch Heatmaps
+# -------------------------
+
+@router.get("/matches/{match_id}/pass-network")
+def get_pass_network(match_id: int, min_passes: int = 1):
+    analytics = get_match_analytics(match_id)
+    if not analytics:
+        raise HTTPException(status_code=404, detail="Match events not found")
+
+    return {
+        "match_id": match_id,
+        "teams": [filter_edges(n, min_passes) for n in analytics["pass_networks"]],
+    }
+
+@router.get("/matches/{match_id}/heatmaps")
+def get_touch_heatmaps(match_id: int, player_id: int = None):
+    analytics = get_match_analytics(match_id)
+    if not analytics:
+        raise HTTPException(status_code=404, detail="Match events not found")
+
+    heatmaps = analytics["heatmaps"]
+    if player_id is not None:
+        heatmaps = {**heatmaps, "players": [p for p in heatmaps["players"] if p["player_id"] == player_id]}
+    return {"match_id": match_id, **heatmaps}
+
+@router.get("/analytics/pass-networks")
+def get_pass_networks_bulk(match_ids: str, min_passes: int = 1):
+    # e.g. ?match_ids=22921,22924,... to render a whole tournament in one request
+    try:
+        ids = [int(m) for m in match_ids.split(",") if m.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="match_ids must be a comma-separated list of integers")
+
+    matches = []
+    missing = []
+    for match_id in ids:
+        analytics = get_match_analytics(match_id)
+        if not analytics:
+            missing.append(match_id)
+            continue
+        matches.append({
+            "match_id": match_id,
+            "teams": [filter_edges(n, min_passes) for n in analytics["pass_networks"]],
+        })
+
+    return {"matches": matches, "missing": missing}
+
+# -------------------------
+# Phase 3.2 – Possession Chains
+# -------------------------
+
+@router.get("/matches/{match_id}/possession-chains")
+def get_possession_chains(match_id: int, outcome: str = None):
+    db = ReadSessionLocal()
+
+    try:
+        query = db.query(PossessionChain).filter(PossessionChain.match_id == match_id)
+        if outcome:
+            query = query.filter(PossessionChain.outcome == outcome)
+        chains = query.order_by(PossessionChain.possession).all()
+
+        involvement = {}
+        for row in db.query(PossessionChainPlayer).filter(PossessionChainPlayer.match_id == match_id):
+            involvement.setdefault(row.possession, []).append(
+                {"player_id": row.statsbomb_player_id, "actions": row.actions, "passes": row.passes}
+            )
+
+        return {
+            "match_id": match_id,
+            "chains": [
+                {
+                    "possession": c.possession,
+                    "team_id": c.statsbomb_team_id,
+                    "period": c.period,
+                    "start_second": c.start_second,
+                    "duration": c.duration,
+                    "progression": c.progression,
+                    "passes": c.passes,
+                    "outcome": c.outcome,
+                    "players": involvement.get(c.possession, []),
+                }
+                for c in chains
+            ],
+        }
+    finally:
+        db.close()
+
+# -------------------------
+# Phase 3.3 – Player Form Curves
+# -------------------------
+
+@router.post("/players/form")
+async def get_player_form(request: Request):
+    body = await request.json()
+    player_ids = body.get("player_ids") or None
+    team_id = body.get("team_id")
+    if not player_ids and team_id is None:
+        raise HTTPException(status_code=400, detail="Provide player_ids or team_id")
+
+    windows = {"last_n": body.get("last_n", DEFAULT_LAST_N), "days": body.get("days"),
+               "window": body.get("window", DEFAULT_WINDOW), "day_window": body.get("day_window", DEFAULT_DAY_WINDOW)}
+    for name, value in windows.items():
+        # last_n and days may be null (no limit); every window must be a positive whole number
+        if value is None and name in ("last_n", "days"):
+            continue
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise HTTPException(status_code=400, detail=f"{name} must be a positive integer")
+
+    db = ReadSessionLocal()
+
+    try:
+        form = get_form_curves(db, player_ids=player_ids, team_id=team_id, **windows)
+        return {"form": [{"player_id": pid, **summary} for pid, summary in form.items()]}
+    finally:
+        db.close()
+
+# -------------------------
+# Phase 3.4 – Biometric Workload Series
+# -------------------------
+
+@router.get("/players/{player_id}/workload")
+def get_player_workload(player_id: int, start: datetime = None, end: datetime = None, max_points: int = DEFAULT_MAX_POINTS):
+    default_start, default_end = default_window()
+    end = end or default_end
+    start = start or (end - (default_end - default_start))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+
+    db = ReadSessionLocal()
+
+    try:
+        return get_workload_series(db, player_id, start, end, max_points)
+    finally:
+        db.close()
+
+# -------------------------
+# Phase 3.5 – Player Availability
+# -------------------------
+
+@router.post("/status-intervals")
+async def create_status_interval(request: Request):
+    body = await request.json()
+    db = SessionLocal()
+
+    try:
+        interval = add_status_interval(
+            db,
+            player_id=body["player_id"],
+            status_type=body.get("status_type", "injury"),
+            status_description=body.get("status_description"),
+            start_time=datetime.fromisoformat(body["start_time"]),
+            end_time=datetime.fromisoformat(body["end_time"]) if body.get("end_time") else None,
+        )
+        return {"status": "✅ status interval logged", "id": interval.id}
+    except (KeyError, ValueError) as e:
+        db.rollback()
+        return JSONResponse(status_code=400, content={"error": f"Invalid status interval: {e}"})
+    finally:
+        db.close()
+
+@router.get("/teams/{team_id}/availability")
+def get_team_availability(team_id: int, at: datetime = None, start: datetime = None, end: datetime = None):
+    db = ReadSessionLocal()
+
+    try:
+        index = get_availability_index(db)
+        if start and end:
+            return index.status(team_id, start, end)
+        return index.status(team_id, at or datetime.now(timezone.utc))
+    finally:
+        db.close()
+
+@router.post("/availability/fixtures")
+async def get_fixture_availability(request: Request):
+    # Body: {"fixtures": [{"team_id": 1, "kickoff": "2025-06-01T18:00:00+00:00"}, ...]}
+    body = await request.json()
+    db = ReadSessionLocal()
+
+    try:
+        index = get_availability_index(db)
+        results = []
+        for fixture in body.get("fixtures", []):
+            kickoff = datetime.fromisoformat(fixture["kickoff"])
+            results.append({"kickoff": fixture["kickoff"], **index.status(fixture["team_id"], kickoff)})
+        return {"fixtures": results}
+    except (KeyError, ValueError) as e:
+        return JSONResponse(status_code=400, content={"error": f"Invalid fixture: {e}"})
+    finally:
+        db.close()
+
+# -------------------------
+# Phase 3.6 – Live Match Replay
+# -------------------------
+
+@router.post("/replay/{match_id}/start")
+async def start_match_replay(match_id: int, speed: float = 1.0):
+    replay = start_replay(match_id, speed)
+    if not replay:
+        raise HTTPException(status_code=404, detail="Match events not found")
+    match = get_catalog().match(match_id)
+    return {"match_id": match_id, "status": replay.status, "speed": replay.speed, "match": match_summary(match) if match else None}
+
+@router.post("/replay/{match_id}/stop")
+async def stop_match_replay(match_id: int):
+    if not stop_replay(match_id):
+        raise HTTPException(status_code=404, detail="Replay not running")
+    return {"match_id": match_id, "status": "stopped"}
+
+@router.get("/replay")
+async def list_match_replays():
+    return {"replays": list_replays()}
+
+@router.websocket("/ws/replay/{match_id}")
+async def replay_feed(websocket: WebSocket, match_id: int):
+    await websocket.accept()
+    queue = replay_hub.subscribe(match_id)
+
+    async def forward():
+        # Late joiners get the current counters before the stream of diffs
+        replay = get_replay(match_id)
+        if replay:
+            await websocket.send_text(json.dumps(replay.snapshot()))
+        while True:
+            await websocket.send_text(await queue.get())
+
+    async def until_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    # Whichever side finishes first (client gone or send failed) tears down the other
+    tasks = [asyncio.create_task(forward()), asyncio.create_task(until_disconnect())]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            task.exception()
+    finally:
+        replay_hub.unsubscribe(match_id, queue)
+
+# -------------------------
+# Phase 3.7 – Indexed Event Lookup
+# -------------------------
+
+@router.get("/events")
+def get_indexed_events(match_ids: str = None, player_id: int = None, team_id: int = None, type: str = None, period: int = None,
+                       competition_id: int = None, season_id: int = None):
+    # e.g. /events?match_ids=22921,22924&player_id=10121&type=Shot, or a whole season: ?competition_id=72&season_id=30
+    if match_ids:
+        try:
+            ids = [int(m) for m in match_ids.split(",") if m.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="match_ids must be a comma-separated list of integers")
+    elif competition_id is not None or season_id is not None:
+        ids = get_catalog().match_ids(competition_id=competition_id, season_id=season_id, team_id=team_id)
+    else:
+        raise HTTPException(status_code=400, detail="Provide match_ids or a competition_id/season_id")
+
+    results = []
+    for match_id in ids:
+        events = query_events(match_id, player_id=player_id, team_id=team_id, type_name=type, period=period)
+        results.append({"match_id": match_id, "events": events})
+    return {"matches": results}
+
+# -------------------------
+# Phase 3.8 – Background Jobs
+# -------------------------
+
+@router.post("/jobs")
+async def submit_job(request: Request):
+    body = await request.json()
+
+    try:
+        job = job_runner.submit(
+            body.get("kind", ""),
+            params=body.get("params"),
+            dedup_key=body.get("dedup_key"),
+            max_attempts=body.get("max_attempts", 3),
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e), "kinds": sorted(JOB_HANDLERS)})
+
+    return JSONResponse(status_code=202, content={"job": serialize_job(job)})
+
+@router.get("/jobs")
+def list_jobs(status: str = None, kind: str = None, limit: int = 50):
+    db = SessionLocal()
+
+    try:
+        query = db.query(Job)
+        if status:
+            query = query.filter(Job.status == status)
+        if kind:
+            query = query.filter(Job.kind == kind)
+        jobs = query.order_by(Job.id.desc()).limit(min(limit, 500)).all()
+        return {"jobs": [serialize_job(j) for j in jobs]}
+    finally:
+        db.close()
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: int):
+    # Progress is written by the worker on the primary, so read it from there
+    db = SessionLocal()
+
+    try:
+        job = db.get(Job, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {"job": serialize_job(job)}
+    finally:
+        db.close()
+
+# -------------------------
+# Phase 3.9 – Analytics Snapshot
+# -------------------------
+
+@router.get("/snapshot")
+def get_snapshot_info():
+    snapshot = get_snapshot()
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No analytics snapshot built yet")
+    return snapshot.info()
+
+# -------------------------
+# Phase 3.10 – Match Catalog
+# -------------------------
+
+@router.get("/catalog/competitions")
+def get_catalog_competitions():
+    catalog = get_catalog()
+    return {"competitions": catalog.competitions, "catalog": catalog.info()}
+
+@router.get("/catalog/matches")
+def get_catalog_matches(competition_id: int = None, season_id: int = None, team_id: int = None,
+                        date_from: str = None, date_to: str = None, limit: int = 500):
+    # e.g. /catalog/matches?competition_id=72&season_id=30&team_id=857&date_from=2019-06-01
+    catalog = get_catalog()
+    ids = catalog.match_ids(competition_id=competition_id, season_id=season_id, team_id=team_id,
+                            date_from=date_from, date_to=date_to)
+    return {"total": len(ids), "matches": [match_summary(catalog.match(m)) for m in ids[:min(limit, 5000)]]}
+
+# -------------------------
+# Phase 3.11 – Query Analytics
+# -------------------------
+
+@router.get("/analytics/queries")
+def get_query_analytics(source: str = "search", days: int = 7, model_version: str = None, k: int = 10):
+    # Approximate top queries, unique users and zero-result rate from the per-day sketches
+    if source not in QUERY_SOURCES:
+        raise HTTPException(status_code=400, detail=f"source must be one of {', '.join(QUERY_SOURCES)}")
+    db = ReadSessionLocal()
+
+    try:
+        return query_analytics(db, source=source, days=max(1, min(days, 366)), model_version=model_version, k=k)
+    finally:
+        db.close()
+
+# -------------------------
+# Phase 3.12 – Team Rollups
+# -------------------------
+
+@router.get("/teams/table")
+def get_league_table(sort: str = "strength", limit: int = 50, offset: int = 0):
+    # e.g. /teams/table?sort=goals&limit=20; every team ranked from team_rollups in one ordered read
+    if sort not in LEAGUE_TABLE_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(LEAGUE_TABLE_SORTS)}")
+    db = ReadSessionLocal()
+
+    try:
+        return {"sort": sort, "teams": league_table(db, sort=sort, limit=max(1, min(limit, 500)), offset=max(offset, 0))}
+    finally:
+        db.close()
+
+@router.get("/teams/{team_id}")
+def get_team(team_id: int, last_matches: int = 10):
+    db = ReadSessionLocal()
+
+    try:
+        summary = get_team_summary(db, team_id, last_matches=max(0, min(last_matches, 100)))
+        if summary is None:
+            raise HTTPException(status_code=404, detail="Team not found")
+        return summary
+    finally:
+        db.close()
+
+# -------------------------
+# Phase 3.13 – Expected Threat
+# -------------------------
+
+@router.get("/analytics/xt")
+def get_expected_threat(competition_id: int = None, season_id: int = None):
+    # xT grid fitted on every pass, carry and shot of the competition (all sample matches when omitted)
+    model = get_threat_model(competition_id, season_id)
+    if model is None:
+        raise HTTPException(status_code=404, detail="No event data for this competition")
+    return {**model.info(), "grid": model.grid()}
+
+@router.get("/analytics/player-values")
+def get_player_values(competition_id: int = None, season_id: int = None, match_id: int = None, player_id: int = None,
+                      team_id: int = None, per_match: bool = True, sort: str = "xt", limit: int = 100):
+    # e.g. /analytics/player-values?competition_id=72&per_match=false&sort=xg; ids are StatsBomb ids
+    if sort not in VALUE_MEASURES:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(VALUE_MEASURES)}")
+    model = get_threat_model(competition_id, season_id)
+    if model is None:
+        raise HTTPException(status_code=404, detail="No event data for this competition")
+    return {
+        **model.info(),
+        "players": model.player_values(match_id=match_id, player_id=player_id, team_id=team_id, per_match=per_match,
+                                       sort=sort, limit=max(1, min(limit, 5000))),
+    }
+
+# -------------------------
+# Phase 3.14 – Player Timeline
+# -------------------------
+
+def _timeline_sources(sources: str) -> list:
+    selected = [s.strip() for s in sources.split(",") if s.strip()] if sources else list(TIMELINE_SOURCES)
+    unknown = set(selected) - set(TIMELINE_SOURCES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"sources must be among {', '.join(TIMELINE_SOURCES)}")
+    return selected
+
+@router.get("/players/{player_id}/timeline")
+def get_player_timeline(player_id: int, start: datetime = None, end: datetime = None, sources: str = None,
+                        limit: int = TIMELINE_PAGE_SIZE, cursor: str = None):
+    # Match stats, status intervals and biometric readings in one chronological page; follow next_cursor for more
+    selected = _timeline_sources(sources)
+    db = ReadSessionLocal()
+
+    try:
+        try:
+            return get_timeline_page(db, player_id, start=start, end=end, sources=selected,
+                                     limit=max(1, min(limit, 1000)), cursor=cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    finally:
+        db.close()
+
+@router.get("/players/{player_id}/timeline/stream")
+def stream_player_timeline(player_id: int, start: datetime = None, end: datetime = None, sources: str = None):
+    # The whole window as NDJSON, one entry per line, read and sent in batches
+    selected = _timeline_sources(sources)
+
+    def lines():
+        db = ReadSessionLocal()
+        try:
+            chunk = []
+            for _, entry in iter_timeline(db, player_id, start=start, end=end, sources=selected):
+                chunk.append(json.dumps(entry))
+                if len(chunk) >= 200:
+                    yield "\n".join(chunk) + "\n"
+                    chunk = []
+            if chunk:
+                yield "\n".join(chunk) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+# -------------------------
+# Phase 3.15 – Player Entity Resolution
+# -------------------------
+
+def serialize_player_link(link) -> dict:
+    return {
+        "id": link.id,
+        "csv_player_id": link.csv_player_id,
+        "statsbomb_player_id": link.statsbomb_player_id,
+        "csv_name": link.csv_name,
+        "statsbomb_name": link.statsbomb_name,
+        "score": link.score,
+        "name_similarity": link.name_similarity,
+        "block": link.block,
+        "status": link.status,
+        "reviewed_at": link.reviewed_at.isoformat() if link.reviewed_at else None,
+    }
+
+@router.get("/player-links")
+def list_player_links(status: str = None, min_score: float = None, limit: int = 100):
+    # e.g. /player-links?status=candidate for the review queue
+    db = ReadSessionLocal()
+
+    try:
+        links = get_player_links(db, status=status, min_score=min_score, limit=max(1, min(limit, 1000)))
+        return {"links": [serialize_player_link(link) for link in links]}
+    finally:
+        db.close()
+
+@router.post("/player-links/{link_id}")
+async def update_player_link(link_id: int, request: Request):
+    # Body: {"status": "matched"} to confirm a candidate or {"status": "rejected"} to rule it out
+    body = await request.json()
+    if body.get("status") not in ("matched", "rejected"):
+        raise HTTPException(status_code=400, detail="status must be 'matched' or 'rejected'")
     db = SessionLocal()
 
     try:
-        result = compare_players(name1, name2, db)
-        return result
+        link = review_link(db, link_id, body["status"])
+        if link is None:
+            raise HTTPException(status_code=404, detail="Link not found")
+        return serialize_player_link(link)
     finally:
         db.close()
@@ -1,13 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, Date
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, Date, Index, JSON, LargeBinary, text
 from sqlalchemy.dialects.postgresql import TIMESTAMP
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base import Base
+from app.utils.timestamp import utc_now
 
 class Team(Base):
     __tablename__ = "teams"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
+    statsbomb_id = Column(Integer, unique=True, index=True)
+    row_version = Column(Integer, nullable=False, default=0, server_default="0", onupdate=text("row_version + 1"))
     players = relationship("Player", back_populates="team")
 
 class Player(Base):
@@ -15,6 +18,7 @@ class Player(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     age = Column(Integer)
+    birth_date = Column(Date)
     nationality = Column(String)
     position = Column(String)
     appearances = Column(Integer)
@@ -29,12 +33,22 @@ class Player(Base):
     motm = Column(Integer)
     rating = Column(Float)
     team_id = Column(Integer, ForeignKey("teams.id"))
+    statsbomb_id = Column(Integer, unique=True, index=True)
+    nickname = Column(String)
+    # Bumped by every UPDATE, so in-memory caches can tell edits apart from an unchanged table
+    row_version = Column(Integer, nullable=False, default=0, server_default="0", onupdate=text("row_version + 1"))
     
     team = relationship("Team", back_populates="players")
     status_intervals = relationship("StatusInterval", back_populates="player")
     biometric_data = relationship("FactBiometricMinute", back_populates="player")
     match_stats = relationship("MatchStat", back_populates="player")  # ✅ Added this line
 
+    __table_args__ = (
+        # Top-rated search walks this backwards and stops at the LIMIT; squad lookups filter on team_id
+        Index("ix_players_rating", "rating"),
+        Index("ix_players_team_id", "team_id"),
+    )
+
 class StatusInterval(Base):
     __tablename__ = "status_intervals"
     id = Column(Integer, primary_key=True, index=True)
@@ -43,9 +57,14 @@ class StatusInterval(Base):
     status_description = Column(String)
     start_time = Column(TIMESTAMP(timezone=True))
     end_time = Column(TIMESTAMP(timezone=True))
+    row_version = Column(Integer, nullable=False, default=0, server_default="0", onupdate=text("row_version + 1"))
     
     player = relationship("Player", back_populates="status_intervals")
 
+    __table_args__ = (
+        Index("ix_status_intervals_player_id_start_time", "player_id", "start_time"),
+    )
+
 class FactBiometricMinute(Base):
     __tablename__ = "fact_biometric_minute"
     id = Column(Integer, primary_key=True, index=True)
@@ -60,6 +79,10 @@ class FactBiometricMinute(Base):
 
     player = relationship("Player", back_populates="biometric_data")
 
+    __table_args__ = (
+        Index("ix_fact_biometric_minute_player_id_timestamp", "player_id", "timestamp"),
+    )
+
 class AuditLog(Base):
     __tablename__ = "audit_log"
     id = Column(Integer, primary_key=True, index=True)
@@ -79,7 +102,12 @@ class FeedbackLog(Base):
     card_id = Column(String)
     action = Column(String)
     model_version = Column(String)
-    timestamp = Column(TIMESTAMP(timezone=True), default=datetime.utcnow)
+    timestamp = Column(TIMESTAMP(timezone=True), default=utc_now, nullable=False)
+
+    # Range-partitioned by month on PostgreSQL; see app/services/log_retention.py
+    __table_args__ = (
+        Index("ix_feedback_log_timestamp", "timestamp"),
+    )
 
 class SearchLog(Base):
     __tablename__ = "search_log"
@@ -89,7 +117,11 @@ class SearchLog(Base):
     response = Column(Text)
     matched_players = Column(Integer)
     model_version = Column(String, default="v1.0-dummy")
-    timestamp = Column(TIMESTAMP(timezone=True), default=datetime.utcnow)
+    timestamp = Column(TIMESTAMP(timezone=True), default=utc_now, nullable=False)
+
+    __table_args__ = (
+        Index("ix_search_log_timestamp", "timestamp"),
+    )
 
 class ChatPromptLog(Base):
     __tablename__ = "chat_prompt_log"
@@ -98,7 +130,11 @@ class ChatPromptLog(Base):
     prompt = Column(Text, nullable=False)
     response = Column(Text, nullable=False)
     model_version = Column(String, default="v1.0-dummy")
-    timestamp = Column(TIMESTAMP(timezone=True), default=datetime.utcnow)
+    timestamp = Column(TIMESTAMP(timezone=True), default=utc_now, nullable=False)
+
+    __table_args__ = (
+        Index("ix_chat_prompt_log_timestamp", "timestamp"),
+    )
 
 class MatchStat(Base):
     __tablename__ = "match_stats"
@@ -109,4 +145,212 @@ class MatchStat(Base):
     assists = Column(Integer, default=0)
     pass_accuracy = Column(Float, default=0.0)
 
-    player = relationship("Player", back_populates="match_stats")
\ No newline at end of file
+    player = relationship("Player", back_populates="match_stats")
+
+    __table_args__ = (
+        Index("ix_match_stats_player_id_match_date", "player_id", "match_date"),
+    )
+
+class PlayerMatchMinutes(Base):
+    __tablename__ = "player_match_minutes"
+    match_id = Column(Integer, primary_key=True)
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    team_id = Column(Integer, ForeignKey("teams.id"))
+    match_date = Column(Date)
+    started = Column(Boolean, default=False)
+    minutes_played = Column(Float, default=0.0)
+    position = Column(String)
+
+    __table_args__ = (
+        Index("ix_player_match_minutes_player_id_match_date", "player_id", "match_date"),
+    )
+
+class PossessionChain(Base):
+    __tablename__ = "possession_chains"
+    match_id = Column(Integer, primary_key=True)
+    possession = Column(Integer, primary_key=True)
+    statsbomb_team_id = Column(Integer, index=True)
+    period = Column(Integer)
+    start_second = Column(Float)
+    end_second = Column(Float)
+    duration = Column(Float)
+    start_x = Column(Float)
+    end_x = Column(Float)
+    progression = Column(Float)
+    passes = Column(Integer)
+    events = Column(Integer)
+    outcome = Column(String)
+    source_mtime = Column(Float)
+
+class PossessionChainPlayer(Base):
+    __tablename__ = "possession_chain_players"
+    match_id = Column(Integer, primary_key=True)
+    possession = Column(Integer, primary_key=True)
+    statsbomb_player_id = Column(Integer, primary_key=True, index=True)
+    actions = Column(Integer)
+    passes = Column(Integer)
+
+
+class BiometricRollup(Base):
+    __tablename__ = "biometric_rollups"
+    resolution = Column(String, primary_key=True)
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    bucket_start = Column(TIMESTAMP(timezone=True), primary_key=True)
+    samples = Column(Integer, default=0)
+    sprint_count_sum = Column(Integer, default=0)
+    hrv_sum = Column(Float, default=0.0)
+    hrv_samples = Column(Integer, default=0)
+    hrv_min = Column(Float)
+    hrv_max = Column(Float)
+    minutes_played_sum = Column(Float, default=0.0)
+
+    __table_args__ = (
+        Index("ix_biometric_rollups_resolution_bucket_start", "resolution", "bucket_start"),
+    )
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    dedup_key = Column(String)
+    status = Column(String, nullable=False, default="queued")
+    params = Column(JSON)
+    result = Column(JSON)
+    error = Column(Text)
+    progress = Column(Float, default=0.0)
+    message = Column(Text)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    created_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow)
+    started_at = Column(TIMESTAMP(timezone=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
+    # Refreshed while the job runs; a running job whose heartbeat stopped belonged to a worker that died
+    heartbeat_at = Column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        # At most one queued/running job per (kind, dedup_key)
+        Index(
+            "ux_jobs_active_dedup", "kind", "dedup_key", unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
+
+
+class InsightBatch(Base):
+    __tablename__ = "insight_batches"
+    id = Column(Integer, primary_key=True, index=True)
+    model_version = Column(String, nullable=False)
+    generated_at = Column(TIMESTAMP(timezone=True), default=datetime.utcnow)
+    players = Column(Integer, default=0)
+    cards = Column(Integer, default=0)
+
+
+class InsightCard(Base):
+    __tablename__ = "insight_cards"
+    id = Column(Integer, primary_key=True, index=True)
+    card_id = Column(String, unique=True, nullable=False)
+    batch_id = Column(Integer, ForeignKey("insight_batches.id", ondelete="CASCADE"), nullable=False)
+    rank = Column(Integer, nullable=False)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    team_id = Column(Integer)
+    i18n_key = Column(String, nullable=False)
+    match_scope = Column(String)
+    confidence = Column(Float)
+    evidence = Column(JSON)
+    recommendation = Column(Text)
+    model_version = Column(String)
+    generated_at = Column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        # Cards are ranked by confidence within a batch; every listing is a keyset range on rank
+        Index("ix_insight_cards_batch_id_rank", "batch_id", "rank"),
+        Index("ix_insight_cards_batch_id_i18n_key_rank", "batch_id", "i18n_key", "rank"),
+        Index("ix_insight_cards_batch_id_team_id_rank", "batch_id", "team_id", "rank"),
+        Index("ix_insight_cards_batch_id_player_id", "batch_id", "player_id"),
+    )
+
+
+class QuerySketch(Base):
+    # Approximate per-day query analytics over search_log / chat_prompt_log; see app/services/query_sketches.py
+    __tablename__ = "query_sketches"
+    day = Column(Date, primary_key=True)
+    source = Column(String, primary_key=True)
+    model_version = Column(String, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    zero_results = Column(Integer, nullable=False, default=0)
+    count_min = Column(LargeBinary, nullable=False)
+    hll = Column(LargeBinary, nullable=False)
+    heavy_hitters = Column(JSON, nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), default=utc_now)
+
+
+class TeamRollup(Base):
+    # One row per team, maintained by the ingest paths; see app/services/team_rollups.py
+    __tablename__ = "team_rollups"
+    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True)
+    players = Column(Integer, nullable=False, default=0)
+    avg_age = Column(Float)
+    age_u21 = Column(Integer, default=0)
+    age_21_25 = Column(Integer, default=0)
+    age_26_29 = Column(Integer, default=0)
+    age_30_plus = Column(Integer, default=0)
+    minutes = Column(Integer, default=0)
+    minutes_p25 = Column(Float)
+    minutes_median = Column(Float)
+    minutes_p75 = Column(Float)
+    regulars = Column(Integer, default=0)
+    goals = Column(Integer, nullable=False, default=0)
+    assists = Column(Integer, default=0)
+    avg_rating = Column(Float)
+    strength = Column(Float, nullable=False, default=0.0)
+    matches = Column(Integer, default=0)
+    match_goals = Column(Integer, nullable=False, default=0)
+    match_assists = Column(Integer, default=0)
+    updated_at = Column(TIMESTAMP(timezone=True), default=utc_now)
+
+    __table_args__ = (
+        # League table orderings are index scans, not a GROUP BY over players
+        Index("ix_team_rollups_strength", "strength", "team_id"),
+        Index("ix_team_rollups_goals", "goals", "team_id"),
+        Index("ix_team_rollups_match_goals", "match_goals", "team_id"),
+    )
+
+
+class TeamMatchStat(Base):
+    # match_stats summed over each team's players per match date
+    __tablename__ = "team_match_stats"
+    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True)
+    match_date = Column(Date, primary_key=True)
+    players = Column(Integer, nullable=False, default=0)
+    goals = Column(Integer, default=0)
+    assists = Column(Integer, default=0)
+    pass_accuracy = Column(Float)
+
+
+class PlayerLink(Base):
+    # CSV player rows resolved to StatsBomb player rows; see app/services/entity_resolution.py.
+    # csv_player_id is kept after a merge deletes that row, so it is not a foreign key.
+    __tablename__ = "player_links"
+    id = Column(Integer, primary_key=True, index=True)
+    csv_player_id = Column(Integer, nullable=False)
+    statsbomb_player_id = Column(Integer, ForeignKey("players.id", ondelete="CASCADE"), nullable=False)
+    csv_name = Column(String)
+    statsbomb_name = Column(String)
+    score = Column(Float, nullable=False)
+    name_similarity = Column(Float)
+    block = Column(String)
+    # candidate (needs review), matched, merged or rejected; rejected pairs are never proposed again
+    status = Column(String, nullable=False, default="candidate")
+    # Set when a reviewer confirms or rejects the link; reviewed links survive a re-run of the resolver
+    reviewed_at = Column(TIMESTAMP(timezone=True))
+    created_at = Column(TIMESTAMP(timezone=True), default=utc_now)
+    merged_at = Column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        Index("ux_player_links_pair", "csv_player_id", "statsbomb_player_id", unique=True),
+        Index("ix_player_links_statsbomb_player_id", "statsbomb_player_id"),
+        Index("ix_player_links_status_score", "status", "score"),
+    )
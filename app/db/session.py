@@ -1,11 +1,125 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from contextvars import ContextVar
+from itertools import cycle
 import os
+import threading
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Engines are created on first use (or by the app lifespan), not at import time, so scripts and
+# workers that never touch the database don't pay for it and a worker can dispose and recreate them.
+_engines = {}
+_engines_lock = threading.Lock()
+
+# Per-request routing state, set by the read-your-writes middleware
+_request_state = ContextVar("db_request_state", default=None)
+
+
+def _settings() -> dict:
+    from dotenv import load_dotenv
+    load_dotenv()
+    return {
+        "url": os.getenv("DATABASE_URL"),
+        # Comma-separated read replicas; with none configured every read goes to the primary
+        "replicas": [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()],
+        # After a write, reads from the same client stay on the primary for this long (0 disables)
+        "read_your_writes_seconds": float(os.getenv("READ_YOUR_WRITES_SECONDS", "5")),
+    }
+
+
+def init_engines() -> dict:
+    if _engines:
+        return _engines
+    with _engines_lock:
+        if not _engines:
+            settings = _settings()
+            replicas = [create_engine(url) for url in settings["replicas"]]
+            _engines.update({
+                "settings": settings,
+                "primary": create_engine(settings["url"]),
+                "replicas": replicas,
+                "replica_sessions": cycle([sessionmaker(autocommit=False, autoflush=False, bind=e) for e in replicas]),
+            })
+        return _engines
+
+
+def dispose_engines():
+    # Closes pooled connections; the next use creates fresh engines
+    with _engines_lock:
+        for engine in [_engines.get("primary"), *_engines.get("replicas", [])]:
+            if engine is not None:
+                engine.dispose()
+        _engines.clear()
+    SessionLocal.configure(bind=None)
+
+
+def get_engine():
+    return init_engines()["primary"]
+
+
+def read_your_writes_seconds() -> float:
+    return init_engines()["settings"]["read_your_writes_seconds"]
+
+
+def __getattr__(name):
+    # `from app.db.session import engine` keeps working and creates the engine at that point
+    if name == "engine":
+        return get_engine()
+    if name == "replica_engines":
+        return init_engines()["replicas"]
+    raise AttributeError(name)
+
+
+class _LazySessionmaker(sessionmaker):
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+
+
+def ReadSessionLocal():
+    # GET routes and read-only services: round-robin over replicas unless pinned to the primary
+    state = _request_state.get()
+    engines = init_engines()
+    if not engines["replicas"] or (state and state["pin_primary"]):
+        return SessionLocal()
+    return next(engines["replica_sessions"])()
+
+
+def get_db():
+    # FastAPI dependency: one session per request, always closed
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def begin_request(pin_primary: bool = False):
+    state = {"pin_primary": pin_primary, "wrote": False}
+    return _request_state.set(state), state
+
+
+def end_request(token):
+    _request_state.reset(token)
+
+
+def _note_write():
+    state = _request_state.get()
+    if state is not None:
+        state["wrote"] = True
+
 
-load_dotenv()
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_write(session, flush_context):
+    _note_write()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    # Core insert/update/delete passed to session.execute (rollup upserts, link reviews, sketch merges) never flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _note_write()
@@ -0,0 +1,23 @@
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+# INSERT ... ON CONFLICT needs the dialect-specific insert construct
+def insert_for(db: Session):
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
+
+
+# SQLite's scalar min()/max() return NULL if either side is NULL, unlike LEAST/GREATEST
+def least(db: Session, a, b):
+    if db.get_bind().dialect.name == "sqlite":
+        return func.min(func.coalesce(a, b), func.coalesce(b, a))
+    return func.least(a, b)
+
+
+def greatest(db: Session, a, b):
+    if db.get_bind().dialect.name == "sqlite":
+        return func.max(func.coalesce(a, b), func.coalesce(b, a))
+    return func.greatest(a, b)
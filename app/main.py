@@ -1,10 +1,102 @@
-from fastapi import FastAPI
-from app.api.routes import router
+import time
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 
-app.include_router(router)
+PRIMARY_PIN_COOKIE = "db_primary_until"
 
-@app.get("/")
-def read_root():
-    return {"message": "Football Analytics API is running"}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Only cheap work happens before the worker accepts traffic; indexes and caches are
+    # built by the warm-up thread and /ready reports when they are done
+    from app.db.session import init_engines
+    from app.services.jobs import runner as job_runner
+    from app.services.warmup import start_warmup
+
+    init_engines()
+    job_runner.start()
+    app.state.warmup = start_warmup()
+    try:
+        yield
+    finally:
+        await shutdown(app)
+
+
+async def shutdown(app: FastAPI):
+    from app.db.session import SessionLocal, dispose_engines
+    from app.services.jobs import runner as job_runner
+    from app.services.query_sketches import flush_sketches, stop_sketch_flusher
+    from app.services.replay import list_replays, stop_replay
+
+    for replay in list_replays():
+        stop_replay(replay["match_id"])
+    job_runner.shutdown()
+    stop_sketch_flusher()
+    # Fold this worker's unflushed query counts into the shared sketches before exiting
+    db = SessionLocal()
+    try:
+        flush_sketches(db)
+    finally:
+        db.close()
+    dispose_engines()
+
+
+def create_app() -> FastAPI:
+    from app.api.routes import router
+    from app.db.session import begin_request, end_request, read_your_writes_seconds
+    from app.utils.admission import AdmissionControl
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(router)
+
+    @app.middleware("http")
+    async def read_your_writes(request: Request, call_next):
+        # A client that just wrote reads from the primary until replicas have caught up
+        try:
+            pinned_until = float(request.cookies.get(PRIMARY_PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        token, state = begin_request(pin_primary=time.time() < pinned_until)
+
+        try:
+            response = await call_next(request)
+        finally:
+            end_request(token)
+
+        pin_seconds = read_your_writes_seconds()
+        if state["wrote"] and pin_seconds > 0:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                str(time.time() + pin_seconds),
+                max_age=int(pin_seconds) + 1,
+                httponly=True,
+            )
+        return response
+
+    # Added last so it runs first: shed load before any other middleware or DB work
+    app.add_middleware(AdmissionControl)
+
+    @app.get("/")
+    def read_root():
+        return {"message": "Football Analytics API is running"}
+
+    @app.get("/ready")
+    def read_ready(request: Request):
+        # Liveness is "/"; load balancers should route to a worker only once this returns 200
+        warmup = getattr(request.app.state, "warmup", None)
+        if warmup is None:
+            return JSONResponse(status_code=503, content={"ready": False, "steps": {}})
+        status = warmup.status()
+        return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+    return app
+
+
+def __getattr__(name):
+    # `uvicorn app.main:app` keeps working; `uvicorn --factory app.main:create_app` skips the module global
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(name)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from app.schemas.chat import ChatInsightRequest, ChatInsightResponse
-from app.database import get_db
+from app.db.session import get_db
 from app.services.insight_generator import generate_insight
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
@@ -0,0 +1,186 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Player, StatusInterval
+
+# Pick up intervals written by other workers/scripts at most this often
+REFRESH_SECONDS = 5.0
+
+
+def _epoch(ts: datetime, default: float) -> float:
+    if ts is None:
+        return default
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+class TeamIntervals:
+    # Intervals sorted by start: a point query is one searchsorted plus a vectorized
+    # end-time mask over the prefix that started before t
+    def __init__(self):
+        self._pending = []
+        self.starts = np.empty(0)
+        self.ends = np.empty(0)
+        self.player_ids = np.empty(0, dtype=np.int64)
+        self.interval_ids = np.empty(0, dtype=np.int64)
+
+    def add(self, interval_id: int, player_id: int, start: float, end: float):
+        self._pending.append((start, end, player_id, interval_id))
+
+    def _compact(self):
+        if not self._pending:
+            return
+        pending = np.array(self._pending, dtype=np.float64).reshape(-1, 4)
+        self._pending = []
+        starts = np.concatenate([self.starts, pending[:, 0]])
+        order = np.argsort(starts, kind="stable")
+        self.starts = starts[order]
+        self.ends = np.concatenate([self.ends, pending[:, 1]])[order]
+        self.player_ids = np.concatenate([self.player_ids, pending[:, 2].astype(np.int64)])[order]
+        self.interval_ids = np.concatenate([self.interval_ids, pending[:, 3].astype(np.int64)])[order]
+
+    def overlapping(self, start: float, end: float) -> np.ndarray:
+        # Half-open overlap with [start, end); a point query is start == end
+        self._compact()
+        cut = np.searchsorted(self.starts, end, side="right" if end == start else "left")
+        hits = self.ends[:cut] > start
+        return self.interval_ids[:cut][hits]
+
+
+class AvailabilityIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        self._last_refresh = 0.0
+
+    def _reset(self):
+        self._teams = {}
+        self._rosters = {}
+        self._player_team = {}
+        self._intervals = {}
+        self._last_interval_id = 0
+        self._last_player_id = 0
+        # [rows, sum of row_version] over everything read so far, per table
+        self._players_seen = [0, 0]
+        self._intervals_seen = [0, 0]
+
+    def load(self, db: Session):
+        with self._lock:
+            self._load(db)
+
+    def _indexed_rows_unchanged(self, db: Session) -> bool:
+        # Rows at or below the watermarks must still be exactly the ones read: a transfer, an interval that got
+        # its end_time, a delete or a merge changes the count or the version sum, as does a late-committed insert
+        players = db.execute(select(func.count(Player.id), func.coalesce(func.sum(Player.row_version), 0))
+                             .where(Player.id <= self._last_player_id)).one()
+        intervals = db.execute(select(func.count(StatusInterval.id), func.coalesce(func.sum(StatusInterval.row_version), 0))
+                               .where(StatusInterval.id <= self._last_interval_id)).one()
+        return list(players) == self._players_seen and list(intervals) == self._intervals_seen
+
+    def _load(self, db: Session):
+        # Incremental: only players and intervals added since the last load are read, unless
+        # something already indexed changed, in which case the index is rebuilt from scratch
+        if (self._last_player_id or self._last_interval_id) and not self._indexed_rows_unchanged(db):
+            self._reset()
+
+        for player_id, team_id, row_version in (
+            db.query(Player.id, Player.team_id, Player.row_version).filter(Player.id > self._last_player_id)
+        ):
+            self._player_team[player_id] = team_id
+            self._rosters.setdefault(team_id, set()).add(player_id)
+            self._last_player_id = max(self._last_player_id, player_id)
+            self._players_seen[0] += 1
+            self._players_seen[1] += row_version
+
+        rows = (
+            db.query(StatusInterval)
+            .filter(StatusInterval.id > self._last_interval_id)
+            .order_by(StatusInterval.id)
+            .all()
+        )
+        for row in rows:
+            self._add(row)
+        self._last_refresh = time.monotonic()
+
+    def _add(self, row: StatusInterval):
+        self._last_interval_id = max(self._last_interval_id, row.id)
+        self._intervals_seen[0] += 1
+        self._intervals_seen[1] += row.row_version
+        if row.player_id not in self._player_team:
+            return
+        team_id = self._player_team[row.player_id]
+        self._intervals[row.id] = {
+            "interval_id": row.id,
+            "player_id": row.player_id,
+            "status_type": row.status_type,
+            "status_description": row.status_description,
+            "start_time": row.start_time.isoformat() if row.start_time else None,
+            "end_time": row.end_time.isoformat() if row.end_time else None,
+        }
+        self._teams.setdefault(team_id, TeamIntervals()).add(
+            row.id, row.player_id, _epoch(row.start_time, -np.inf), _epoch(row.end_time, np.inf)
+        )
+
+    def refresh_if_stale(self, db: Session):
+        if time.monotonic() - self._last_refresh < REFRESH_SECONDS:
+            return
+        with self._lock:
+            self._load(db)
+
+    def status(self, team_id: int, start: datetime, end: datetime = None) -> dict:
+        start_epoch = _epoch(start, -np.inf)
+        end_epoch = _epoch(end, np.inf) if end else start_epoch
+
+        with self._lock:
+            team = self._teams.get(team_id)
+            interval_ids = team.overlapping(start_epoch, end_epoch) if team else []
+            unavailable = [self._intervals[int(i)] for i in interval_ids]
+            roster = self._rosters.get(team_id, set())
+
+        out = {p["player_id"] for p in unavailable}
+        return {
+            "team_id": team_id,
+            "available": sorted(roster - out),
+            "unavailable": unavailable,
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_availability_index(db: Session) -> AvailabilityIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = AvailabilityIndex()
+                index.load(db)
+                _index = index
+    _index.refresh_if_stale(db)
+    return _index
+
+
+def add_status_interval(db: Session, player_id: int, status_type: str, status_description: str,
+                        start_time: datetime, end_time: datetime = None) -> StatusInterval:
+    interval = StatusInterval(
+        player_id=player_id,
+        status_type=status_type,
+        status_description=status_description,
+        start_time=start_time,
+        end_time=end_time,
+    )
+    db.add(interval)
+    db.commit()
+    db.refresh(interval)
+
+    # Update the in-memory index right away instead of waiting for the next refresh; the incremental
+    # load picks up the committed row along with anything other workers wrote before it
+    get_availability_index(db).load(db)
+    return interval
@@ -0,0 +1,224 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.orm import Session
+
+from app.db.models import FactBiometricMinute, BiometricRollup
+from app.db.upsert import insert_for, least, greatest
+
+# Finest to coarsest; "minute" means the raw fact_biometric_minute rows
+RESOLUTIONS = {
+    "minute": 60,
+    "5min": 300,
+    "hour": 3600,
+    "day": 86400,
+}
+ROLLUP_RESOLUTIONS = ["5min", "hour", "day"]
+
+DEFAULT_MAX_POINTS = 500
+
+
+def bucket_start(ts: datetime, seconds: int) -> datetime:
+    epoch = ts.timestamp()
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+
+def _aggregate(readings) -> dict:
+    buckets = {}
+    for r in readings:
+        if r.player_id is None or r.timestamp is None:
+            continue
+        for resolution in ROLLUP_RESOLUTIONS:
+            key = (resolution, r.player_id, bucket_start(r.timestamp, RESOLUTIONS[resolution]))
+            b = buckets.setdefault(key, {
+                "samples": 0, "sprint_count_sum": 0, "hrv_sum": 0.0, "hrv_samples": 0,
+                "hrv_min": None, "hrv_max": None, "minutes_played_sum": 0.0,
+            })
+            b["samples"] += 1
+            b["sprint_count_sum"] += r.sprint_count or 0
+            b["minutes_played_sum"] += r.minutes_played or 0.0
+            hrv = r.heart_rate_variability
+            if hrv is not None:
+                b["hrv_sum"] += hrv
+                b["hrv_samples"] += 1
+                b["hrv_min"] = hrv if b["hrv_min"] is None else min(b["hrv_min"], hrv)
+                b["hrv_max"] = hrv if b["hrv_max"] is None else max(b["hrv_max"], hrv)
+    return buckets
+
+
+def apply_to_rollups(db: Session, readings) -> int:
+    # Fold new raw readings into every rollup resolution with additive upserts
+    buckets = _aggregate(readings)
+    if not buckets:
+        return 0
+
+    rows = [
+        {"resolution": res, "player_id": pid, "bucket_start": start, **values}
+        for (res, pid, start), values in buckets.items()
+    ]
+    upsert_rollups(db, rows)
+    return len(rows)
+
+
+def upsert_rollups(db: Session, rows: list) -> None:
+    # Adds each row's sums into the existing bucket; min/max widen rather than overwrite
+    if not rows:
+        return
+    table = BiometricRollup.__table__
+    stmt = insert_for(db)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.resolution, table.c.player_id, table.c.bucket_start],
+        set_={
+            "samples": table.c.samples + stmt.excluded.samples,
+            "sprint_count_sum": table.c.sprint_count_sum + stmt.excluded.sprint_count_sum,
+            "hrv_sum": table.c.hrv_sum + stmt.excluded.hrv_sum,
+            "hrv_samples": table.c.hrv_samples + stmt.excluded.hrv_samples,
+            "hrv_min": least(db, table.c.hrv_min, stmt.excluded.hrv_min),
+            "hrv_max": greatest(db, table.c.hrv_max, stmt.excluded.hrv_max),
+            "minutes_played_sum": table.c.minutes_played_sum + stmt.excluded.minutes_played_sum,
+        },
+    )
+    db.execute(stmt, rows)
+
+
+def record_biometrics(db: Session, readings: list) -> None:
+    # Write path for new sensor data: raw rows and rollups land in the same transaction
+    db.add_all(readings)
+    apply_to_rollups(db, readings)
+
+
+def rebuild_rollups(db: Session, since: datetime = None, batch_size: int = 10000) -> int:
+    # Start at a day boundary so partially covered buckets are rebuilt whole
+    day_start = bucket_start(since, RESOLUTIONS["day"]) if since else None
+    stale = db.query(BiometricRollup)
+    query = db.query(FactBiometricMinute)
+    if day_start:
+        stale = stale.filter(BiometricRollup.bucket_start >= day_start)
+        query = query.filter(FactBiometricMinute.timestamp >= day_start)
+    stale.delete(synchronize_session=False)
+
+    batch = []
+    total = 0
+    for reading in query.yield_per(batch_size):
+        batch.append(reading)
+        if len(batch) >= batch_size:
+            apply_to_rollups(db, batch)
+            total += len(batch)
+            batch = []
+    apply_to_rollups(db, batch)
+    total += len(batch)
+    db.commit()
+    return total
+
+
+def rollup_mismatches(db: Session, player_ids) -> set:
+    # Players whose rollups at some resolution don't add up to their raw readings (samples, sprints)
+    player_ids = list(player_ids)
+    facts = {
+        r.player_id: (r.samples, r.sprints or 0)
+        for r in db.execute(
+            select(FactBiometricMinute.player_id, func.count().label("samples"),
+                   func.sum(func.coalesce(FactBiometricMinute.sprint_count, 0)).label("sprints"))
+            .where(FactBiometricMinute.player_id.in_(player_ids), FactBiometricMinute.timestamp.isnot(None))
+            .group_by(FactBiometricMinute.player_id)
+        )
+    }
+    rollups = {
+        (r.player_id, r.resolution): (r.samples or 0, r.sprints or 0)
+        for r in db.execute(
+            select(BiometricRollup.player_id, BiometricRollup.resolution,
+                   func.sum(BiometricRollup.samples).label("samples"),
+                   func.sum(BiometricRollup.sprint_count_sum).label("sprints"))
+            .where(BiometricRollup.player_id.in_(player_ids))
+            .group_by(BiometricRollup.player_id, BiometricRollup.resolution)
+        )
+    }
+    return {
+        player_id for player_id in player_ids for resolution in ROLLUP_RESOLUTIONS
+        if rollups.get((player_id, resolution), (0, 0)) != facts.get(player_id, (0, 0))
+    }
+
+
+def rebuild_player_rollups(db: Session, player_ids, batch_size: int = 10000) -> int:
+    # Recomputes every rollup of the given players from their raw readings; the caller commits
+    player_ids = list(player_ids)
+    db.execute(delete(BiometricRollup).where(BiometricRollup.player_id.in_(player_ids)))
+    query = db.query(FactBiometricMinute).filter(FactBiometricMinute.player_id.in_(player_ids))
+    batch = []
+    total = 0
+    for reading in query.yield_per(batch_size):
+        batch.append(reading)
+        if len(batch) >= batch_size:
+            apply_to_rollups(db, batch)
+            total += len(batch)
+            batch = []
+    apply_to_rollups(db, batch)
+    return total + len(batch)
+
+
+def select_resolution(start: datetime, end: datetime, max_points: int = DEFAULT_MAX_POINTS) -> str:
+    # Coarsen only as far as needed to keep the series within the point budget
+    span = max((end - start).total_seconds(), 0)
+    for resolution, seconds in RESOLUTIONS.items():
+        if span / seconds <= max_points:
+            return resolution
+    return "day"
+
+
+def get_workload_series(db: Session, player_id: int, start: datetime, end: datetime,
+                        max_points: int = DEFAULT_MAX_POINTS) -> dict:
+    resolution = select_resolution(start, end, max_points)
+
+    if resolution == "minute":
+        rows = (
+            db.query(FactBiometricMinute)
+            .filter(
+                FactBiometricMinute.player_id == player_id,
+                FactBiometricMinute.timestamp >= start,
+                FactBiometricMinute.timestamp < end,
+            )
+            .order_by(FactBiometricMinute.timestamp)
+            .all()
+        )
+        points = [
+            {
+                "t": r.timestamp.isoformat(),
+                "samples": 1,
+                "sprint_count": r.sprint_count,
+                "avg_hrv": r.heart_rate_variability,
+                "minutes_played": r.minutes_played,
+            }
+            for r in rows
+        ]
+    else:
+        rows = (
+            db.query(BiometricRollup)
+            .filter(
+                BiometricRollup.resolution == resolution,
+                BiometricRollup.player_id == player_id,
+                BiometricRollup.bucket_start >= bucket_start(start, RESOLUTIONS[resolution]),
+                BiometricRollup.bucket_start < end,
+            )
+            .order_by(BiometricRollup.bucket_start)
+            .all()
+        )
+        points = [
+            {
+                "t": r.bucket_start.isoformat(),
+                "samples": r.samples,
+                "sprint_count": r.sprint_count_sum,
+                # Readings without HRV still count as samples, so the mean divides by readings that had one
+                "avg_hrv": round(r.hrv_sum / r.hrv_samples, 2) if r.hrv_samples else None,
+                "hrv_min": r.hrv_min,
+                "hrv_max": r.hrv_max,
+                "minutes_played": round(r.minutes_played_sum, 2),
+            }
+            for r in rows
+        ]
+
+    return {"player_id": player_id, "resolution": resolution, "points": points}
+
+
+def default_window(days: int = 30):
+    end = datetime.now(timezone.utc)
+    return end - timedelta(days=days), end
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import Player
+from app.services.player_store import players_version
+
+MODEL_PATH = os.getenv("CONTRACT_MODEL_PATH", "data/models/contract_projection.json")
+MODEL_FAMILY = "v1.1-linear"
+# How often the players table is fingerprinted to decide whether cached scores are stale
+DATA_CHECK_SECONDS = 5.0
+
+FEATURES = [
+    "age", "age_from_peak_sq", "minutes_per_app", "goals_per90", "assists_per90",
+    "rating", "pass_success", "shots_per_game", "aerials_won", "motm_rate", "cards_per90", "appearances",
+]
+
+# Hand-set linear heads on standardized features (not fitted to any target): market value is
+# predicted in log space, renewal risk as a logit and contract length directly in years
+DEFAULT_HEADS = {
+    "log_market_value": {
+        "intercept": 2.6,
+        "weights": {"age_from_peak_sq": -0.3, "minutes_per_app": 0.2, "goals_per90": 0.2, "assists_per90": 0.15,
+                    "rating": 0.35, "pass_success": 0.05, "shots_per_game": 0.05, "motm_rate": 0.1, "appearances": 0.1},
+    },
+    "renewal_logit": {
+        "intercept": -0.2,
+        "weights": {"age": -0.3, "minutes_per_app": -0.5, "rating": 0.35, "goals_per90": 0.2, "motm_rate": 0.15,
+                    "cards_per90": 0.1},
+    },
+    "contract_length": {
+        "intercept": 3.0,
+        "weights": {"age": -0.9, "rating": 0.4, "minutes_per_app": 0.3, "appearances": 0.2},
+    },
+}
+
+_model = None
+_model_lock = threading.Lock()
+_scores = None
+_scores_lock = threading.Lock()
+
+
+def feature_matrix(rows) -> tuple:
+    # rows: (id, age, appearances, minutes, goals, assists, yellow_cards, red_cards,
+    #        shots_per_game, pass_success, aerials_won, motm, rating)
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(FEATURES))), np.zeros(0)
+    raw = np.array([[np.nan if v is None else v for v in r] for r in rows], dtype=np.float64)
+    ids = raw[:, 0].astype(np.int64)
+    age, apps, minutes, goals, assists, yellow, red, spg, pass_success, aerials, motm, rating = raw[:, 1:].T
+
+    safe_apps = np.where(apps > 0, apps, np.nan)
+    safe_minutes = np.where(minutes > 0, minutes, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        columns = {
+            "age": age,
+            "age_from_peak_sq": (age - 26.0) ** 2,
+            "minutes_per_app": minutes / safe_apps,
+            "goals_per90": goals / safe_minutes * 90,
+            "assists_per90": assists / safe_minutes * 90,
+            "rating": rating,
+            "pass_success": pass_success,
+            "shots_per_game": spg,
+            "aerials_won": aerials,
+            "motm_rate": motm / safe_apps,
+            "cards_per90": (yellow + 2 * red) / safe_minutes * 90,
+            "appearances": apps,
+        }
+    X = np.stack([columns[f] for f in FEATURES], axis=1)
+    completeness = 1.0 - np.isnan(X).mean(axis=1)
+    return ids, X, completeness
+
+
+def fit_artifact(X: np.ndarray, heads: dict = None) -> dict:
+    # Normalization comes from the current population; head weights are the model's coefficients
+    heads = heads or DEFAULT_HEADS
+    mean = np.nanmean(X, axis=0) if len(X) else np.zeros(len(FEATURES))
+    std = np.nanstd(X, axis=0) if len(X) else np.ones(len(FEATURES))
+    artifact = {
+        "features": FEATURES,
+        "mean": np.round(np.nan_to_num(mean), 6).tolist(),
+        "std": np.round(np.where(np.nan_to_num(std) > 0, std, 1.0), 6).tolist(),
+        "heads": {
+            name: {"intercept": h["intercept"], "weights": [h["weights"].get(f, 0.0) for f in FEATURES]}
+            for name, h in heads.items()
+        },
+    }
+    digest = hashlib.sha256(json.dumps(artifact, sort_keys=True).encode()).hexdigest()[:8]
+    artifact["model_version"] = f"{MODEL_FAMILY}-{digest}"
+    return artifact
+
+
+def save_artifact(artifact: dict, path: str = MODEL_PATH) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(artifact, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+class ContractModel:
+    def __init__(self, artifact: dict, mtime_ns: int = None):
+        if artifact["features"] != FEATURES:
+            raise ValueError("Contract model artifact was built for a different feature set")
+        self.model_version = artifact["model_version"]
+        self.mtime_ns = mtime_ns
+        self.mean = np.array(artifact["mean"])
+        self.std = np.array(artifact["std"])
+        self.head_names = list(artifact["heads"])
+        # One (features x heads) matrix so every head is scored in a single matmul
+        self.weights = np.array([artifact["heads"][h]["weights"] for h in self.head_names]).T
+        self.intercepts = np.array([artifact["heads"][h]["intercept"] for h in self.head_names])
+
+    def score(self, X: np.ndarray, completeness: np.ndarray, minutes: np.ndarray) -> dict:
+        # Missing features sit at the population mean, i.e. contribute nothing; small-sample
+        # per-90 rates are clamped so one cameo goal can't dominate the projection
+        Z = np.clip(np.nan_to_num((X - self.mean) / self.std), -3.0, 3.0)
+        out = dict(zip(self.head_names, (Z @ self.weights + self.intercepts).T))
+        exposure = 1.0 - np.exp(-np.nan_to_num(minutes) / 1500.0)
+        return {
+            "market_value": np.round(np.clip(np.exp(out["log_market_value"]), 0.5, 200.0), 2),
+            "contract_length_years": np.clip(np.rint(out["contract_length"]), 1, 5).astype(np.int64),
+            "renewal_risk_score": np.round(1.0 / (1.0 + np.exp(-out["renewal_logit"])), 2),
+            "confidence": np.round(0.5 + 0.49 * exposure * completeness, 2),
+        }
+
+
+def get_model() -> ContractModel:
+    # Reloaded when the artifact file changes, so a rebuilt model (and its model_version) is served without a restart
+    global _model
+    mtime_ns = os.stat(MODEL_PATH).st_mtime_ns
+    if _model is None or _model.mtime_ns != mtime_ns:
+        with _model_lock:
+            if _model is None or _model.mtime_ns != mtime_ns:
+                with open(MODEL_PATH) as f:
+                    _model = ContractModel(json.load(f), mtime_ns)
+    return _model
+
+
+FEATURE_COLUMNS = [
+    Player.id, Player.age, Player.appearances, Player.minutes, Player.goals, Player.assists,
+    Player.yellow_cards, Player.red_cards, Player.shots_per_game, Player.pass_success,
+    Player.aerials_won, Player.motm, Player.rating,
+]
+
+
+class ContractScores:
+    def __init__(self, model_version: str, data_version: str, ids: np.ndarray, scores: dict):
+        self.model_version = model_version
+        self.data_version = data_version
+        self.ids = ids
+        self.scores = scores
+        self.position = {int(pid): i for i, pid in enumerate(ids)}
+        self.checked_at = time.monotonic()
+
+    def rows(self, player_ids) -> list:
+        out = []
+        for pid in player_ids:
+            i = self.position.get(pid)
+            if i is None:
+                continue
+            out.append({
+                "player_id": pid,
+                "market_value": float(self.scores["market_value"][i]),
+                "contract_length_years": int(self.scores["contract_length_years"][i]),
+                "renewal_risk_score": float(self.scores["renewal_risk_score"][i]),
+                "confidence": float(self.scores["confidence"][i]),
+                "model_version": self.model_version,
+            })
+        return out
+
+
+def get_contract_scores(db: Session) -> ContractScores:
+    # Whole-population scores cached by (model_version, data_version); rescored only when either changes
+    global _scores
+    model = get_model()
+    cached = _scores
+    if cached is not None and cached.model_version == model.model_version:
+        if time.monotonic() - cached.checked_at < DATA_CHECK_SECONDS:
+            return cached
+        version = players_version(db)
+        if version == cached.data_version:
+            cached.checked_at = time.monotonic()
+            return cached
+    else:
+        version = players_version(db)
+
+    with _scores_lock:
+        if _scores is not None and (_scores.model_version, _scores.data_version) == (model.model_version, version):
+            return _scores
+        ids, X, completeness = feature_matrix(db.execute(select(*FEATURE_COLUMNS).order_by(Player.id)).all())
+        minutes = X[:, FEATURES.index("minutes_per_app")] * X[:, FEATURES.index("appearances")]
+        _scores = ContractScores(model.model_version, version, ids, model.score(X, completeness, minutes))
+        return _scores
+
+
+def project_contracts(db: Session, player_ids) -> list:
+    return get_contract_scores(db).rows(player_ids)
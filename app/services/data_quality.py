@@ -0,0 +1,214 @@
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+EXPECTATIONS_DIR = "gx/expectations"
+VALIDATIONS_DIR = "gx/uncommitted/validations"
+DEFAULT_CHUNK_SIZE = 50000
+
+# Used when a table has no saved suite (mirrors the old scripts/validate_table.py checks)
+DEFAULT_EXPECTATIONS = {
+    "*": [
+        {"expectation_type": "expect_column_values_to_be_unique", "kwargs": {"column": "id"}},
+        {"expectation_type": "expect_column_values_to_not_be_null", "kwargs": {"column": "id"}},
+    ],
+    "players": [
+        {"expectation_type": "expect_column_values_to_not_be_null", "kwargs": {"column": "name"}},
+        {"expectation_type": "expect_column_values_to_be_between", "kwargs": {"column": "age", "min_value": 15, "max_value": 45}},
+        {"expectation_type": "expect_column_values_to_be_between", "kwargs": {"column": "rating", "min_value": 0.0, "max_value": 10.0}},
+    ],
+}
+
+SUPPORTED = {
+    "expect_column_values_to_be_unique",
+    "expect_column_values_to_not_be_null",
+    "expect_column_values_to_be_between",
+}
+
+
+def load_suite(table: str) -> dict:
+    path = os.path.join(EXPECTATIONS_DIR, f"{table}_suite.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {
+        "expectation_suite_name": f"{table}_suite",
+        "expectations": DEFAULT_EXPECTATIONS["*"] + DEFAULT_EXPECTATIONS.get(table, []),
+    }
+
+
+def _quote(engine: Engine, name: str) -> str:
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def _pushdown_counts(engine: Engine, table: str, expectations: list) -> dict:
+    # Every check becomes one aggregate column, so the whole table is scanned once in SQL
+    columns = ["COUNT(*) AS element_count"]
+    for i, exp in enumerate(expectations):
+        col = _quote(engine, exp["kwargs"]["column"])
+        kind = exp["expectation_type"]
+        columns.append(f"COUNT(*) - COUNT({col}) AS missing_{i}")
+        if kind == "expect_column_values_to_be_unique":
+            columns.append(f"COUNT({col}) - COUNT(DISTINCT {col}) AS unexpected_{i}")
+        elif kind == "expect_column_values_to_not_be_null":
+            columns.append(f"COUNT(*) - COUNT({col}) AS unexpected_{i}")
+        elif kind == "expect_column_values_to_be_between":
+            bounds = []
+            if exp["kwargs"].get("min_value") is not None:
+                bounds.append(f"{col} < :min_{i}")
+            if exp["kwargs"].get("max_value") is not None:
+                bounds.append(f"{col} > :max_{i}")
+            condition = " OR ".join(bounds) or "1 = 0"
+            columns.append(f"SUM(CASE WHEN {condition} THEN 1 ELSE 0 END) AS unexpected_{i}")
+
+    params = {}
+    for i, exp in enumerate(expectations):
+        if exp["expectation_type"] == "expect_column_values_to_be_between":
+            params[f"min_{i}"] = exp["kwargs"].get("min_value")
+            params[f"max_{i}"] = exp["kwargs"].get("max_value")
+
+    sql = f"SELECT {', '.join(columns)} FROM {_quote(engine, table)}"
+    with engine.connect() as conn:
+        row = conn.execute(text(sql), params).mappings().one()
+
+    counts = {"element_count": row["element_count"]}
+    for i in range(len(expectations)):
+        counts[i] = {"missing_count": row[f"missing_{i}"] or 0, "unexpected_count": row[f"unexpected_{i}"] or 0}
+    return counts
+
+
+def _chunked_counts(engine: Engine, table: str, expectations: list, chunk_size: int, sample: float) -> dict:
+    # pandas costs more to import than the rest of this module; only the streaming path needs it
+    import pandas as pd
+
+    # Only the referenced columns are streamed, through a server-side cursor
+    needed = sorted({exp["kwargs"]["column"] for exp in expectations})
+    sql = f"SELECT {', '.join(_quote(engine, c) for c in needed)} FROM {_quote(engine, table)}"
+
+    counts = {"element_count": 0}
+    for i in range(len(expectations)):
+        counts[i] = {"missing_count": 0, "unexpected_count": 0}
+    seen = {exp["kwargs"]["column"]: [] for exp in expectations if exp["expectation_type"] == "expect_column_values_to_be_unique"}
+
+    with engine.connect().execution_options(stream_results=True, max_row_buffer=chunk_size) as conn:
+        for n, chunk in enumerate(pd.read_sql(text(sql), conn, chunksize=chunk_size)):
+            if sample < 1.0:
+                chunk = chunk.sample(frac=sample, random_state=n)
+            counts["element_count"] += len(chunk)
+
+            for i, exp in enumerate(expectations):
+                kind = exp["expectation_type"]
+                values = chunk[exp["kwargs"]["column"]]
+                missing = values.isna()
+                counts[i]["missing_count"] += int(missing.sum())
+
+                if kind == "expect_column_values_to_not_be_null":
+                    counts[i]["unexpected_count"] += int(missing.sum())
+                elif kind == "expect_column_values_to_be_between":
+                    present = values[~missing].to_numpy(dtype=np.float64)
+                    bad = np.zeros(len(present), dtype=bool)
+                    if exp["kwargs"].get("min_value") is not None:
+                        bad |= present < exp["kwargs"]["min_value"]
+                    if exp["kwargs"].get("max_value") is not None:
+                        bad |= present > exp["kwargs"]["max_value"]
+                    counts[i]["unexpected_count"] += int(bad.sum())
+
+            for column, parts in seen.items():
+                parts.append(chunk[column].dropna().to_numpy())
+
+    # Duplicates can span chunks, so uniqueness is settled once over the collected column
+    for i, exp in enumerate(expectations):
+        if exp["expectation_type"] == "expect_column_values_to_be_unique":
+            parts = seen[exp["kwargs"]["column"]]
+            values = np.concatenate(parts) if parts else np.empty(0)
+            counts[i]["unexpected_count"] = int(len(values) - len(np.unique(values)))
+    return counts
+
+
+def _result(exp: dict, counts: dict, element_count: int) -> dict:
+    unexpected = counts["unexpected_count"]
+    nonmissing = element_count - counts["missing_count"]
+    basis = element_count if exp["expectation_type"] == "expect_column_values_to_not_be_null" else nonmissing
+    unexpected_percent = (unexpected / basis * 100) if basis else 0.0
+    mostly = exp["kwargs"].get("mostly", 1.0)
+
+    return {
+        "success": unexpected_percent <= (1.0 - mostly) * 100,
+        "expectation_config": {
+            "expectation_type": exp["expectation_type"],
+            "kwargs": exp["kwargs"],
+            "meta": exp.get("meta", {}),
+        },
+        "result": {
+            "element_count": element_count,
+            "missing_count": counts["missing_count"],
+            "unexpected_count": unexpected,
+            "unexpected_percent": round(unexpected_percent, 4),
+        },
+        "exception_info": {"raised_exception": False, "exception_message": None, "exception_traceback": None},
+    }
+
+
+def validate_table(engine: Engine, table: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   sample: float = 1.0, pushdown: bool = True, run_name: str = None) -> dict:
+    suite = load_suite(table)
+    expectations = [e for e in suite["expectations"] if e["expectation_type"] in SUPPORTED]
+    skipped = [e["expectation_type"] for e in suite["expectations"] if e["expectation_type"] not in SUPPORTED]
+
+    # Sampling only makes sense when rows are streamed; otherwise let the database aggregate
+    if pushdown and sample >= 1.0:
+        counts = _pushdown_counts(engine, table, expectations)
+    else:
+        counts = _chunked_counts(engine, table, expectations, chunk_size, sample)
+
+    results = [_result(e, counts[i], counts["element_count"]) for i, e in enumerate(expectations)]
+    successful = sum(r["success"] for r in results)
+    run_time = datetime.now(timezone.utc)
+
+    return {
+        "success": successful == len(results),
+        "results": results,
+        "statistics": {
+            "evaluated_expectations": len(results),
+            "successful_expectations": successful,
+            "unsuccessful_expectations": len(results) - successful,
+            "success_percent": round(successful / len(results) * 100, 2) if results else None,
+        },
+        "meta": {
+            "expectation_suite_name": suite["expectation_suite_name"],
+            "active_batch_definition": {"datasource_name": "postgres_db", "data_asset_name": table},
+            "run_id": {"run_name": run_name or f"{table}_checkpoint", "run_time": run_time.isoformat()},
+            "validation_time": run_time.strftime("%Y%m%dT%H%M%S.%fZ"),
+            "sampled_fraction": sample,
+            "skipped_expectations": skipped,
+        },
+    }
+
+
+def save_result(result: dict) -> str:
+    # Same layout as GX's validations store: <suite>/<run_name>/<run_time>/<batch>.json
+    meta = result["meta"]
+    folder = os.path.join(
+        VALIDATIONS_DIR,
+        meta["expectation_suite_name"],
+        meta["run_id"]["run_name"],
+        meta["validation_time"],
+    )
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{meta['active_batch_definition']['data_asset_name']}-{uuid.uuid4().hex[:8]}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, default=str)
+    return path
+
+
+def validate_tables(engine: Engine, tables: list, max_workers: int = 4, **options) -> dict:
+    # Each table runs on its own pooled connection
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(lambda t: validate_table(engine, t, **options), tables)
+        return dict(zip(tables, results))
@@ -0,0 +1,333 @@
+import re
+import unicodedata
+
+import numpy as np
+from sqlalchemy import select, update, delete, bindparam, func, exists, and_
+from sqlalchemy.orm import Session, aliased
+
+from app.db.models import (
+    Player, PlayerLink, StatusInterval, FactBiometricMinute, MatchStat, PlayerMatchMinutes, BiometricRollup, InsightCard,
+)
+from app.services.biometric_rollups import upsert_rollups, rollup_mismatches, rebuild_player_rollups
+from app.services.team_rollups import refresh_team_rollups
+from app.utils.timestamp import utc_now
+
+# Score = trigram cosine of the names, adjusted by birth date, nationality and team evidence
+MATCH_THRESHOLD = 0.85
+CANDIDATE_THRESHOLD = 0.6
+DOB_BONUS = 0.15
+NATIONALITY_BONUS = 0.05
+NATIONALITY_PENALTY = 0.1
+TEAM_BONUS = 0.05
+# A block this large (a very common surname + initial) is skipped; its players can still meet in a birth-date block
+MAX_BLOCK_PAIRS = 250_000
+# Candidate pairs scored per vectorized pass, bounding memory
+PAIR_CHUNK = 200_000
+
+# Season stats come from the CSV; a merge copies them onto the StatsBomb row
+CSV_COLUMNS = ["age", "birth_date", "nationality", "position", "appearances", "minutes", "goals", "assists",
+               "yellow_cards", "red_cards", "shots_per_game", "pass_success", "aerials_won", "motm", "rating"]
+
+_FOLD = str.maketrans({"ø": "o", "æ": "ae", "œ": "oe", "ß": "ss", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "ı": "i"})
+_non_letters = re.compile(r"[^a-z]+")
+
+
+def normalize(text) -> str:
+    # "Nikola Vlašić" -> "nikola vlasic"
+    if not text:
+        return ""
+    folded = unicodedata.normalize("NFKD", str(text).lower().translate(_FOLD))
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return _non_letters.sub(" ", folded).strip()
+
+
+def normalize_nationality(text) -> str:
+    # Token order differs between sources: "Korea (South)" and "South Korea" both become "korea south"
+    return " ".join(sorted(normalize(text).split()))
+
+
+def name_blocks(*names) -> set:
+    # Surname + first initial per name form; for three or more tokens the second-to-last token is
+    # tried as the surname too (compound surnames, "Hermoso Fuentes" vs "Hermoso")
+    keys = set()
+    for name in names:
+        tokens = normalize(name).split()
+        if not tokens:
+            continue
+        surnames = tokens[-2:] if len(tokens) >= 3 else tokens[-1:]
+        keys.update(f"n:{surname}:{tokens[0][0]}" for surname in surnames)
+    return keys
+
+
+def _trigrams(names: list, vocab: dict) -> tuple:
+    # CSR layout: ids[ptr[i]:ptr[i + 1]] are the distinct trigram ids of names[i]
+    ptr, ids = [0], []
+    for name in names:
+        padded = f"  {name} " if name else ""
+        grams = {vocab.setdefault(padded[i:i + 3], len(vocab)) for i in range(len(padded) - 2)}
+        ids.extend(grams)
+        ptr.append(len(ids))
+    return np.array(ptr, dtype=np.int64), np.array(ids, dtype=np.int64)
+
+
+def _ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # Concatenation of arange(start, start + length) for every pair, without a Python loop
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+
+def trigram_cosine(left: tuple, right: tuple, li: np.ndarray, ri: np.ndarray, vocab_size: int) -> np.ndarray:
+    # Cosine similarity of binary trigram vectors for each pair (left[li[k]], right[ri[k]]):
+    # every pair's trigrams are keyed by (pair, trigram), so one sorted membership test counts the shared ones
+    (l_ptr, l_ids), (r_ptr, r_ids) = left, right
+    l_len, r_len = np.diff(l_ptr)[li], np.diff(r_ptr)[ri]
+    pairs = np.arange(len(li))
+    l_pair = np.repeat(pairs, l_len)
+    l_keys = l_pair * vocab_size + l_ids[_ranges(l_ptr[li], l_len)]
+    r_keys = np.repeat(pairs, r_len) * vocab_size + r_ids[_ranges(r_ptr[ri], r_len)]
+    shared = np.bincount(l_pair[np.isin(l_keys, r_keys, assume_unique=True)], minlength=len(li))
+    norm = np.sqrt(l_len * r_len)
+    return np.divide(shared, norm, out=np.zeros(len(li)), where=norm > 0)
+
+
+def block_pairs(l_entries: tuple, r_entries: tuple, max_pairs: int = MAX_BLOCK_PAIRS) -> tuple:
+    # Entries are parallel (record index, block id) arrays; a record may sit in several blocks.
+    # Returns every distinct (left record, right record) pair sharing a block, plus the number of skipped blocks.
+    (l_rec, l_blk), (r_rec, r_blk) = l_entries, r_entries
+    lo, ro = np.argsort(l_blk, kind="stable"), np.argsort(r_blk, kind="stable")
+    l_rec, l_blk, r_rec, r_blk = l_rec[lo], l_blk[lo], r_rec[ro], r_blk[ro]
+    blocks = np.intersect1d(l_blk, r_blk)
+    ls, rs = np.searchsorted(l_blk, blocks, "left"), np.searchsorted(r_blk, blocks, "left")
+    nl = np.searchsorted(l_blk, blocks, "right") - ls
+    nr = np.searchsorted(r_blk, blocks, "right") - rs
+    sizes = nl * nr
+    keep = sizes <= max_pairs
+    ls, rs, nl, nr, sizes = ls[keep], rs[keep], nl[keep], nr[keep], sizes[keep]
+
+    # Cross product of every kept block at once: pair k of block b is (k // nr[b], k % nr[b])
+    b = np.repeat(np.arange(len(sizes)), sizes)
+    k = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    li, ri = l_rec[ls[b] + k // nr[b]], r_rec[rs[b] + k % nr[b]]
+    width = int(r_rec.max(initial=0)) + 1
+    unique = np.unique(li * width + ri)
+    return unique // width, unique % width, int((~keep).sum())
+
+
+def _load(db: Session, statsbomb: bool) -> dict:
+    rows = db.execute(
+        select(Player.id, Player.name, Player.nickname, Player.birth_date, Player.nationality, Player.team_id)
+        .where(Player.statsbomb_id.isnot(None) if statsbomb else Player.statsbomb_id.is_(None))
+        .order_by(Player.id)
+    ).all()
+    return {
+        "id": np.array([r.id for r in rows], dtype=np.int64),
+        "name": [r.name or "" for r in rows],
+        "normalized": [normalize(r.name) for r in rows],
+        "nickname": [normalize(r.nickname) for r in rows],
+        "dob": np.array([r.birth_date.toordinal() if r.birth_date else 0 for r in rows], dtype=np.int64),
+        "nationality": [normalize_nationality(r.nationality) for r in rows],
+        "team_id": np.array([r.team_id or 0 for r in rows], dtype=np.int64),
+        "blocks": [
+            name_blocks(r.name, r.nickname)
+            | ({f"d:{r.birth_date.isoformat()}:{normalize_nationality(r.nationality)}"} if r.birth_date else set())
+            for r in rows
+        ],
+    }
+
+
+def _entries(records: dict, block_ids: dict) -> tuple:
+    rec, blk = [], []
+    for i, keys in enumerate(records["blocks"]):
+        for key in keys:
+            rec.append(i)
+            blk.append(block_ids.setdefault(key, len(block_ids)))
+    return np.array(rec, dtype=np.int64), np.array(blk, dtype=np.int64)
+
+
+def score_pairs(csv: dict, sb: dict, li: np.ndarray, ri: np.ndarray, trigrams: dict, vocab_size: int) -> tuple:
+    name_sim = np.maximum(
+        trigram_cosine(trigrams["csv"], trigrams["sb_name"], li, ri, vocab_size),
+        trigram_cosine(trigrams["csv"], trigrams["sb_nickname"], li, ri, vocab_size),
+    )
+    score = name_sim.copy()
+    l_dob, r_dob = csv["dob"][li], sb["dob"][ri]
+    both_dob = (l_dob > 0) & (r_dob > 0)
+    score += np.where(both_dob & (l_dob == r_dob), DOB_BONUS, 0.0)
+    # Two known, different birth dates: different people, however similar the names
+    score[both_dob & (l_dob != r_dob)] = 0.0
+    l_nat, r_nat = csv["nationality_code"][li], sb["nationality_code"][ri]
+    both_nat = (l_nat >= 0) & (r_nat >= 0)
+    score += np.where(both_nat, np.where(l_nat == r_nat, NATIONALITY_BONUS, -NATIONALITY_PENALTY), 0.0)
+    l_team = csv["team_id"][li]
+    score += np.where((l_team > 0) & (l_team == sb["team_id"][ri]), TEAM_BONUS, 0.0)
+    return np.clip(score, 0.0, 1.0), name_sim
+
+
+def resolve_players(db: Session, progress=None) -> dict:
+    # Links player rows created by the CSV import (no statsbomb_id) to StatsBomb rows. Only pairs sharing a
+    # blocking key are compared, so the work grows with block sizes, not with csv players x statsbomb players.
+    csv, sb = _load(db, statsbomb=False), _load(db, statsbomb=True)
+    if not len(csv["id"]) or not len(sb["id"]):
+        return {"csv_players": len(csv["id"]), "statsbomb_players": len(sb["id"]), "pairs": 0, "matched": 0, "candidates": 0}
+    if progress:
+        progress(0.2, f"Loaded {len(csv['id'])} CSV and {len(sb['id'])} StatsBomb players")
+
+    block_ids = {}
+    li, ri, skipped = block_pairs(_entries(csv, block_ids), _entries(sb, block_ids))
+    nationalities = {}
+    for records in (csv, sb):
+        records["nationality_code"] = np.array(
+            [nationalities.setdefault(n, len(nationalities)) if n else -1 for n in records["nationality"]], dtype=np.int64)
+    vocab = {}
+    trigrams = {"csv": _trigrams(csv["normalized"], vocab), "sb_name": _trigrams(sb["normalized"], vocab),
+                "sb_nickname": _trigrams(sb["nickname"], vocab)}
+    if progress:
+        progress(0.4, f"{len(li)} candidate pairs from {len(block_ids)} blocks")
+
+    scores, similarities = np.empty(len(li)), np.empty(len(li))
+    for start in range(0, len(li), PAIR_CHUNK):
+        chunk = slice(start, start + PAIR_CHUNK)
+        scores[chunk], similarities[chunk] = score_pairs(csv, sb, li[chunk], ri[chunk], trigrams, len(vocab))
+
+    # Pairs a reviewer rejected stay rejected, and pairs a reviewer confirmed keep both players; merged CSV
+    # rows no longer exist and drop out by themselves
+    rejected = set(db.execute(select(PlayerLink.csv_player_id, PlayerLink.statsbomb_player_id)
+                              .where(PlayerLink.status == "rejected")).all())
+    confirmed = db.execute(select(PlayerLink.csv_player_id, PlayerLink.statsbomb_player_id)
+                           .where(PlayerLink.status == "matched", PlayerLink.reviewed_at.isnot(None))).all()
+
+    # Greedy one-to-one assignment, best score first
+    order = np.flatnonzero(scores >= CANDIDATE_THRESHOLD)
+    order = order[np.argsort(-scores[order], kind="stable")]
+    used_csv, used_sb, links = {c for c, _ in confirmed}, {s for _, s in confirmed}, []
+    for k in order:
+        c, s = int(li[k]), int(ri[k])
+        pair = (int(csv["id"][c]), int(sb["id"][s]))
+        if pair[0] in used_csv or pair[1] in used_sb or pair in rejected:
+            continue
+        used_csv.add(pair[0])
+        used_sb.add(pair[1])
+        links.append({
+            "csv_player_id": pair[0], "statsbomb_player_id": pair[1],
+            "csv_name": csv["name"][c], "statsbomb_name": sb["name"][s],
+            "score": round(float(scores[k]), 4), "name_similarity": round(float(similarities[k]), 4),
+            "block": min(csv["blocks"][c] & sb["blocks"][s], default=None),
+            "status": "matched" if scores[k] >= MATCH_THRESHOLD else "candidate",
+            "created_at": utc_now(),
+        })
+
+    # Unreviewed links are recomputed from scratch; reviewed, merged and rejected ones are history
+    db.execute(delete(PlayerLink).where(PlayerLink.status.in_(["matched", "candidate"]), PlayerLink.reviewed_at.is_(None)))
+    if links:
+        db.execute(PlayerLink.__table__.insert(), links)
+    db.commit()
+    if progress:
+        progress(1.0, f"Linked {len(links)} players")
+    return {
+        "csv_players": len(csv["id"]),
+        "statsbomb_players": len(sb["id"]),
+        "blocks": len(block_ids),
+        "skipped_blocks": skipped,
+        "pairs": int(len(li)),
+        "matched": sum(1 for link in links if link["status"] == "matched"),
+        "confirmed": len(confirmed),
+        "candidates": sum(1 for link in links if link["status"] == "candidate"),
+    }
+
+
+# (model, primary-key columns besides player_id) of every table that references players.id;
+# biometric_rollups are summed into the canonical player's buckets instead (see _fold_rollups)
+_PLAYER_REFERENCES = [
+    (StatusInterval, []), (FactBiometricMinute, []), (MatchStat, []), (InsightCard, []),
+    (PlayerMatchMinutes, ["match_id"]),
+]
+
+
+def _fold_rollups(db: Session, canonical: dict) -> None:
+    # The duplicate's readings move to the canonical player, so its rollup buckets are added into the
+    # canonical ones with the same additive upsert the write path uses, then dropped
+    table = BiometricRollup.__table__
+    rows = [
+        {**r._mapping, "player_id": canonical[r.player_id]}
+        for r in db.execute(select(table).where(table.c.player_id.in_(list(canonical))))
+    ]
+    upsert_rollups(db, rows)
+    db.execute(delete(table).where(table.c.player_id.in_(list(canonical))))
+
+
+def merge_players(db: Session, progress=None) -> dict:
+    # Folds each matched CSV row into its StatsBomb row: CSV season stats are copied over, references are
+    # repointed, and the CSV row is deleted. The link keeps the old id, so the mapping survives the merge.
+    links = db.execute(
+        select(PlayerLink.id, PlayerLink.csv_player_id, PlayerLink.statsbomb_player_id)
+        .where(PlayerLink.status == "matched", exists().where(Player.id == PlayerLink.csv_player_id))
+    ).all()
+    if not links:
+        return {"merged": 0}
+    csv_rows = {r.id: r for r in db.execute(
+        select(Player.id, Player.team_id, *[getattr(Player, c) for c in CSV_COLUMNS])
+        .where(Player.id.in_([link.csv_player_id for link in links]))
+    )}
+    sb_teams = dict(db.execute(select(Player.id, Player.team_id)
+                               .where(Player.id.in_([link.statsbomb_player_id for link in links]))).all())
+
+    players = Player.__table__
+    db.execute(
+        update(players).where(players.c.id == bindparam("canonical")).values(
+            team_id=func.coalesce(players.c.team_id, bindparam("csv_team_id")),
+            **{c: func.coalesce(bindparam(f"csv_{c}"), players.c[c]) for c in CSV_COLUMNS},
+        ),
+        [{"canonical": link.statsbomb_player_id, "csv_team_id": csv_rows[link.csv_player_id].team_id,
+          **{f"csv_{c}": getattr(csv_rows[link.csv_player_id], c) for c in CSV_COLUMNS}} for link in links],
+    )
+    pairs = [{"duplicate": link.csv_player_id, "canonical": link.statsbomb_player_id} for link in links]
+    _fold_rollups(db, {link.csv_player_id: link.statsbomb_player_id for link in links})
+    for i, (model, key_columns) in enumerate(_PLAYER_REFERENCES, start=1):
+        table = model.__table__
+        repoint = update(table).where(table.c.player_id == bindparam("duplicate")).values(player_id=bindparam("canonical"))
+        if key_columns:
+            # Rows the canonical player already has for the same key are dropped rather than collide
+            other = aliased(model)
+            clash = exists().where(other.player_id == bindparam("canonical"),
+                                   and_(*[getattr(other, c) == table.c[c] for c in key_columns]))
+            db.execute(update(table).where(table.c.player_id == bindparam("duplicate"), ~clash)
+                       .values(player_id=bindparam("canonical")), pairs)
+            db.execute(delete(table).where(table.c.player_id == bindparam("duplicate")), pairs)
+        else:
+            db.execute(repoint, pairs)
+        if progress:
+            progress(0.8 * i / len(_PLAYER_REFERENCES), f"Repointed {table.name}")
+    db.execute(delete(players).where(players.c.id == bindparam("duplicate")), pairs)
+    # The merged rollups must add up to the readings now on the canonical rows; any that don't (e.g. a
+    # duplicate's rollups were already off) are recomputed from the readings
+    drifted = rollup_mismatches(db, {link.statsbomb_player_id for link in links})
+    if drifted:
+        rebuild_player_rollups(db, drifted)
+    db.execute(
+        update(PlayerLink.__table__).where(PlayerLink.__table__.c.id == bindparam("link_id"))
+        .values(status="merged", merged_at=bindparam("merged_at")),
+        [{"link_id": link.id, "merged_at": utc_now()} for link in links],
+    )
+    refresh_team_rollups(db, {r.team_id for r in csv_rows.values()} | set(sb_teams.values()))
+    db.commit()
+    return {"merged": len(links), "rebuilt_rollups": len(drifted)}
+
+
+def get_player_links(db: Session, status: str = None, min_score: float = None, limit: int = 100) -> list:
+    query = select(PlayerLink)
+    if status:
+        query = query.where(PlayerLink.status == status)
+    if min_score is not None:
+        query = query.where(PlayerLink.score >= min_score)
+    return db.scalars(query.order_by(PlayerLink.score.desc(), PlayerLink.id).limit(limit)).all()
+
+
+def review_link(db: Session, link_id: int, status: str):
+    # A reviewer confirms a candidate (matched) or rules it out for good (rejected)
+    link = db.get(PlayerLink, link_id)
+    if link is None or link.status == "merged":
+        return link
+    link.status = status
+    link.reviewed_at = utc_now()
+    db.commit()
+    return link
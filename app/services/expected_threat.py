@@ -0,0 +1,247 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from app.utils.statsbomb import load_events, event_file, file_mtime, available_match_ids
+from app.utils.catalog import get_catalog
+
+# StatsBomb pitch coordinates are 120 x 80 yards, always oriented with the acting team attacking towards x = 120
+PITCH_LENGTH = 120.0
+PITCH_WIDTH = 80.0
+XT_GRID = (16, 12)
+MAX_ITERATIONS = 200
+TOLERANCE = 1e-7
+
+PASS, CARRY, SHOT = 0, 1, 2
+ACTION_TYPES = {"Pass": PASS, "Carry": CARRY, "Shot": SHOT}
+VALUE_MEASURES = ("xt", "xg", "xt_pass", "xt_carry", "shots", "goals", "passes", "carries")
+
+CACHE_SIZE = 16
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _action_columns(match_ids: list) -> dict:
+    # Passes, carries and shots of every match flattened into parallel arrays; everything after this is vectorized
+    match, team, player, kind, xy, end_xy, success, xg, goal, penalty = [], [], [], [], [], [], [], [], [], []
+    names, team_names = {}, {}
+    for match_id in match_ids:
+        for e in load_events(match_id):
+            action = ACTION_TYPES.get(e.get("type", {}).get("name"))
+            if action is None or not e.get("location") or not e.get("player"):
+                continue
+            detail = e.get({PASS: "pass", CARRY: "carry", SHOT: "shot"}[action], {})
+            if action != SHOT and not detail.get("end_location"):
+                continue
+            match.append(match_id)
+            team.append(e["team"]["id"])
+            player.append(e["player"]["id"])
+            kind.append(action)
+            xy.append(e["location"][:2])
+            end_xy.append(detail.get("end_location", e["location"])[:2])
+            # Carries keep the ball by definition; a pass is complete when it has no outcome
+            success.append(action == CARRY or (action == PASS and detail.get("outcome") is None))
+            xg.append((detail.get("statsbomb_xg") or 0.0) if action == SHOT else 0.0)
+            goal.append(action == SHOT and detail.get("outcome", {}).get("name") == "Goal")
+            penalty.append(action == SHOT and detail.get("type", {}).get("name") == "Penalty")
+            names[e["player"]["id"]] = e["player"]["name"]
+            team_names[e["team"]["id"]] = e["team"]["name"]
+
+    return {
+        "match_id": np.array(match, dtype=np.int64),
+        "team_id": np.array(team, dtype=np.int64),
+        "player_id": np.array(player, dtype=np.int64),
+        "kind": np.array(kind, dtype=np.int8),
+        "xy": np.array(xy, dtype=np.float64).reshape(-1, 2),
+        "end_xy": np.array(end_xy, dtype=np.float64).reshape(-1, 2),
+        "success": np.array(success, dtype=bool),
+        "xg": np.array(xg, dtype=np.float64),
+        "goal": np.array(goal, dtype=bool),
+        "penalty": np.array(penalty, dtype=bool),
+        "names": names,
+        "team_names": team_names,
+    }
+
+
+def cells(xy: np.ndarray, grid: tuple = XT_GRID) -> np.ndarray:
+    nx, ny = grid
+    xb = np.clip((xy[:, 0] / PITCH_LENGTH * nx).astype(np.int64), 0, nx - 1)
+    yb = np.clip((xy[:, 1] / PITCH_WIDTH * ny).astype(np.int64), 0, ny - 1)
+    return xb * ny + yb
+
+
+def fit_xt(cols: dict, grid: tuple = XT_GRID) -> dict:
+    # Markov model over grid cells: from each cell the ball is either shot (scoring with the cell's goal rate)
+    # or moved, landing in another cell per the empirical transition matrix; failed moves end the possession.
+    # xT is the fixed point of xT = P(shot) * P(goal | shot) + P(move) * T @ xT.
+    n = grid[0] * grid[1]
+    start = cells(cols["xy"], grid)
+    end = cells(cols["end_xy"], grid)
+    # Penalties are taken from a fixed spot after a foul, not created from that cell
+    shot = (cols["kind"] == SHOT) & ~cols["penalty"]
+    move = cols["kind"] != SHOT
+    completed = move & cols["success"]
+
+    shots = np.bincount(start[shot], minlength=n).astype(np.float64)
+    goals = np.bincount(start[shot & cols["goal"]], minlength=n)
+    moves = np.bincount(start[move], minlength=n).astype(np.float64)
+    actions = shots + moves
+    shoot_p = np.divide(shots, actions, out=np.zeros(n), where=actions > 0)
+    move_p = np.divide(moves, actions, out=np.zeros(n), where=actions > 0)
+    goal_p = np.divide(goals, shots, out=np.zeros(n), where=shots > 0)
+    transitions = np.bincount(start[completed] * n + end[completed], minlength=n * n).reshape(n, n).astype(np.float64)
+    transitions = np.divide(transitions, moves[:, None], out=np.zeros((n, n)), where=moves[:, None] > 0)
+
+    scoring = shoot_p * goal_p
+    # Each row of move_p * T sums to below 1 (failed moves leak out), so the iteration contracts
+    propagate = move_p[:, None] * transitions
+    xt = np.zeros(n)
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        updated = scoring + propagate @ xt
+        delta = np.abs(updated - xt).max()
+        xt = updated
+        if delta < TOLERANCE:
+            break
+
+    return {
+        "xt": xt,
+        "iterations": iteration,
+        "converged": bool(delta < TOLERANCE),
+        "shoot_probability": shoot_p,
+        "goal_probability": goal_p,
+        "move_probability": move_p,
+        "actions": int(actions.sum()),
+    }
+
+
+def value_actions(cols: dict, xt: np.ndarray, grid: tuple = XT_GRID) -> np.ndarray:
+    # Threat added by each completed pass or carry; shots and failed moves add none
+    completed = (cols["kind"] != SHOT) & cols["success"]
+    return np.where(completed, xt[cells(cols["end_xy"], grid)] - xt[cells(cols["xy"], grid)], 0.0)
+
+
+def player_match_values(cols: dict, xt_added: np.ndarray) -> list:
+    # Sums per (match, player) with one bincount per measure
+    keys = np.stack([cols["match_id"], cols["player_id"]], axis=1)
+    groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    n = len(groups)
+    is_pass, is_carry, is_shot = (cols["kind"] == PASS), (cols["kind"] == CARRY), (cols["kind"] == SHOT)
+
+    def total(weights):
+        return np.bincount(inverse, weights=weights, minlength=n)
+
+    xt = total(xt_added)
+    xt_pass = total(np.where(is_pass, xt_added, 0.0))
+    xg = total(cols["xg"])
+    shots = total(is_shot.astype(np.float64))
+    goals = total(cols["goal"].astype(np.float64))
+    passes = total(is_pass.astype(np.float64))
+    carries = total(is_carry.astype(np.float64))
+    team = np.zeros(n, dtype=np.int64)
+    team[inverse] = cols["team_id"]
+
+    return [
+        {
+            "match_id": int(groups[i, 0]),
+            "player_id": int(groups[i, 1]),
+            "name": cols["names"].get(int(groups[i, 1])),
+            "team_id": int(team[i]),
+            "team_name": cols["team_names"].get(int(team[i])),
+            "xg": round(float(xg[i]), 4),
+            "xt": round(float(xt[i]), 4),
+            "xt_pass": round(float(xt_pass[i]), 4),
+            "xt_carry": round(float(xt[i] - xt_pass[i]), 4),
+            "shots": int(shots[i]),
+            "goals": int(goals[i]),
+            "passes": int(passes[i]),
+            "carries": int(carries[i]),
+        }
+        for i in range(n)
+    ]
+
+
+class ThreatModel:
+    def __init__(self, key: tuple, fingerprint: tuple, match_ids: list, fit: dict, values: list, seconds: float):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.match_ids = match_ids
+        self.fit = fit
+        self.values = values
+        self.seconds = seconds
+
+    @classmethod
+    def build(cls, key: tuple, fingerprint: tuple, match_ids: list) -> "ThreatModel":
+        started = time.perf_counter()
+        cols = _action_columns(match_ids)
+        fit = fit_xt(cols)
+        values = player_match_values(cols, value_actions(cols, fit["xt"]))
+        return cls(key, fingerprint, match_ids, fit, values, round(time.perf_counter() - started, 3))
+
+    def grid(self) -> list:
+        return np.round(self.fit["xt"].reshape(XT_GRID), 5).tolist()
+
+    def info(self) -> dict:
+        competition_id, season_id = self.key
+        return {
+            "competition_id": competition_id,
+            "season_id": season_id,
+            "matches": len(self.match_ids),
+            "actions": self.fit["actions"],
+            "iterations": self.fit["iterations"],
+            "converged": self.fit["converged"],
+            "build_seconds": self.seconds,
+        }
+
+    def player_values(self, match_id: int = None, player_id: int = None, team_id: int = None,
+                      per_match: bool = True, sort: str = "xt", limit: int = 100) -> list:
+        rows = [
+            r for r in self.values
+            if (match_id is None or r["match_id"] == match_id)
+            and (player_id is None or r["player_id"] == player_id)
+            and (team_id is None or r["team_id"] == team_id)
+        ]
+        if not per_match:
+            totals = {}
+            for r in rows:
+                t = totals.setdefault(r["player_id"], {"player_id": r["player_id"], "name": r["name"], "team_id": r["team_id"],
+                                                       "team_name": r["team_name"], "matches": 0})
+                t["matches"] += 1
+                for measure in VALUE_MEASURES:
+                    t[measure] = round(t.get(measure, 0) + r[measure], 4)
+            rows = list(totals.values())
+        return sorted(rows, key=lambda r: r[sort], reverse=True)[:limit]
+
+
+def competition_matches(competition_id: int = None, season_id: int = None) -> list:
+    available = available_match_ids()
+    if competition_id is None and season_id is None:
+        return available
+    return sorted(set(get_catalog().match_ids(competition_id=competition_id, season_id=season_id)) & set(available))
+
+
+def get_threat_model(competition_id: int = None, season_id: int = None):
+    # Cached per competition/season; rebuilt when a match is added or an event file changes
+    key = (competition_id, season_id)
+    match_ids = competition_matches(competition_id, season_id)
+    if not match_ids:
+        return None
+    fingerprint = tuple((m, file_mtime(event_file(m))) for m in match_ids)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached.fingerprint == fingerprint:
+            _cache.move_to_end(key)
+            return cached
+
+    model = ThreatModel.build(key, fingerprint, match_ids)
+
+    with _cache_lock:
+        _cache[key] = model
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return model
@@ -0,0 +1,116 @@
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import Integer, cast, func, literal, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Player, MatchStat
+
+DEFAULT_LAST_N = 10
+DEFAULT_WINDOW = 3
+DEFAULT_DAY_WINDOW = 28
+
+
+def _day_number(dialect: str):
+    # RANGE frames need a numeric ordering key; dates count days since the epoch on both backends
+    if dialect == "sqlite":
+        return cast(func.julianday(MatchStat.match_date), Integer)
+    return MatchStat.match_date - literal(date(1970, 1, 1))
+
+
+def _form_query(player_ids=None, team_id=None, last_n=DEFAULT_LAST_N, days=None, window=DEFAULT_WINDOW, as_of=None,
+                day_window=DEFAULT_DAY_WINDOW, dialect="postgresql"):
+    # Rolling aggregates and the per-player match rank come from window functions over
+    # (player_id, match_date), so the whole squad is served by one ordered index scan
+    partition = {"partition_by": MatchStat.player_id, "order_by": MatchStat.match_date}
+    # Last `window` matches, and every match in the `day_window` days up to and including this one
+    rolling = {**partition, "rows": (-(window - 1), 0)}
+    rolling_days = {"partition_by": MatchStat.player_id, "order_by": _day_number(dialect), "range_": (-(day_window - 1), 0)}
+
+    inner = select(
+        MatchStat.player_id,
+        MatchStat.match_date,
+        MatchStat.goals,
+        MatchStat.assists,
+        MatchStat.pass_accuracy,
+        func.sum(MatchStat.goals).over(**rolling).label("rolling_goals"),
+        func.sum(MatchStat.assists).over(**rolling).label("rolling_assists"),
+        func.avg(MatchStat.pass_accuracy).over(**rolling).label("rolling_pass_accuracy"),
+        func.count(MatchStat.id).over(**rolling_days).label("day_window_matches"),
+        func.sum(MatchStat.goals).over(**rolling_days).label("day_window_goals"),
+        func.sum(MatchStat.assists).over(**rolling_days).label("day_window_assists"),
+        func.avg(MatchStat.pass_accuracy).over(**rolling_days).label("day_window_pass_accuracy"),
+        func.row_number().over(
+            partition_by=MatchStat.player_id, order_by=MatchStat.match_date.desc()
+        ).label("recency"),
+    )
+
+    if player_ids:
+        inner = inner.where(MatchStat.player_id.in_(player_ids))
+    if team_id is not None:
+        inner = inner.where(MatchStat.player_id.in_(select(Player.id).where(Player.team_id == team_id)))
+    if as_of is not None:
+        inner = inner.where(MatchStat.match_date <= as_of)
+
+    inner = inner.subquery()
+    query = select(inner)
+    if days is not None:
+        # Filtered outside the window functions so the first matches of the period keep their full windows
+        query = query.where(inner.c.match_date >= (as_of or date.today()) - timedelta(days=days))
+    if last_n is not None:
+        query = query.where(inner.c.recency <= last_n)
+    return query.order_by(inner.c.player_id, inner.c.match_date)
+
+
+def _trend(values: list) -> float:
+    # Least-squares slope in percentage points per match
+    points = np.array([v for v in values if v is not None], dtype=np.float64)
+    if len(points) < 2:
+        return 0.0
+    return round(float(np.polyfit(np.arange(len(points)), points, 1)[0]), 3)
+
+
+def get_form_curves(db: Session, player_ids=None, team_id=None, last_n=DEFAULT_LAST_N,
+                    days=None, window=DEFAULT_WINDOW, as_of=None, day_window=DEFAULT_DAY_WINDOW) -> dict:
+    rows = db.execute(_form_query(player_ids, team_id, last_n, days, window, as_of, day_window,
+                                  db.get_bind().dialect.name)).all()
+
+    curves = {}
+    for r in rows:
+        curves.setdefault(r.player_id, []).append({
+            "match_date": r.match_date.isoformat(),
+            "goals": r.goals,
+            "assists": r.assists,
+            "pass_accuracy": r.pass_accuracy,
+            "rolling_goals": r.rolling_goals,
+            "rolling_assists": r.rolling_assists,
+            "rolling_pass_accuracy": round(r.rolling_pass_accuracy, 2) if r.rolling_pass_accuracy is not None else None,
+            "day_window": {
+                "matches": r.day_window_matches,
+                "goals": r.day_window_goals,
+                "assists": r.day_window_assists,
+                "pass_accuracy": round(r.day_window_pass_accuracy, 2) if r.day_window_pass_accuracy is not None else None,
+            },
+        })
+
+    form = {}
+    for player_id, points in curves.items():
+        accuracies = [p["pass_accuracy"] for p in points if p["pass_accuracy"] is not None]
+        form[player_id] = {
+            "matches": len(points),
+            "goals": sum(p["goals"] or 0 for p in points),
+            "assists": sum(p["assists"] or 0 for p in points),
+            "avg_pass_accuracy": round(sum(accuracies) / len(accuracies), 2) if accuracies else None,
+            "pass_accuracy_trend": _trend(accuracies),
+            "curve": points,
+        }
+    return form
+
+
+def describe_form(summary: dict) -> str:
+    trend = summary["pass_accuracy_trend"]
+    direction = "trending up" if trend > 0.5 else "trending down" if trend < -0.5 else "steady"
+    return (
+        f"Over the last {summary['matches']} match(es): {summary['goals']} goal(s), "
+        f"{summary['assists']} assist(s), pass accuracy {direction}."
+    )
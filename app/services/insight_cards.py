@@ -0,0 +1,328 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import func, select, insert, delete
+from sqlalchemy.orm import Session
+
+from app.db.models import Player, MatchStat, BiometricRollup, InsightBatch, InsightCard
+
+MODEL_VERSION = "v1.1-batch"
+KEEP_BATCHES = 3
+
+RECENT_MATCHES = 3
+PRIOR_MATCHES = 7
+MIN_APPEARANCES = 5
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+ROLE_GROUPS = ["Goalkeeper", "Defender", "Midfielder", "Forward"]
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _confidence(strength: np.ndarray) -> np.ndarray:
+    # Map an unbounded signal strength onto [0.4, 0.95]
+    return np.round(0.4 + 0.55 * np.tanh(np.maximum(strength, 0.0) / 2), 2)
+
+
+def _load_players(db: Session) -> dict:
+    rows = db.execute(
+        select(Player.id, Player.team_id, Player.position, Player.appearances,
+               Player.minutes, Player.goals, Player.assists, Player.rating)
+        .order_by(Player.id)
+    ).all()
+    columns = list(zip(*rows)) if rows else [[]] * 8
+    position = [(p or "").split(" ")[0].split(",")[0] for p in columns[2]]
+    return {
+        "id": np.array(columns[0], dtype=np.int64),
+        "team_id": np.array([t if t is not None else -1 for t in columns[1]], dtype=np.int64),
+        "group": np.array([ROLE_GROUPS.index(p) if p in ROLE_GROUPS else -1 for p in position], dtype=np.int8),
+        "appearances": np.array(columns[3], dtype=np.float64),
+        "minutes": np.array(columns[4], dtype=np.float64),
+        "goal_involvements": np.array(columns[5], dtype=np.float64) + np.array(columns[6], dtype=np.float64),
+        "rating": np.array(columns[7], dtype=np.float64),
+    }
+
+
+def _match_windows(db: Session, player_ids: np.ndarray) -> dict:
+    # One pass over match_stats: the latest RECENT_MATCHES per player against the PRIOR_MATCHES before them
+    recency = func.row_number().over(partition_by=MatchStat.player_id, order_by=MatchStat.match_date.desc())
+    inner = select(
+        MatchStat.player_id, MatchStat.goals, MatchStat.assists, MatchStat.pass_accuracy,
+        recency.label("recency"),
+    ).subquery()
+    rows = db.execute(select(inner).where(inner.c.recency <= RECENT_MATCHES + PRIOR_MATCHES)).all()
+
+    n = len(player_ids)
+    windows = {}
+    if not rows:
+        zeros = np.zeros(n)
+        for name in ("recent", "prior"):
+            windows[name] = {"matches": zeros, "goals": zeros, "assists": zeros,
+                             "pass_accuracy": np.full(n, np.nan)}
+        return windows
+
+    pid, goals, assists, accuracy, rank = (np.array(c, dtype=np.float64) for c in zip(*[
+        (r.player_id, r.goals or 0, r.assists or 0,
+         r.pass_accuracy if r.pass_accuracy is not None else np.nan, r.recency) for r in rows
+    ]))
+    idx = np.searchsorted(player_ids, pid.astype(np.int64))
+    has_accuracy = ~np.isnan(accuracy)
+
+    for name, mask in (("recent", rank <= RECENT_MATCHES), ("prior", rank > RECENT_MATCHES)):
+        w = mask.astype(np.float64)
+        matches = np.bincount(idx, weights=w, minlength=n)
+        acc_n = np.bincount(idx, weights=w * has_accuracy, minlength=n)
+        acc_sum = np.bincount(idx, weights=np.where(has_accuracy, accuracy, 0.0) * w, minlength=n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            windows[name] = {
+                "matches": matches,
+                "goals": np.bincount(idx, weights=goals * w, minlength=n) / np.maximum(matches, 1),
+                "assists": np.bincount(idx, weights=assists * w, minlength=n) / np.maximum(matches, 1),
+                "pass_accuracy": np.where(acc_n > 0, acc_sum / acc_n, np.nan),
+            }
+    return windows
+
+
+def _workload(db: Session, player_ids: np.ndarray, as_of: datetime) -> dict:
+    # Acute (last week) vs chronic (previous four weeks) load from the daily rollups
+    acute_start = as_of - timedelta(days=ACUTE_DAYS)
+    chronic_start = acute_start - timedelta(days=CHRONIC_DAYS)
+    rows = db.execute(
+        select(BiometricRollup.player_id, BiometricRollup.bucket_start, BiometricRollup.sprint_count_sum,
+               BiometricRollup.hrv_sum, BiometricRollup.hrv_samples)
+        .where(BiometricRollup.resolution == "day",
+               BiometricRollup.bucket_start >= chronic_start,
+               BiometricRollup.bucket_start < as_of)
+    ).all()
+
+    n = len(player_ids)
+    if not rows:
+        return {"acwr": np.full(n, np.nan), "hrv_change": np.full(n, np.nan)}
+
+    pid = np.array([r.player_id for r in rows], dtype=np.int64)
+    acute = np.array([_aware(r.bucket_start) >= acute_start for r in rows])
+    sprints = np.array([r.sprint_count_sum or 0 for r in rows], dtype=np.float64)
+    hrv = np.array([r.hrv_sum or 0.0 for r in rows], dtype=np.float64)
+    hrv_samples = np.array([r.hrv_samples or 0 for r in rows], dtype=np.float64)
+
+    known = np.isin(pid, player_ids)
+    idx = np.searchsorted(player_ids, pid[known])
+    acute, sprints, hrv, hrv_samples = acute[known], sprints[known], hrv[known], hrv_samples[known]
+
+    def total(values, mask):
+        return np.bincount(idx, weights=values * mask, minlength=n)
+
+    acute_sprints = total(sprints, acute) / ACUTE_DAYS
+    chronic_sprints = total(sprints, ~acute) / CHRONIC_DAYS
+    # HRV means divide by the readings that carried HRV, not by every reading
+    acute_hrv_samples, chronic_hrv_samples = total(hrv_samples, acute), total(hrv_samples, ~acute)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        acute_hrv = total(hrv, acute) / acute_hrv_samples
+        chronic_hrv = total(hrv, ~acute) / chronic_hrv_samples
+        return {
+            "acwr": np.where(chronic_sprints > 0, acute_sprints / chronic_sprints, np.nan),
+            "hrv_change": np.where((acute_hrv_samples > 0) & (chronic_hrv > 0), acute_hrv / chronic_hrv - 1.0, np.nan),
+        }
+
+
+def _aware(ts: datetime) -> datetime:
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _nearest_group(goals, assists, accuracy, centroids, scale) -> tuple:
+    features = np.stack([goals, assists, np.nan_to_num(accuracy)], axis=1) / scale
+    distances = np.linalg.norm(features[:, None, :] - centroids[None, :, :], axis=2)
+    distances = np.where(np.isnan(centroids).any(axis=1)[None, :], np.inf, distances)
+    return distances.argmin(axis=1), distances
+
+
+def detect_insights(players: dict, windows: dict, workload: dict) -> list:
+    # Every detector is a boolean mask over all players; no per-player queries
+    recent, prior = windows["recent"], windows["prior"]
+    cards = []
+
+    def emit(mask, key, scope, strength, evidence, recommendation):
+        confidence = _confidence(strength)
+        for i in np.flatnonzero(mask):
+            cards.append({
+                "player_index": int(i),
+                "i18n_key": key,
+                "match_scope": scope,
+                "confidence": float(confidence[i]),
+                "evidence": evidence(i),
+                "recommendation": recommendation,
+            })
+
+    # Trending up: more goal involvements per match, pass accuracy not falling away
+    both = (recent["matches"] >= 2) & (prior["matches"] >= 2)
+    ga_delta = (recent["goals"] + recent["assists"]) - (prior["goals"] + prior["assists"])
+    acc_delta = np.nan_to_num(recent["pass_accuracy"] - prior["pass_accuracy"])
+    trending = both & (ga_delta >= 0.5) & (acc_delta > -3.0)
+    emit(trending, "insight_trending_up", "Match", ga_delta / 0.5 + acc_delta / 5,
+         lambda i: [
+             f"Goal involvements per match up {ga_delta[i]:+.2f} over the last {int(recent['matches'][i])} match(es)",
+             f"Pass accuracy {acc_delta[i]:+.1f} pts against the previous {int(prior['matches'][i])}",
+         ],
+         "Player trending up; increase usage.")
+
+    # Underused asset: well below typical minutes per appearance but top-quartile output
+    with np.errstate(invalid="ignore", divide="ignore"):
+        minutes_per_app = players["minutes"] / players["appearances"]
+        per90 = players["goal_involvements"] / players["minutes"] * 90
+    eligible = (players["appearances"] >= MIN_APPEARANCES) & (players["minutes"] > 0)
+    if eligible.any():
+        minutes_cut = np.nanpercentile(minutes_per_app[eligible], 25)
+        rating_cut = np.nanpercentile(players["rating"][eligible], 75)
+        per90_cut = np.nanpercentile(per90[eligible], 75)
+        productive = (np.nan_to_num(players["rating"]) >= rating_cut) | (np.nan_to_num(per90) >= per90_cut)
+        underused = eligible & (minutes_per_app <= minutes_cut) & productive
+        emit(underused, "insight_underused_asset", "Season",
+             (minutes_cut - minutes_per_app) / 15 + np.nan_to_num(per90 - per90_cut) * 2,
+             lambda i: [
+                 f"{minutes_per_app[i]:.0f} minutes per appearance (squad lower quartile {minutes_cut:.0f})",
+                 f"{per90[i]:.2f} goal involvements per 90, rating {players['rating'][i]:.2f}",
+             ],
+             "Underused asset; consider more playing time.")
+
+    # Role drift: recent output profile now sits closer to another position group's centroid
+    group = players["group"]
+    profiled = (recent["matches"] >= 2) & (prior["matches"] >= 2) & (group >= 0)
+    if profiled.any():
+        recent_features = np.stack([recent["goals"], recent["assists"], np.nan_to_num(recent["pass_accuracy"])], axis=1)
+        scale = np.maximum(recent_features[profiled].std(axis=0), 1e-6)
+        centroids = np.full((len(ROLE_GROUPS), 3), np.nan)
+        for g in range(len(ROLE_GROUPS)):
+            members = profiled & (group == g)
+            if members.sum() >= 2:
+                centroids[g] = recent_features[members].mean(axis=0) / scale
+
+        now_group, distances = _nearest_group(recent["goals"], recent["assists"], recent["pass_accuracy"], centroids, scale)
+        was_group, _ = _nearest_group(prior["goals"], prior["assists"], prior["pass_accuracy"], centroids, scale)
+        own = distances[np.arange(len(group)), np.maximum(group, 0)]
+        margin = own - distances.min(axis=1)
+        drift = profiled & (was_group == group) & (now_group != group) & np.isfinite(own) & (margin > 0.25)
+        emit(drift, "insight_role_drift", "Season", margin * 2,
+             lambda i: [
+                 f"Listed as {ROLE_GROUPS[group[i]]}; previous {int(prior['matches'][i])} match(es) fit that profile",
+                 f"Last {int(recent['matches'][i])} match(es) closest to a {ROLE_GROUPS[now_group[i]]} profile",
+             ],
+             "Role drift detected; review player positioning.")
+
+    # Risk alert: acute:chronic sprint load spike or a sustained HRV drop
+    acwr, hrv_change = workload["acwr"], workload["hrv_change"]
+    spike = np.nan_to_num(acwr) > 1.5
+    hrv_drop = np.nan_to_num(hrv_change) < -0.15
+    emit(spike | hrv_drop, "insight_risk_alert", "Match",
+         np.maximum(np.nan_to_num(acwr) - 1.3, 0) * 5 + np.maximum(-np.nan_to_num(hrv_change) - 0.1, 0) * 20,
+         lambda i: [e for e in (
+             f"Acute:chronic sprint load {acwr[i]:.2f}" if spike[i] else None,
+             f"HRV {hrv_change[i] * 100:+.0f}% against the previous {CHRONIC_DAYS} days" if hrv_drop[i] else None,
+         ) if e],
+         "Risk alert: Monitor player load and fitness.")
+
+    return cards
+
+
+def build_insight_cards(db: Session, as_of: datetime = None, progress=None) -> dict:
+    as_of = _aware(as_of) if as_of else datetime.now(timezone.utc)
+
+    players = _load_players(db)
+    if progress:
+        progress(0.2, f"Loaded {len(players['id'])} players")
+    windows = _match_windows(db, players["id"])
+    workload = _workload(db, players["id"], as_of)
+    if progress:
+        progress(0.5, "Loaded match and workload windows")
+
+    cards = detect_insights(players, windows, workload)
+    cards.sort(key=lambda c: (-c["confidence"], players["id"][c["player_index"]], c["i18n_key"]))
+
+    batch = InsightBatch(model_version=MODEL_VERSION, generated_at=as_of,
+                         players=len(players["id"]), cards=len(cards))
+    db.add(batch)
+    db.flush()
+
+    rows = [
+        {
+            "card_id": str(uuid.uuid4()),
+            "batch_id": batch.id,
+            "rank": rank,
+            "player_id": int(players["id"][c["player_index"]]),
+            "team_id": int(players["team_id"][c["player_index"]]) if players["team_id"][c["player_index"]] >= 0 else None,
+            "i18n_key": c["i18n_key"],
+            "match_scope": c["match_scope"],
+            "confidence": c["confidence"],
+            "evidence": c["evidence"],
+            "recommendation": c["recommendation"],
+            "model_version": MODEL_VERSION,
+            "generated_at": as_of,
+        }
+        for rank, c in enumerate(cards, start=1)
+    ]
+    if rows:
+        db.execute(insert(InsightCard.__table__), rows)
+
+    # Readers always pick the newest batch, so older ones can go once this one is committed
+    stale = select(InsightBatch.id).order_by(InsightBatch.id.desc()).offset(KEEP_BATCHES).scalar_subquery()
+    db.execute(delete(InsightCard).where(InsightCard.batch_id <= stale))
+    db.execute(delete(InsightBatch).where(InsightBatch.id <= stale))
+    db.commit()
+
+    counts = {}
+    for c in cards:
+        counts[c["i18n_key"]] = counts.get(c["i18n_key"], 0) + 1
+    return {"batch_id": batch.id, "players": len(players["id"]), "cards": len(cards), "by_key": counts}
+
+
+def latest_batch_id(db: Session):
+    return db.query(func.max(InsightBatch.id)).scalar()
+
+
+def encode_cursor(batch_id: int, rank: int) -> str:
+    return f"{batch_id}:{rank}"
+
+
+def decode_cursor(cursor: str) -> tuple:
+    batch_id, rank = cursor.split(":")
+    return int(batch_id), int(rank)
+
+
+def get_insight_cards(db: Session, i18n_key=None, player_id=None, team_id=None, min_confidence=None,
+                      limit=DEFAULT_PAGE_SIZE, cursor=None) -> dict:
+    # The cursor pins the batch, so a client paging through results never sees a new batch mid-way
+    if cursor:
+        batch_id, after_rank = decode_cursor(cursor)
+    else:
+        batch_id, after_rank = latest_batch_id(db), 0
+    if batch_id is None:
+        return {"batch_id": None, "cards": [], "next_cursor": None}
+
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    query = db.query(InsightCard).filter(InsightCard.batch_id == batch_id, InsightCard.rank > after_rank)
+    if i18n_key:
+        query = query.filter(InsightCard.i18n_key == i18n_key)
+    if player_id is not None:
+        query = query.filter(InsightCard.player_id == player_id)
+    if team_id is not None:
+        query = query.filter(InsightCard.team_id == team_id)
+    if min_confidence is not None:
+        query = query.filter(InsightCard.confidence >= min_confidence)
+
+    cards = query.order_by(InsightCard.rank).limit(limit + 1).all()
+    next_cursor = encode_cursor(batch_id, cards[limit - 1].rank) if len(cards) > limit else None
+    return {"batch_id": batch_id, "cards": cards[:limit], "next_cursor": next_cursor}
+
+
+def get_player_cards(db: Session, player_id: int) -> list:
+    batch_id = latest_batch_id(db)
+    if batch_id is None:
+        return []
+    return (
+        db.query(InsightCard)
+        .filter(InsightCard.batch_id == batch_id, InsightCard.player_id == player_id)
+        .order_by(InsightCard.rank)
+        .all()
+    )
@@ -1,15 +1,13 @@
 from sqlalchemy.orm import Session
-from app.db.models import Player, MatchStat, Team
+from app.db.models import MatchStat
+from app.services.player_store import get_player_store
+from app.services.form import get_form_curves, describe_form
+from app.services.insight_cards import get_player_cards
 import re
 
 def generate_insight(prompt: str, context: str, db: Session) -> str:
     # Extract player name by searching for known names (simplified approach)
-    all_players = db.query(Player).all()
-    player = None
-    for p in all_players:
-        if p.name.lower() in prompt.lower():
-            player = p
-            break
+    player = get_player_store(db).find_mentioned(prompt)
 
     if not player:
         return "Sorry, I couldn't identify the player in your request."
@@ -25,7 +23,18 @@ def generate_insight(prompt: str, context: str, db: Session) -> str:
     if not match_stat:
         return f"No match statistics found for {player.name}."
 
-    return (
+    insight = (
         f"{player.name} scored {match_stat.goals} goal(s) and had "
         f"{match_stat.pass_accuracy}% pass accuracy on {match_stat.match_date.strftime('%Y-%m-%d')}."
-    )
\ No newline at end of file
+    )
+
+    # Add recent form when there is more than the single latest match to go on
+    form = get_form_curves(db, player_ids=[player.id], last_n=5).get(player.id)
+    if form and form["matches"] > 1:
+        insight += " " + describe_form(form)
+
+    # Precomputed batch cards carry the cross-squad signals a single row can't show
+    for card in get_player_cards(db, player.id)[:2]:
+        insight += f" {card.recommendation}"
+
+    return insight
\ No newline at end of file
@@ -0,0 +1,375 @@
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+
+from app.db.models import Job
+from app.db.session import SessionLocal
+
+MAX_WORKERS = 4
+RETRY_BACKOFF_SECONDS = 5.0
+PROGRESS_INTERVAL_SECONDS = 0.5
+HEARTBEAT_SECONDS = 30.0
+# A running job that missed this many seconds of heartbeats belonged to a worker that died
+STALE_HEARTBEAT_SECONDS = 4 * HEARTBEAT_SECONDS
+
+ACTIVE_STATUSES = ("queued", "running")
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind: str):
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def serialize_job(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "dedup_key": job.dedup_key,
+        "status": job.status,
+        "params": job.params,
+        "progress": round(job.progress or 0.0, 4),
+        "message": job.message,
+        "result": job.result,
+        "error": job.error,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+    }
+
+
+class JobRunner:
+    # Jobs run on a thread pool next to the API; state lives in the jobs table so any
+    # worker can report on them and queued jobs survive a restart
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._timers = set()
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            # Off the startup path: a slow or unreachable database must not delay the worker accepting traffic
+            self._executor.submit(self._recover)
+
+    def shutdown(self, wait: bool = False):
+        for timer in list(self._timers):
+            timer.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def _recover(self):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.status == "running",
+                       func.coalesce(Job.heartbeat_at, Job.started_at) < _now() - timedelta(seconds=STALE_HEARTBEAT_SECONDS))
+                .values(status="queued", message="Requeued after its worker stopped sending heartbeats")
+            )
+            db.commit()
+            queued = [job_id for (job_id,) in db.query(Job.id).filter(Job.status == "queued").order_by(Job.id)]
+        finally:
+            db.close()
+        for job_id in queued:
+            self._executor.submit(self._run, job_id)
+
+    def submit(self, kind: str, params: dict = None, dedup_key: str = None, max_attempts: int = 3) -> Job:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        params = params or {}
+        dedup_key = dedup_key or json.dumps(params, sort_keys=True)
+
+        db = SessionLocal()
+        try:
+            # The partial unique index rejects a second active job with the same key
+            job = Job(kind=kind, params=params, dedup_key=dedup_key, status="queued",
+                      attempts=0, max_attempts=max_attempts, progress=0.0, created_at=_now())
+            db.add(job)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                existing = (
+                    db.query(Job)
+                    .filter(Job.kind == kind, Job.dedup_key == dedup_key, Job.status.in_(ACTIVE_STATUSES))
+                    .first()
+                )
+                if existing:
+                    db.expunge(existing)
+                    return existing
+                raise
+            db.refresh(job)
+            db.expunge(job)
+        finally:
+            db.close()
+
+        self.start()
+        self._executor.submit(self._run, job.id)
+        return job
+
+    def _progress_reporter(self, job_id: int):
+        last = [0.0]
+
+        def report(fraction: float, message: str = None):
+            if time.monotonic() - last[0] < PROGRESS_INTERVAL_SECONDS and fraction < 1.0:
+                return
+            last[0] = time.monotonic()
+            db = SessionLocal()
+            try:
+                db.execute(update(Job).where(Job.id == job_id).values(
+                    progress=min(max(fraction, 0.0), 1.0), message=message, heartbeat_at=_now()))
+                db.commit()
+            finally:
+                db.close()
+        return report
+
+    def _heartbeat(self, job_id: int) -> threading.Event:
+        # Beats on its own thread, so a handler stuck in one long query still counts as alive
+        stopped = threading.Event()
+
+        def beat():
+            while not stopped.wait(HEARTBEAT_SECONDS):
+                db = SessionLocal()
+                try:
+                    db.execute(update(Job).where(Job.id == job_id, Job.status == "running").values(heartbeat_at=_now()))
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                finally:
+                    db.close()
+
+        threading.Thread(target=beat, name=f"job-{job_id}-heartbeat", daemon=True).start()
+        return stopped
+
+    def _fail(self, job_id: int, error: Exception):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Job).where(Job.id == job_id, Job.status == "running").values(
+                    status="failed", finished_at=_now(),
+                    error="".join(traceback.format_exception_only(type(error), error)).strip())
+            )
+            db.commit()
+        except Exception:
+            # The database itself is unreachable; recovery requeues the job once its heartbeat goes stale
+            db.rollback()
+        finally:
+            db.close()
+
+    def _run(self, job_id: int):
+        db = SessionLocal()
+        heartbeat = None
+        try:
+            # Claim atomically so two workers never run the same job
+            now = _now()
+            claimed = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(status="running", attempts=Job.attempts + 1, started_at=now, heartbeat_at=now, error=None)
+            ).rowcount
+            db.commit()
+            if not claimed:
+                return
+            heartbeat = self._heartbeat(job_id)
+
+            job = db.get(Job, job_id)
+            try:
+                handler = JOB_HANDLERS[job.kind]
+                result = handler(db, job.params or {}, self._progress_reporter(job_id))
+            except Exception as e:
+                db.rollback()
+                job = db.get(Job, job_id)
+                job.error = "".join(traceback.format_exception_only(type(e), e)).strip()
+                if job.attempts < job.max_attempts:
+                    job.status = "queued"
+                    job.message = f"Retrying after attempt {job.attempts} failed"
+                    db.commit()
+                    self._retry_later(job_id, RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+                else:
+                    job.status = "failed"
+                    job.finished_at = _now()
+                    db.commit()
+                return
+
+            job = db.get(Job, job_id)
+            job.status = "succeeded"
+            job.result = result
+            job.progress = 1.0
+            job.message = "Completed"
+            job.finished_at = _now()
+            db.commit()
+        except Exception as e:
+            # Bookkeeping outside the handler failed (e.g. an unstorable result): never leave the job "running"
+            db.rollback()
+            self._fail(job_id, e)
+        finally:
+            if heartbeat is not None:
+                heartbeat.set()
+            db.close()
+
+    def _retry_later(self, job_id: int, delay: float):
+        def fire():
+            self._timers.discard(timer)
+            if self._executor is not None:
+                self._executor.submit(self._run, job_id)
+        timer = threading.Timer(delay, fire)
+        timer.daemon = True
+        self._timers.add(timer)
+        timer.start()
+
+
+runner = JobRunner()
+
+
+# -------------------------
+# Job handlers (heavy modules are imported when a job runs, not at API startup)
+# -------------------------
+
+@job_handler("ingest_statsbomb")
+def _ingest_statsbomb(db, params, progress):
+    from app.utils.ingest_statsbomb import ingest_all, list_matches
+    matches = list_matches(params.get("competition_id"), params.get("season_id"))
+    if params.get("match_ids"):
+        matches = [m for m in matches if m["match_id"] in set(params["match_ids"])]
+    return ingest_all(db, matches, progress=progress)
+
+
+@job_handler("ingest_csv")
+def _ingest_csv(db, params, progress):
+    from app.utils.ingest_csv import ingest_csv, CSV_PATH
+    return ingest_csv(db, params.get("csv_path", CSV_PATH), progress=progress)
+
+
+@job_handler("possession_chains")
+def _possession_chains(db, params, progress):
+    from app.services.possession_chains import refresh_possession_chains
+    result = refresh_possession_chains(db, match_ids=params.get("match_ids"), force=params.get("force", False))
+    return {"recomputed": len(result["recomputed"]), "chains": result["chains"]}
+
+
+@job_handler("biometric_rollups")
+def _biometric_rollups(db, params, progress):
+    from app.services.biometric_rollups import rebuild_rollups
+    since = datetime.fromisoformat(params["since"]) if params.get("since") else None
+    return {"readings": rebuild_rollups(db, since=since)}
+
+
+@job_handler("event_index")
+def _event_index(db, params, progress):
+    from app.utils.statsbomb import available_match_ids
+    from app.utils.event_index import load_index
+    match_ids = params.get("match_ids") or available_match_ids()
+    for i, match_id in enumerate(match_ids, start=1):
+        load_index(match_id)
+        progress(i / len(match_ids), f"Indexed match {match_id}")
+    return {"matches": len(match_ids)}
+
+
+@job_handler("warm_pass_networks")
+def _warm_pass_networks(db, params, progress):
+    from app.utils.statsbomb import available_match_ids
+    from app.services.pass_network import get_match_analytics
+    match_ids = params.get("match_ids") or available_match_ids()
+    for i, match_id in enumerate(match_ids, start=1):
+        get_match_analytics(match_id)
+        progress(i / len(match_ids), f"Warmed match {match_id}")
+    return {"matches": len(match_ids)}
+
+
+@job_handler("validate_tables")
+def _validate_tables(db, params, progress):
+    from app.db.session import engine
+    from app.services.data_quality import validate_tables, save_result
+    results = validate_tables(engine, params.get("tables", ["players"]), sample=params.get("sample", 1.0))
+    return {
+        table: {"success": r["success"], "statistics": r["statistics"], "path": save_result(r)}
+        for table, r in results.items()
+    }
+
+
+@job_handler("insight_cards")
+def _insight_cards(db, params, progress):
+    from app.services.insight_cards import build_insight_cards
+    as_of = datetime.fromisoformat(params["as_of"]) if params.get("as_of") else None
+    return build_insight_cards(db, as_of=as_of, progress=progress)
+
+
+@job_handler("analytics_snapshot")
+def _analytics_snapshot(db, params, progress):
+    from app.utils.snapshot import build_snapshot
+    return build_snapshot(db)
+
+
+@job_handler("ingest_lineups")
+def _ingest_lineups(db, params, progress):
+    from app.utils.ingest_statsbomb import ingest_lineups, list_matches
+    matches = list_matches(params.get("competition_id"), params.get("season_id"))
+    return ingest_lineups(db, matches, progress=progress)
+
+
+@job_handler("match_catalog")
+def _match_catalog(db, params, progress):
+    from app.utils.catalog import refresh_catalog
+    catalog, changed = refresh_catalog(force=params.get("force", False))
+    return {**catalog.info(), "reindexed": changed}
+
+
+@job_handler("log_retention")
+def _log_retention(db, params, progress):
+    from app.services.log_retention import apply_retention, RETENTION_MONTHS
+    return apply_retention(db, retention_months=params.get("retention_months", RETENTION_MONTHS), progress=progress)
+
+
+@job_handler("query_sketches")
+def _query_sketches(db, params, progress):
+    from app.services.query_sketches import rebuild_sketches
+    since = date.fromisoformat(params["since"]) if params.get("since") else None
+    return rebuild_sketches(db, since=since, progress=progress)
+
+
+@job_handler("team_rollups")
+def _team_rollups(db, params, progress):
+    from app.services.team_rollups import refresh_team_rollups
+    result = refresh_team_rollups(db, params.get("team_ids"), progress=progress)
+    db.commit()
+    return result
+
+
+@job_handler("expected_threat")
+def _expected_threat(db, params, progress):
+    # Fits the xT grid and player values into this worker's cache
+    from app.services.expected_threat import get_threat_model
+    model = get_threat_model(params.get("competition_id"), params.get("season_id"))
+    return model.info() if model else {"matches": 0}
+
+
+@job_handler("entity_resolution")
+def _entity_resolution(db, params, progress):
+    # Links CSV players to StatsBomb players; with {"merge": true} matched pairs are folded together
+    from app.services.entity_resolution import resolve_players, merge_players
+    result = {}
+    if params.get("backfill_birth_dates"):
+        from app.utils.ingest_csv import backfill_birth_dates, CSV_PATH
+        result["birth_dates"] = backfill_birth_dates(db, params.get("csv_path", CSV_PATH))
+    result.update(resolve_players(db, progress=progress))
+    if params.get("merge"):
+        result.update(merge_players(db))
+    return result
@@ -0,0 +1,159 @@
+import os
+import re
+import gzip
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.db.models import FeedbackLog, SearchLog, ChatPromptLog
+from app.utils.timestamp import utc_now
+
+LOG_TABLES = {model.__tablename__: model.__table__ for model in (FeedbackLog, SearchLog, ChatPromptLog)}
+# Whole months older than this are archived and removed from the database
+RETENTION_MONTHS = int(os.getenv("LOG_RETENTION_MONTHS", "12"))
+ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "data/archive/logs")
+# Empty partitions created ahead of time, so new rows never land in the default partition
+PARTITIONS_AHEAD = 3
+ARCHIVE_BATCH = 5000
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def month_start(ts: datetime) -> datetime:
+    ts = ts.astimezone(timezone.utc) if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def is_partitioned(db: Session, table: str) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(text("SELECT relkind FROM pg_class WHERE relname = :t"), {"t": table}).scalar() == "p"
+
+
+def list_partitions(db: Session, table: str) -> dict:
+    # {month: partition name} for the monthly partitions currently attached
+    names = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :t"
+    ), {"t": table}).scalars()
+    partitions = {}
+    for name in names:
+        match = _PARTITION_SUFFIX.search(name)
+        if match:
+            partitions[datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)] = name
+    return partitions
+
+
+def ensure_partitions(db: Session, table: str, first: datetime, last: datetime) -> list:
+    # Creates any missing monthly partition in [first, last]. Rows already sitting in the default
+    # partition for that month are moved across before the new partition is attached.
+    existing = list_partitions(db, table)
+    created = []
+    month = month_start(first)
+    while month <= last:
+        if month not in existing:
+            name, lo, hi = partition_name(table, month), month.isoformat(), add_months(month, 1).isoformat()
+            db.execute(text(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)'))
+            db.execute(text(
+                f'WITH moved AS (DELETE FROM {table}_default WHERE "timestamp" >= :lo AND "timestamp" < :hi RETURNING *) '
+                f'INSERT INTO {name} SELECT * FROM moved'
+            ), {"lo": lo, "hi": hi})
+            db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+            created.append(name)
+        month = add_months(month, 1)
+    db.commit()
+    return created
+
+
+def _archive_path(table: str, month: datetime) -> str:
+    # A month archived twice (late rows after a restore) gets a numbered sibling rather than overwriting
+    base = os.path.join(ARCHIVE_DIR, table, f"{table}_{month:%Y_%m}")
+    path, n = base + ".jsonl.gz", 1
+    while os.path.exists(path):
+        path, n = f"{base}.{n}.jsonl.gz", n + 1
+    return path
+
+
+def _json_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def archive_month(db: Session, table: str, month: datetime, partitioned: bool = False):
+    # Streams one month to a gzipped JSON-lines file, then drops it: a whole partition on PostgreSQL,
+    # a ranged DELETE elsewhere. Returns None when there was nothing to archive.
+    log = LOG_TABLES[table]
+    lo, hi = month_start(month), add_months(month_start(month), 1)
+    partition = list_partitions(db, table).get(lo) if partitioned else None
+    window = (log.c.timestamp >= lo) & (log.c.timestamp < hi)
+
+    rows, path = 0, _archive_path(table, lo)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    result = db.connection().execution_options(stream_results=True).execute(
+        select(log).where(window).order_by(log.c.timestamp, log.c.id)
+    )
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        for batch in result.mappings().partitions(ARCHIVE_BATCH):
+            for row in batch:
+                f.write(json.dumps(dict(row), default=_json_value) + "\n")
+            rows += len(batch)
+
+    if rows:
+        os.replace(tmp, path)
+    else:
+        os.remove(tmp)
+        path = None
+    if partition:
+        db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+        db.execute(text(f"DROP TABLE {partition}"))
+    elif rows:
+        db.execute(log.delete().where(window))
+    db.commit()
+    if not rows and not partition:
+        return None
+    return {"table": table, "month": f"{lo:%Y-%m}", "rows": rows, "path": path, "dropped_partition": partition}
+
+
+def apply_retention(db: Session, now: datetime = None, retention_months: int = RETENTION_MONTHS, progress=None) -> dict:
+    now = now or utc_now()
+    current = month_start(now)
+    cutoff = add_months(current, -retention_months)
+    archived, created = [], []
+
+    for i, (table, log) in enumerate(LOG_TABLES.items()):
+        partitioned = is_partitioned(db, table)
+        if partitioned:
+            created += ensure_partitions(db, table, current, add_months(current, PARTITIONS_AHEAD))
+            months = {m for m in list_partitions(db, table) if m < cutoff}
+        else:
+            months = set()
+        # Old rows outside any monthly partition (or on backends without partitioning), one month at a time
+        while True:
+            oldest = db.execute(select(func.min(log.c.timestamp)).where(log.c.timestamp < cutoff)).scalar()
+            if oldest is None:
+                break
+            entry = archive_month(db, table, month_start(oldest), partitioned)
+            if entry is None:
+                break
+            months.discard(month_start(oldest))
+            archived.append(entry)
+        for month in sorted(months):
+            entry = archive_month(db, table, month, partitioned)
+            if entry:
+                archived.append(entry)
+        if progress:
+            progress((i + 1) / len(LOG_TABLES), f"Applied retention to {table}")
+
+    return {"cutoff": cutoff.isoformat(), "archived": archived, "partitions_created": created}
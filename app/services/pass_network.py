@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.utils.statsbomb import load_events, event_file, file_mtime
+
+# StatsBomb pitch coordinates are 120 x 80 yards
+PITCH_LENGTH = 120.0
+PITCH_WIDTH = 80.0
+HEATMAP_BINS = (12, 8)
+
+# Off-ball actions that carry a location but are not touches of the ball
+NON_TOUCH_TYPES = {"Pressure", "Substitution", "Tactical Shift", "Starting XI", "Half Start", "Half End"}
+
+CACHE_SIZE = 256
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _event_columns(events: list) -> dict:
+    # Flatten the JSON once into parallel arrays; everything after this is vectorized
+    located = [e for e in events if e.get("location") and e.get("player")]
+
+    team_ids = np.array([e["team"]["id"] for e in located], dtype=np.int64)
+    player_ids = np.array([e["player"]["id"] for e in located], dtype=np.int64)
+    xy = np.array([e["location"][:2] for e in located], dtype=np.float64).reshape(-1, 2)
+    type_names = [e["type"]["name"] for e in located]
+    is_touch = np.array([t not in NON_TOUCH_TYPES for t in type_names], dtype=bool)
+
+    # Completed passes with a known recipient feed the network
+    is_pass = np.array([
+        t == "Pass" and e["pass"].get("outcome") is None and "recipient" in e["pass"]
+        for t, e in zip(type_names, located)
+    ], dtype=bool)
+    recipient_ids = np.array([
+        e["pass"]["recipient"]["id"] if p else -1 for p, e in zip(is_pass, located)
+    ], dtype=np.int64)
+    end_xy = np.array([
+        e["pass"]["end_location"][:2] if p else (np.nan, np.nan) for p, e in zip(is_pass, located)
+    ], dtype=np.float64).reshape(-1, 2)
+
+    names = {}
+    team_names = {}
+    for e in located:
+        names[e["player"]["id"]] = e["player"]["name"]
+        team_names[e["team"]["id"]] = e["team"]["name"]
+
+    return {
+        "team_ids": team_ids,
+        "player_ids": player_ids,
+        "xy": xy,
+        "is_touch": is_touch,
+        "is_pass": is_pass,
+        "recipient_ids": recipient_ids,
+        "end_xy": end_xy,
+        "names": names,
+        "team_names": team_names,
+    }
+
+
+def _team_pass_network(cols: dict, team_id: int) -> dict:
+    team_mask = cols["team_ids"] == team_id
+    pass_mask = team_mask & cols["is_pass"]
+
+    # Players are indexed by every appearance as passer or recipient
+    passers = cols["player_ids"][pass_mask]
+    recipients = cols["recipient_ids"][pass_mask]
+    players, inverse = np.unique(np.concatenate([passers, recipients]), return_inverse=True)
+    n = len(players)
+    passer_idx = inverse[:len(passers)]
+    recipient_idx = inverse[len(passers):]
+
+    # Average position: pass origins for the passer, pass end points for the recipient
+    positions = np.concatenate([cols["xy"][pass_mask], cols["end_xy"][pass_mask]])
+    counts = np.bincount(inverse, minlength=n)
+    avg_x = np.bincount(inverse, weights=positions[:, 0], minlength=n) / np.maximum(counts, 1)
+    avg_y = np.bincount(inverse, weights=positions[:, 1], minlength=n) / np.maximum(counts, 1)
+    passes_made = np.bincount(passer_idx, minlength=n)
+
+    pair_counts = np.bincount(passer_idx * n + recipient_idx, minlength=n * n).reshape(n, n)
+    src, dst = np.nonzero(pair_counts)
+
+    return {
+        "team_id": int(team_id),
+        "team_name": cols["team_names"].get(int(team_id)),
+        "players": [
+            {
+                "player_id": int(pid),
+                "name": cols["names"].get(int(pid)),
+                "x": round(float(avg_x[i]), 2),
+                "y": round(float(avg_y[i]), 2),
+                "passes": int(passes_made[i]),
+            }
+            for i, pid in enumerate(players)
+        ],
+        "edges": [
+            {"from": int(players[s]), "to": int(players[d]), "count": int(pair_counts[s, d])}
+            for s, d in zip(src, dst)
+        ],
+    }
+
+
+def _touch_heatmaps(cols: dict) -> list:
+    nx, ny = HEATMAP_BINS
+    mask = cols["is_touch"]
+    player_ids = cols["player_ids"][mask]
+    team_ids = cols["team_ids"][mask]
+    xy = cols["xy"][mask]
+
+    players, inverse = np.unique(player_ids, return_inverse=True)
+    xb = np.clip((xy[:, 0] / PITCH_LENGTH * nx).astype(np.int64), 0, nx - 1)
+    yb = np.clip((xy[:, 1] / PITCH_WIDTH * ny).astype(np.int64), 0, ny - 1)
+
+    # One bincount over (player, cell) covers every player in the match
+    cells = nx * ny
+    grid = np.bincount(inverse * cells + xb * ny + yb, minlength=len(players) * cells)
+    grid = grid.reshape(len(players), nx, ny)
+
+    player_team = np.zeros(len(players), dtype=np.int64)
+    player_team[inverse] = team_ids
+
+    return [
+        {
+            "player_id": int(pid),
+            "name": cols["names"].get(int(pid)),
+            "team_id": int(player_team[i]),
+            "touches": int(grid[i].sum()),
+            "grid": grid[i].tolist(),
+        }
+        for i, pid in enumerate(players)
+    ]
+
+
+def build_match_analytics(match_id: int, events: list) -> dict:
+    cols = _event_columns(events)
+    return {
+        "match_id": match_id,
+        "pass_networks": [_team_pass_network(cols, t) for t in np.unique(cols["team_ids"])],
+        "heatmaps": {
+            "bins": list(HEATMAP_BINS),
+            "pitch": [PITCH_LENGTH, PITCH_WIDTH],
+            "players": _touch_heatmaps(cols),
+        },
+    }
+
+
+def get_match_analytics(match_id: int):
+    # Cached per match; a changed event file (new mtime) invalidates its entry
+    mtime = file_mtime(event_file(match_id))
+    if mtime is None:
+        return None
+
+    with _cache_lock:
+        cached = _cache.get(match_id)
+        if cached and cached[0] == mtime:
+            _cache.move_to_end(match_id)
+            return cached[1]
+
+    events = load_events(match_id)
+    if not events:
+        return None
+    analytics = build_match_analytics(match_id, events)
+
+    with _cache_lock:
+        _cache[match_id] = (mtime, analytics)
+        _cache.move_to_end(match_id)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return analytics
+
+
+def filter_edges(network: dict, min_passes: int) -> dict:
+    if min_passes <= 1:
+        return network
+    return {**network, "edges": [e for e in network["edges"] if e["count"] >= min_passes]}
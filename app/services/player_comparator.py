@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from app.db.models import Player
+from app.services.player_store import get_player_store
+from app.utils.snapshot import get_player_aggregates
 
 COMPARISON_FIELDS = [
     "goals", "assists", "rating", "minutes", "appearances",
@@ -7,8 +8,9 @@ COMPARISON_FIELDS = [
 ]
 
 def compare_players(name1: str, name2: str, db: Session) -> dict:
-    p1 = db.query(Player).filter(Player.name.ilike(f"%{name1}%")).first()
-    p2 = db.query(Player).filter(Player.name.ilike(f"%{name2}%")).first()
+    store = get_player_store(db)
+    p1 = store.find_by_name(name1)
+    p2 = store.find_by_name(name2)
 
     if not p1 or not p2:
         return {
@@ -19,11 +21,8 @@ def compare_players(name1: str, name2: str, db: Session) -> dict:
             }
         }
 
-    def extract(player):
-        return {field: getattr(player, field, None) for field in COMPARISON_FIELDS}
-
-    p1_stats = extract(p1)
-    p2_stats = extract(p2)
+    p1_stats = p1.to_dict(COMPARISON_FIELDS)
+    p2_stats = p2.to_dict(COMPARISON_FIELDS)
 
     comparison_results = {}
     win_counts = {p1.name: 0, p2.name: 0, "tie": 0}
@@ -61,9 +60,12 @@ def compare_players(name1: str, name2: str, db: Session) -> dict:
         f"{winner_overall} leads in {win_counts[winner_overall]} out of {len(COMPARISON_FIELDS)} metrics."
     )
 
+    # Match-log and workload aggregates come precomputed from the shared snapshot
+    match_log = get_player_aggregates(db, [p1.id, p2.id])
+
     return {
-        "player1": {"name": p1.name, "stats": p1_stats},
-        "player2": {"name": p2.name, "stats": p2_stats},
+        "player1": {"name": p1.name, "stats": p1_stats, "match_log": match_log[p1.id]},
+        "player2": {"name": p2.name, "stats": p2_stats, "match_log": match_log[p2.id]},
         "comparison": comparison_results,
         "summary": {
             "winner": winner_overall,
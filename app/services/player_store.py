@@ -0,0 +1,204 @@
+import time
+import hashlib
+import threading
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Player, Team
+from app.utils.snapshot import StringColumn, encode_strings, get_snapshot, NULL_INT, PLAYER_NUMERIC, PLAYER_STRINGS
+
+# Checked at most this often; a reload only happens when the fingerprint changed
+REFRESH_SECONDS = 5.0
+
+# Column layout shared with the analytics snapshot: counts are stored as int32 with a
+# NULL sentinel, rates and ratings as float64 with NaN
+NUMERIC_COLUMNS = [name for name, _ in PLAYER_NUMERIC if name != "team_id"]
+INTEGER_COLUMNS = {name for name, dtype in PLAYER_NUMERIC if dtype == "<i4"} - {"team_id"}
+STRING_COLUMNS = PLAYER_STRINGS
+
+
+def players_version(db: Session) -> str:
+    # Aggregate fingerprint computed in the database: no rows leave it unless something changed.
+    # row_version sums catch edits the numeric sums can't see, such as renames and team renames.
+    # Teams are counted by row_version (NOT NULL) so both subqueries read the table itself; counting the id
+    # lets SQLite pick any covering index, which made the plan flip between equally cheap indexes.
+    fingerprint = db.execute(select(
+        func.count(Player.id), func.max(Player.id), func.sum(Player.team_id), func.sum(Player.row_version),
+        *[func.sum(getattr(Player, c)) for c in NUMERIC_COLUMNS],
+        select(func.count(Team.row_version)).scalar_subquery(), select(func.sum(Team.row_version)).scalar_subquery(),
+    )).one()
+    return hashlib.sha1(repr(tuple(fingerprint)).encode()).hexdigest()[:12]
+
+
+class PlayerRow:
+    # A view onto one row of the store: two slots, no per-row dict or ORM state
+    __slots__ = ("_store", "_i")
+
+    def __init__(self, store, i: int):
+        self._store = store
+        self._i = i
+
+    @property
+    def id(self) -> int:
+        return int(self._store.ids[self._i])
+
+    @property
+    def team_id(self):
+        team_id = int(self._store.team_ids[self._i])
+        return team_id if team_id != NULL_INT else None
+
+    @property
+    def team_name(self):
+        return self._store.team_names.get(self.team_id)
+
+    def __getattr__(self, field: str):
+        return self._store.value(self._i, field)
+
+    def to_dict(self, fields) -> dict:
+        return {field: self._store.value(self._i, field) for field in fields}
+
+
+class PlayerStore:
+    def __init__(self, ids: np.ndarray, team_ids: np.ndarray, numeric: dict, strings: dict, team_names: dict, version: str,
+                 source: str = "database"):
+        self.ids = ids
+        self.team_ids = team_ids
+        self.numeric = numeric
+        self.strings = strings
+        self.team_names = team_names
+        self.version = version
+        self.source = source
+        # Lower-cased names joined into one string: a substring search is a single str.find
+        self._name_blob = "\n".join(strings["name"].tolist()).lower()
+        self._name_starts = np.cumsum([0] + [len(n) + 1 for n in self._name_blob.split("\n")[:-1]], dtype=np.int64)
+        self.checked_at = time.monotonic()
+
+    @classmethod
+    def from_snapshot(cls, snapshot, version: str) -> "PlayerStore":
+        # Column arrays are views into the mapping every worker shares; only the name search blob is per worker
+        return cls(
+            ids=snapshot.column("players", "id"),
+            team_ids=snapshot.column("players", "team_id"),
+            numeric={name: snapshot.column("players", name) for name in NUMERIC_COLUMNS},
+            strings={name: snapshot.column("players", name) for name in STRING_COLUMNS},
+            team_names=dict(zip(snapshot.column("teams", "id").tolist(), snapshot.column("teams", "name").tolist())),
+            version=version,
+            source=f"snapshot {snapshot.version}",
+        )
+
+    @classmethod
+    def load(cls, db: Session, version: str = None) -> "PlayerStore":
+        version = version or players_version(db)
+        snapshot = get_snapshot()
+        if snapshot is not None and snapshot.players_version == version:
+            return cls.from_snapshot(snapshot, version)
+
+        # The snapshot is missing or older than the table: one column-projected query; no ORM entities are built
+        rows = db.execute(
+            select(Player.id, Player.team_id, *[getattr(Player, c) for c in NUMERIC_COLUMNS],
+                   *[getattr(Player, c) for c in STRING_COLUMNS])
+            .order_by(Player.id)
+        ).all()
+        columns = list(zip(*rows)) if rows else [()] * (2 + len(NUMERIC_COLUMNS) + len(STRING_COLUMNS))
+        numeric = {}
+        for name, values in zip(NUMERIC_COLUMNS, columns[2:2 + len(NUMERIC_COLUMNS)]):
+            if name in INTEGER_COLUMNS:
+                numeric[name] = np.array([NULL_INT if v is None else v for v in values], dtype=np.int32)
+            else:
+                numeric[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        strings = {}
+        for name, values in zip(STRING_COLUMNS, columns[2 + len(NUMERIC_COLUMNS):]):
+            offsets, data = encode_strings(values)
+            strings[name] = StringColumn(offsets.astype(np.int32), data)
+        team_names = dict(db.execute(select(Team.id, Team.name)).all())
+        return cls(
+            ids=np.array(columns[0], dtype=np.int64),
+            team_ids=np.array([NULL_INT if t is None else t for t in columns[1]], dtype=np.int32),
+            numeric=numeric,
+            strings=strings,
+            team_names=team_names,
+            version=version,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column(self, field: str) -> np.ndarray:
+        # Float view for vectorized math, NULLs as NaN
+        values = self.numeric[field]
+        if field in INTEGER_COLUMNS:
+            return np.where(values == NULL_INT, np.nan, values.astype(np.float64))
+        return values
+
+    def value(self, i: int, field: str):
+        if field in self.numeric:
+            v = self.numeric[field][i]
+            if field in INTEGER_COLUMNS:
+                return None if v == NULL_INT else int(v)
+            return None if np.isnan(v) else float(v)
+        if field in self.strings:
+            return self.strings[field][i]
+        raise AttributeError(field)
+
+    def index_of(self, player_id: int):
+        i = int(np.searchsorted(self.ids, player_id))
+        return i if i < len(self.ids) and self.ids[i] == player_id else None
+
+    def indices_of(self, player_ids) -> np.ndarray:
+        # Store positions for the given ids, -1 where the player is unknown
+        player_ids = np.asarray(player_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(player_ids), -1, dtype=np.int64)
+        idx = np.minimum(np.searchsorted(self.ids, player_ids), len(self.ids) - 1)
+        return np.where(self.ids[idx] == player_ids, idx, -1)
+
+    def get(self, player_id: int):
+        i = self.index_of(player_id)
+        return PlayerRow(self, i) if i is not None else None
+
+    def find_by_name(self, fragment: str):
+        # Case-insensitive substring match, lowest id first (same as ILIKE '%fragment%')
+        fragment = fragment.lower()
+        if "\n" in fragment or not len(self.ids):
+            return None
+        pos = self._name_blob.find(fragment)
+        if pos < 0:
+            return None
+        return PlayerRow(self, int(np.searchsorted(self._name_starts, pos, side="right")) - 1)
+
+    def find_mentioned(self, text: str):
+        # First player (by id) whose full name appears in the text
+        text = text.lower()
+        for i, name in enumerate(self._name_blob.split("\n")):
+            if name and name in text:
+                return PlayerRow(self, i)
+        return None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_player_store(db: Session) -> PlayerStore:
+    global _store
+    store = _store
+    if store is not None and time.monotonic() - store.checked_at < REFRESH_SECONDS:
+        return store
+
+    version = players_version(db)
+    if store is not None and store.version == version:
+        store.checked_at = time.monotonic()
+        return store
+    with _store_lock:
+        if _store is None or _store.version != version:
+            _store = PlayerStore.load(db, version)
+        return _store
+
+
+def invalidate_player_store():
+    # Forces the next get_player_store() to reload, e.g. right after a bulk ingest
+    global _store
+    with _store_lock:
+        _store = None
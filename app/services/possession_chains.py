@@ -0,0 +1,161 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import func, delete, insert
+from sqlalchemy.orm import Session
+
+from app.db.models import PossessionChain, PossessionChainPlayer
+from app.utils.statsbomb import available_match_ids, load_events, event_file, file_mtime
+
+
+def _elapsed_seconds(event: dict) -> float:
+    # minute/second are cumulative match clock; keep the millisecond part of the timestamp
+    millis = float(event.get("timestamp", "0.0").rsplit(".", 1)[-1] or 0) / 1000
+    return event.get("minute", 0) * 60 + event.get("second", 0) + millis
+
+
+def segment_possessions(match_id: int, events: list):
+    # Single pass: events arrive ordered by index, and possession numbers only ever increase
+    chains = []
+    involvement = []
+    current = None
+    players = None
+
+    def close(chain, players):
+        chains.append(chain)
+        for player_id, (actions, passes) in players.items():
+            involvement.append({
+                "match_id": match_id,
+                "possession": chain["possession"],
+                "statsbomb_player_id": player_id,
+                "actions": actions,
+                "passes": passes,
+            })
+
+    for event in events:
+        possession = event.get("possession")
+        if possession is None:
+            continue
+
+        if current is None or possession != current["possession"]:
+            if current is not None:
+                close(current, players)
+            current = {
+                "match_id": match_id,
+                "possession": possession,
+                "statsbomb_team_id": event.get("possession_team", {}).get("id"),
+                "period": event.get("period"),
+                "start_second": _elapsed_seconds(event),
+                "end_second": _elapsed_seconds(event),
+                "start_x": None,
+                "end_x": None,
+                "passes": 0,
+                "events": 0,
+                "outcome": None,
+            }
+            players = {}
+
+        current["end_second"] = _elapsed_seconds(event)
+        current["events"] += 1
+
+        # Only the team in possession counts towards progression and involvement;
+        # opponent coordinates are mirrored
+        if event.get("team", {}).get("id") != current["statsbomb_team_id"]:
+            continue
+
+        event_type = event.get("type", {}).get("name")
+        location = event.get("location")
+        if location:
+            if current["start_x"] is None:
+                current["start_x"] = location[0]
+            current["end_x"] = location[0]
+        if event_type == "Pass":
+            current["passes"] += 1
+            end_location = event.get("pass", {}).get("end_location")
+            if end_location and event["pass"].get("outcome") is None:
+                current["end_x"] = end_location[0]
+        elif event_type == "Carry":
+            end_location = event.get("carry", {}).get("end_location")
+            if end_location:
+                current["end_x"] = end_location[0]
+        elif event_type == "Shot":
+            shot_outcome = event.get("shot", {}).get("outcome", {}).get("name")
+            if current["outcome"] != "goal":
+                current["outcome"] = "goal" if shot_outcome == "Goal" else "shot"
+
+        player = event.get("player")
+        if player:
+            actions, passes = players.get(player["id"], (0, 0))
+            players[player["id"]] = (actions + 1, passes + (event_type == "Pass"))
+
+    if current is not None:
+        close(current, players)
+
+    # Chains without a shot end in a turnover unless the same team keeps the ball
+    for i, chain in enumerate(chains):
+        chain["duration"] = round(max(chain["end_second"] - chain["start_second"], 0.0), 3)
+        if chain["start_x"] is not None and chain["end_x"] is not None:
+            chain["progression"] = round(chain["end_x"] - chain["start_x"], 2)
+        else:
+            chain["progression"] = None
+        if chain["outcome"]:
+            continue
+        following = chains[i + 1] if i + 1 < len(chains) else None
+        if following is None or following["period"] != chain["period"]:
+            chain["outcome"] = "period_end"
+        elif following["statsbomb_team_id"] != chain["statsbomb_team_id"]:
+            chain["outcome"] = "turnover"
+        else:
+            chain["outcome"] = "retained"
+
+    return chains, involvement
+
+
+def _segment_file(match_id: int):
+    mtime = file_mtime(event_file(match_id))
+    chains, involvement = segment_possessions(match_id, load_events(match_id))
+    for chain in chains:
+        chain["source_mtime"] = mtime
+    return match_id, chains, involvement
+
+
+def stale_matches(db: Session, match_ids=None) -> list:
+    # A match needs recomputing when its event file changed since the stored chains were built
+    if match_ids is None:
+        match_ids = available_match_ids()
+
+    stored = dict(
+        db.query(PossessionChain.match_id, func.max(PossessionChain.source_mtime))
+        .filter(PossessionChain.match_id.in_(match_ids))
+        .group_by(PossessionChain.match_id)
+        .all()
+    )
+    return [m for m in match_ids if stored.get(m) != file_mtime(event_file(m))]
+
+
+def refresh_possession_chains(db: Session, match_ids=None, force: bool = False, workers: int = None) -> dict:
+    if force and match_ids is None:
+        match_ids = available_match_ids()
+    targets = list(match_ids) if force else stale_matches(db, match_ids)
+    if not targets:
+        return {"recomputed": [], "chains": 0}
+
+    # JSON parsing dominates, so spread files across processes and write from here
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 and len(targets) > 1 else None
+    results = pool.map(_segment_file, targets) if pool else map(_segment_file, targets)
+
+    total = 0
+    try:
+        for match_id, chains, involvement in results:
+            db.execute(delete(PossessionChainPlayer).where(PossessionChainPlayer.match_id == match_id))
+            db.execute(delete(PossessionChain).where(PossessionChain.match_id == match_id))
+            if chains:
+                db.execute(insert(PossessionChain), chains)
+            if involvement:
+                db.execute(insert(PossessionChainPlayer), involvement)
+            db.commit()
+            total += len(chains)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return {"recomputed": targets, "chains": total}
@@ -0,0 +1,285 @@
+import os
+import re
+import math
+import hashlib
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.db.models import QuerySketch, SearchLog, ChatPromptLog
+from app.db.session import SessionLocal
+from app.db.upsert import insert_for
+from app.utils.timestamp import utc_now
+
+SOURCES = ("search", "prompt")
+# Count-Min: overestimates by at most ~e/WIDTH of the day's total with probability 1 - e^-DEPTH
+CMS_DEPTH = 4
+CMS_WIDTH = 2048
+# HyperLogLog with 2^12 registers: ~1.6% standard error on unique users
+HLL_P = 12
+HLL_REGISTERS = 1 << HLL_P
+# Candidate queries tracked for top-k; estimates always come from the Count-Min table
+HEAVY_CAPACITY = 64
+MAX_TOP_K = 50
+# Each worker folds its local deltas into the shared rows this often, from a background thread
+FLUSH_SECONDS = float(os.getenv("QUERY_SKETCH_FLUSH_SECONDS", "10"))
+REBUILD_BATCH = 5000
+DELETE_BATCH = 500
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    return _whitespace.sub(" ", (text or "").strip().lower())
+
+
+def _hash128(value: str) -> tuple:
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+
+class Sketch:
+    def __init__(self, count_min: np.ndarray = None, registers: np.ndarray = None, heavy: dict = None,
+                 total: int = 0, zero_results: int = 0):
+        self.count_min = count_min if count_min is not None else np.zeros((CMS_DEPTH, CMS_WIDTH), dtype=np.uint32)
+        self.registers = registers if registers is not None else np.zeros(HLL_REGISTERS, dtype=np.uint8)
+        self.heavy = heavy or {}
+        self.total = total
+        self.zero_results = zero_results
+
+    @classmethod
+    def from_row(cls, row: QuerySketch) -> "Sketch":
+        return cls(
+            count_min=np.frombuffer(row.count_min, dtype="<u4").reshape(CMS_DEPTH, CMS_WIDTH).copy(),
+            registers=np.frombuffer(row.hll, dtype=np.uint8).copy(),
+            heavy=dict(row.heavy_hitters or {}),
+            total=row.total or 0,
+            zero_results=row.zero_results or 0,
+        )
+
+    def to_values(self) -> dict:
+        return {
+            "total": self.total,
+            "zero_results": self.zero_results,
+            "count_min": self.count_min.astype("<u4").tobytes(),
+            "hll": self.registers.tobytes(),
+            "heavy_hitters": self.heavy,
+        }
+
+    def _cells(self, query: str) -> np.ndarray:
+        # Double hashing: row i uses h1 + i * h2
+        h1, h2 = _hash128(query)
+        return np.array([(h1 + i * h2) % CMS_WIDTH for i in range(CMS_DEPTH)])
+
+    def estimate(self, query: str) -> int:
+        return int(self.count_min[np.arange(CMS_DEPTH), self._cells(query)].min())
+
+    def add(self, query: str, user_id: str, zero_result: bool = False):
+        query = normalize_query(query)
+        self.total += 1
+        self.zero_results += int(bool(zero_result))
+
+        cells = self._cells(query)
+        self.count_min[np.arange(CMS_DEPTH), cells] += 1
+        self._offer(query, int(self.count_min[np.arange(CMS_DEPTH), cells].min()))
+
+        h, _ = _hash128(str(user_id))
+        register = h >> (64 - HLL_P)
+        rank = (64 - HLL_P) - (h & ((1 << (64 - HLL_P)) - 1)).bit_length() + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+
+    def _offer(self, query: str, estimate: int):
+        if query in self.heavy or len(self.heavy) < HEAVY_CAPACITY:
+            self.heavy[query] = estimate
+            return
+        weakest = min(self.heavy, key=self.heavy.get)
+        if estimate > self.heavy[weakest]:
+            del self.heavy[weakest]
+            self.heavy[query] = estimate
+
+    def merge(self, other: "Sketch") -> "Sketch":
+        # Count-Min adds, HyperLogLog takes the register max; candidates are re-scored on the merged table
+        self.count_min += other.count_min
+        np.maximum(self.registers, other.registers, out=self.registers)
+        self.total += other.total
+        self.zero_results += other.zero_results
+        candidates = set(self.heavy) | set(other.heavy)
+        scored = sorted(((self.estimate(q), q) for q in candidates), reverse=True)[:HEAVY_CAPACITY]
+        self.heavy = {q: est for est, q in scored}
+        return self
+
+    def unique_users(self) -> int:
+        m = HLL_REGISTERS
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while most registers are still empty
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def top(self, k: int) -> list:
+        ranked = sorted(self.heavy.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [{"query": q, "count": count} for q, count in ranked]
+
+
+# -------------------------
+# Per-worker deltas, folded into the shared rows
+# -------------------------
+
+_pending = {}
+_pending_lock = threading.Lock()
+_flusher = None
+_flusher_lock = threading.Lock()
+_flusher_stop = threading.Event()
+
+
+def record_query(source: str, model_version: str, user_id: str, text: str,
+                 zero_result: bool = False, at: datetime = None):
+    # Called right after a log row is written; only touches memory, the flusher thread does the DB work
+    key = ((at or utc_now()).date(), source, model_version or "unknown")
+    with _pending_lock:
+        _pending.setdefault(key, Sketch()).add(text, user_id, zero_result)
+    start_sketch_flusher()
+
+
+def flush_pending() -> int:
+    # Own session and no raise: a failed flush keeps the deltas for the next round instead of failing a caller
+    db = SessionLocal()
+    try:
+        return flush_sketches(db)
+    except Exception as e:
+        print(f"⚠️ Query sketch flush failed, retrying in {FLUSH_SECONDS:.0f}s: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+def _flush_loop():
+    while not _flusher_stop.wait(FLUSH_SECONDS):
+        flush_pending()
+
+
+def start_sketch_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _flusher_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher_stop.clear()
+            _flusher = threading.Thread(target=_flush_loop, name="query-sketch-flush", daemon=True)
+            _flusher.start()
+
+
+def stop_sketch_flusher(timeout: float = 5.0):
+    # The caller does the final flush_sketches once the thread is gone
+    _flusher_stop.set()
+    if _flusher is not None:
+        _flusher.join(timeout)
+
+
+def _merge_into_row(db: Session, key: tuple, delta: Sketch):
+    day, source, model_version = key
+    table = QuerySketch.__table__
+    db.execute(
+        insert_for(db)(table).on_conflict_do_nothing(index_elements=[table.c.day, table.c.source, table.c.model_version]),
+        {"day": day, "source": source, "model_version": model_version, **Sketch().to_values()},
+    )
+    # Row lock so concurrent workers merging into the same day serialize instead of overwriting each other
+    row = db.execute(
+        select(QuerySketch).where(QuerySketch.day == day, QuerySketch.source == source,
+                                  QuerySketch.model_version == model_version).with_for_update()
+    ).scalar_one()
+    for column, value in Sketch.from_row(row).merge(delta).to_values().items():
+        setattr(row, column, value)
+    row.updated_at = utc_now()
+
+
+def flush_sketches(db: Session) -> int:
+    global _pending
+    with _pending_lock:
+        pending, _pending = _pending, {}
+    if not pending:
+        return 0
+    try:
+        for key, delta in sorted(pending.items()):
+            _merge_into_row(db, key, delta)
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Keep the deltas for the next flush rather than losing them
+        with _pending_lock:
+            for key, delta in pending.items():
+                _pending[key] = delta.merge(_pending[key]) if key in _pending else delta
+        raise
+    return len(pending)
+
+
+# -------------------------
+# Reading and backfill
+# -------------------------
+
+def query_analytics(db: Session, source: str = "search", days: int = 7, model_version: str = None,
+                    k: int = 10, today: date = None) -> dict:
+    # Merges at most days x model_versions fixed-size rows: cost is independent of log volume. Read-only:
+    # queries recorded in the last FLUSH_SECONDS show up once the flusher thread has written them
+    today = today or utc_now().date()
+    first_day = today - timedelta(days=days - 1)
+    query = select(QuerySketch).where(QuerySketch.source == source, QuerySketch.day >= first_day, QuerySketch.day <= today)
+    if model_version:
+        query = query.where(QuerySketch.model_version == model_version)
+
+    merged, versions = Sketch(), set()
+    for row in db.execute(query).scalars():
+        merged.merge(Sketch.from_row(row))
+        versions.add(row.model_version)
+    return {
+        "source": source,
+        "from": first_day.isoformat(),
+        "to": today.isoformat(),
+        "model_versions": sorted(versions),
+        "total_queries": merged.total,
+        "unique_users": merged.unique_users(),
+        "zero_result_rate": round(merged.zero_results / merged.total, 4) if merged.total else None,
+        "top_queries": merged.top(min(k, MAX_TOP_K)),
+        "approximate": True,
+    }
+
+
+def rebuild_sketches(db: Session, since: date = None, progress=None) -> dict:
+    # Recomputes the rows for every day from `since` by streaming the logs once. Only days that still have
+    # log rows are replaced: days whose logs were archived by log retention keep the sketches built before
+    flush_sketches(db)
+    logs = [
+        ("search", SearchLog, SearchLog.question, lambda r: r.matched_players == 0),
+        ("prompt", ChatPromptLog, ChatPromptLog.prompt, lambda r: False),
+    ]
+    sketches = {}
+    for i, (source, model, text_column, is_zero) in enumerate(logs):
+        query = select(model.timestamp, model.model_version, model.user_id, text_column.label("text"),
+                       *([model.matched_players] if model is SearchLog else []))
+        if since:
+            query = query.where(model.timestamp >= datetime.combine(since, datetime.min.time()))
+        result = db.connection().execution_options(stream_results=True).execute(query)
+        for batch in result.partitions(REBUILD_BATCH):
+            for r in batch:
+                key = (r.timestamp.date(), source, r.model_version or "unknown")
+                sketches.setdefault(key, Sketch()).add(r.text, r.user_id, is_zero(r))
+        if progress:
+            progress(0.8 * (i + 1) / len(logs), f"Scanned {source} logs")
+
+    rebuilt = {}
+    for day, source, _ in sketches:
+        rebuilt.setdefault(source, set()).add(day)
+    for source, days in rebuilt.items():
+        days = sorted(days)
+        for start in range(0, len(days), DELETE_BATCH):
+            db.execute(delete(QuerySketch).where(QuerySketch.source == source,
+                                                 QuerySketch.day.in_(days[start:start + DELETE_BATCH])))
+    for (day, source, model_version), sketch in sketches.items():
+        db.add(QuerySketch(day=day, source=source, model_version=model_version, updated_at=utc_now(), **sketch.to_values()))
+    db.commit()
+    return {"sketches": len(sketches), "queries": sum(s.total for s in sketches.values())}
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import time
+
+from app.utils.statsbomb import load_events, event_file, file_mtime, new_player_stats, apply_event, pass_accuracy
+
+SUBSCRIBER_QUEUE_SIZE = 256
+MAX_SPEED = 600.0
+
+
+def _period_seconds(event: dict) -> float:
+    h, m, s = event.get("timestamp", "00:00:00.000").split(":")
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+class ReplayHub:
+    # Pub/sub fan-out: each message is serialized once and handed to every subscriber queue.
+    # Slow clients lose their oldest messages instead of holding up the match clock.
+    def __init__(self):
+        self._topics = {}
+
+    def subscribe(self, topic) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._topics.setdefault(topic, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, topic, queue: asyncio.Queue):
+        subscribers = self._topics.get(topic)
+        if subscribers:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._topics[topic]
+
+    def subscriber_count(self, topic) -> int:
+        return len(self._topics.get(topic, ()))
+
+    def publish(self, topic, message: dict):
+        payload = json.dumps(message)
+        for queue in self._topics.get(topic, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+
+class MatchReplay:
+    def __init__(self, match_id: int, hub: ReplayHub, speed: float = 1.0):
+        self.match_id = match_id
+        self.hub = hub
+        self.speed = min(max(speed, 0.01), MAX_SPEED)
+        self.players = {}
+        self.status = "starting"
+        self.period = None
+        self.clock = 0.0
+        self.task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "type": "snapshot",
+            "match_id": self.match_id,
+            "status": self.status,
+            "period": self.period,
+            "clock": round(self.clock, 3),
+            "players": list(self.players.values()),
+        }
+
+    def _apply(self, event: dict):
+        # O(1) per event: one dict lookup and a few counter bumps, then publish only the diff
+        player = event.get("player")
+        if not player:
+            return None
+        entry = self.players.get(player["id"])
+        if entry is None:
+            entry = {
+                "player_id": player["id"],
+                "name": player["name"],
+                "team": event.get("team", {}).get("name"),
+                "stats": new_player_stats(),
+            }
+        if not apply_event(entry["stats"], event):
+            return None
+        self.players[player["id"]] = entry
+        return {
+            "type": "stats",
+            "match_id": self.match_id,
+            "period": event.get("period"),
+            "minute": event.get("minute"),
+            "second": event.get("second"),
+            "event": event.get("type", {}).get("name"),
+            "player_id": entry["player_id"],
+            "name": entry["name"],
+            "team": entry["team"],
+            "stats": {**entry["stats"], "pass_accuracy": pass_accuracy(entry["stats"])},
+            "sent_at": time.time(),
+        }
+
+    async def run(self):
+        topic = self.match_id
+        events = await asyncio.to_thread(load_events, self.match_id)
+        events.sort(key=lambda e: (e.get("period", 0), _period_seconds(e), e.get("index", 0)))
+        self.status = "live"
+        self.hub.publish(topic, {"type": "status", "match_id": self.match_id, "status": self.status})
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        elapsed = 0.0
+        previous = None
+        for event in events:
+            # Pace against a fixed wall-clock schedule so small sleeps don't accumulate drift;
+            # the break between periods is skipped
+            if previous is not None and event.get("period") == previous.get("period"):
+                elapsed += max(_period_seconds(event) - _period_seconds(previous), 0.0)
+                delay = started + elapsed / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            previous = event
+            self.period = event.get("period")
+            self.clock = _period_seconds(event)
+
+            diff = self._apply(event)
+            if diff:
+                self.hub.publish(topic, diff)
+
+        self.status = "finished"
+        self.hub.publish(topic, {"type": "status", "match_id": self.match_id, "status": self.status})
+
+
+hub = ReplayHub()
+_replays = {}
+
+
+def start_replay(match_id: int, speed: float = 1.0) -> MatchReplay:
+    # Must be called from the running event loop
+    replay = _replays.get(match_id)
+    if replay and replay.status in ("starting", "live"):
+        return replay
+    if file_mtime(event_file(match_id)) is None:
+        return None
+
+    replay = MatchReplay(match_id, hub, speed)
+    replay.task = asyncio.get_running_loop().create_task(replay.run())
+    _replays[match_id] = replay
+    return replay
+
+
+def stop_replay(match_id: int) -> bool:
+    replay = _replays.pop(match_id, None)
+    if not replay:
+        return False
+    if replay.task and not replay.task.done():
+        replay.task.cancel()
+    replay.status = "stopped"
+    hub.publish(match_id, {"type": "status", "match_id": match_id, "status": replay.status})
+    return True
+
+
+def get_replay(match_id: int):
+    return _replays.get(match_id)
+
+
+def list_replays() -> list:
+    return [
+        {
+            "match_id": r.match_id,
+            "status": r.status,
+            "speed": r.speed,
+            "period": r.period,
+            "clock": round(r.clock, 3),
+            "subscribers": hub.subscriber_count(r.match_id),
+        }
+        for r in _replays.values()
+    ]
@@ -0,0 +1,198 @@
+import numpy as np
+from sqlalchemy import select, delete, func, and_, or_, case
+from sqlalchemy.orm import Session, aliased
+
+from app.db.models import Team, Player, MatchStat, PlayerMatchMinutes, TeamRollup, TeamMatchStat
+from app.utils.timestamp import utc_now
+
+# [lower, upper) age bounds per squad-profile column
+AGE_BANDS = {"age_u21": (0, 21), "age_21_25": (21, 26), "age_26_29": (26, 30), "age_30_plus": (30, 200)}
+# Players with at least this share of the squad's busiest player's minutes count as regulars
+REGULAR_SHARE = 0.5
+
+LEAGUE_TABLE_SORTS = {
+    "strength": TeamRollup.strength,
+    "goals": TeamRollup.goals,
+    "match_goals": TeamRollup.match_goals,
+}
+
+
+def _nan_to_none(value, digits: int = 2):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def squad_profile(ages: np.ndarray, minutes: np.ndarray, goals: np.ndarray, assists: np.ndarray,
+                  ratings: np.ndarray) -> dict:
+    # Float arrays for one squad, nan where the player column is NULL
+    played = np.nan_to_num(minutes)
+    rated = ~np.isnan(ratings)
+    weights = np.where(rated, played, 0)
+    if weights.sum() > 0:
+        # Minutes-weighted rating: squad players who barely feature move the number very little
+        strength = float((ratings[rated] * weights[rated]).sum() / weights.sum())
+    else:
+        strength = float(ratings[rated].mean()) if rated.any() else 0.0
+    known_minutes = minutes[~np.isnan(minutes)]
+    p25, median, p75 = np.percentile(known_minutes, [25, 50, 75]) if len(known_minutes) else (np.nan,) * 3
+
+    profile = {
+        "players": len(ages),
+        "avg_age": _nan_to_none(np.nanmean(ages)) if (~np.isnan(ages)).any() else None,
+        "minutes": int(played.sum()),
+        "minutes_p25": _nan_to_none(p25),
+        "minutes_median": _nan_to_none(median),
+        "minutes_p75": _nan_to_none(p75),
+        "regulars": int((played >= REGULAR_SHARE * played.max()).sum()) if played.max(initial=0) > 0 else 0,
+        "goals": int(np.nan_to_num(goals).sum()),
+        "assists": int(np.nan_to_num(assists).sum()),
+        "avg_rating": _nan_to_none(ratings[rated].mean()) if rated.any() else None,
+        "strength": round(strength, 3),
+    }
+    for column, (low, high) in AGE_BANDS.items():
+        profile[column] = int(((ages >= low) & (ages < high)).sum())
+    return profile
+
+
+def refresh_team_rollups(db: Session, team_ids=None, progress=None) -> dict:
+    # Recomputes the rollups of the given teams only (every team when None). Called by the ingest paths
+    # with the teams whose players or match stats they touched, including teams a player moved away from.
+    db.flush()
+    players = (
+        select(Player.team_id, Player.age, Player.minutes, Player.goals, Player.assists, Player.rating)
+        .where(Player.team_id.isnot(None))
+        .order_by(Player.team_id)
+    )
+    # A match counts for the team the player lined up for that day. match_stats carry no team, so stats
+    # without a lineup row fall back to the player's current team, unless a lineup shows them at another
+    # team: those players have moved, and their unlined-up matches can't be attributed and are left out.
+    lined_up = aliased(Player)
+    moved = (
+        select(PlayerMatchMinutes.player_id)
+        .join(lined_up, lined_up.id == PlayerMatchMinutes.player_id)
+        .where(PlayerMatchMinutes.team_id != lined_up.team_id)
+    )
+    match_team = func.coalesce(
+        PlayerMatchMinutes.team_id,
+        case((Player.id.notin_(moved), Player.team_id)),
+    ).label("team_id")
+    per_match = (
+        select(match_team, MatchStat.match_date, func.count(MatchStat.id).label("players"),
+               func.sum(MatchStat.goals).label("goals"), func.sum(MatchStat.assists).label("assists"),
+               func.avg(MatchStat.pass_accuracy).label("pass_accuracy"))
+        .join(Player, Player.id == MatchStat.player_id)
+        .outerjoin(PlayerMatchMinutes, and_(PlayerMatchMinutes.player_id == MatchStat.player_id,
+                                            PlayerMatchMinutes.match_date == MatchStat.match_date))
+        .where(match_team.isnot(None))
+        .group_by(match_team, MatchStat.match_date)
+    )
+    teams = select(Team.id)
+    stale_matches, stale_rollups = delete(TeamMatchStat), delete(TeamRollup)
+    if team_ids is not None:
+        team_ids = sorted({t for t in team_ids if t is not None})
+        if not team_ids:
+            return {"teams": 0, "team_matches": 0}
+        # Served by ix_players_team_id and ix_match_stats_player_id_match_date; the outer filter narrows
+        # the rows to the players involved, match_team picks the right team among them
+        players = players.where(Player.team_id.in_(team_ids))
+        per_match = per_match.where(or_(Player.team_id.in_(team_ids), PlayerMatchMinutes.team_id.in_(team_ids)),
+                                    match_team.in_(team_ids))
+        teams = teams.where(Team.id.in_(team_ids))
+        stale_matches = stale_matches.where(TeamMatchStat.team_id.in_(team_ids))
+        stale_rollups = stale_rollups.where(TeamRollup.team_id.in_(team_ids))
+    team_ids = list(db.scalars(teams))
+    known = set(team_ids)
+
+    rows = db.execute(players).all()
+    columns = np.array([[r.team_id, r.age, r.minutes, r.goals, r.assists, r.rating] for r in rows], dtype=np.float64).reshape(-1, 6)
+    bounds = np.flatnonzero(np.diff(columns[:, 0])) + 1
+    squads = {int(squad[0, 0]): squad for squad in np.split(columns, bounds) if len(squad)}
+    if progress:
+        progress(0.4, f"Loaded {len(rows)} players for {len(team_ids)} teams")
+
+    team_matches = [
+        {"team_id": r.team_id, "match_date": r.match_date, "players": r.players, "goals": r.goals or 0,
+         "assists": r.assists or 0, "pass_accuracy": round(float(r.pass_accuracy), 2) if r.pass_accuracy is not None else None}
+        for r in db.execute(per_match) if r.team_id in known
+    ]
+    match_totals = {}
+    for m in team_matches:
+        totals = match_totals.setdefault(m["team_id"], {"matches": 0, "match_goals": 0, "match_assists": 0})
+        totals["matches"] += 1
+        totals["match_goals"] += m["goals"]
+        totals["match_assists"] += m["assists"]
+
+    empty = np.empty((0, 6))
+    now = utc_now()
+    rollups = []
+    for team_id in team_ids:
+        squad = squads.get(team_id, empty)
+        rollups.append({
+            "team_id": team_id,
+            **squad_profile(squad[:, 1], squad[:, 2], squad[:, 3], squad[:, 4], squad[:, 5]),
+            **match_totals.get(team_id, {"matches": 0, "match_goals": 0, "match_assists": 0}),
+            "updated_at": now,
+        })
+
+    # Delete-and-insert per team keeps the rollups exact even when players change teams or are removed
+    db.execute(stale_matches)
+    db.execute(stale_rollups)
+    if team_matches:
+        db.execute(TeamMatchStat.__table__.insert(), team_matches)
+    if rollups:
+        db.execute(TeamRollup.__table__.insert(), rollups)
+    if progress:
+        progress(1.0, f"Rolled up {len(rollups)} teams")
+    return {"teams": len(rollups), "team_matches": len(team_matches)}
+
+
+def _serialize_rollup(rollup: TeamRollup) -> dict:
+    return {
+        "players": rollup.players,
+        "age_profile": {"average": rollup.avg_age, **{band: getattr(rollup, band) for band in AGE_BANDS}},
+        "minutes": {"total": rollup.minutes, "p25": rollup.minutes_p25, "median": rollup.minutes_median,
+                    "p75": rollup.minutes_p75, "regulars": rollup.regulars},
+        "goals": rollup.goals,
+        "assists": rollup.assists,
+        "avg_rating": rollup.avg_rating,
+        "strength": rollup.strength,
+        "matches": {"played": rollup.matches, "goals": rollup.match_goals, "assists": rollup.match_assists},
+        "updated_at": rollup.updated_at.isoformat() if rollup.updated_at else None,
+    }
+
+
+def get_team_summary(db: Session, team_id: int, last_matches: int = 10):
+    row = db.execute(select(Team, TeamRollup).outerjoin(TeamRollup, TeamRollup.team_id == Team.id).where(Team.id == team_id)).first()
+    if row is None:
+        return None
+    team, rollup = row
+    recent = db.scalars(
+        select(TeamMatchStat).where(TeamMatchStat.team_id == team_id).order_by(TeamMatchStat.match_date.desc()).limit(last_matches)
+    ).all()
+    return {
+        "team_id": team.id,
+        "name": team.name,
+        "rollup": _serialize_rollup(rollup) if rollup else None,
+        "recent_matches": [
+            {"match_date": m.match_date.isoformat(), "players": m.players, "goals": m.goals,
+             "assists": m.assists, "pass_accuracy": m.pass_accuracy}
+            for m in recent
+        ],
+    }
+
+
+def league_table(db: Session, sort: str = "strength", limit: int = 50, offset: int = 0) -> list:
+    # One ordered read of team_rollups; (sort column, team_id) descending matches the index order
+    column = LEAGUE_TABLE_SORTS[sort]
+    rows = db.execute(
+        select(TeamRollup, Team.name)
+        .join(Team, Team.id == TeamRollup.team_id)
+        .order_by(column.desc(), TeamRollup.team_id.desc())
+        .offset(offset)
+        .limit(limit)
+    ).all()
+    return [
+        {"position": offset + i + 1, "team_id": rollup.team_id, "name": name, "strength": rollup.strength,
+         "goals": rollup.goals, "assists": rollup.assists, "match_goals": rollup.match_goals, "matches": rollup.matches,
+         "avg_rating": rollup.avg_rating, "avg_age": rollup.avg_age, "players": rollup.players}
+        for i, (rollup, name) in enumerate(rows)
+    ]
@@ -0,0 +1,117 @@
+import heapq
+from datetime import datetime, time, timedelta, timezone
+from itertools import dropwhile, takewhile, islice
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import MatchStat, StatusInterval, FactBiometricMinute
+
+# Source order also breaks ties between entries with the same timestamp
+SOURCES = ("match", "status", "biometric")
+DEFAULT_PAGE_SIZE = 100
+# Rows fetched per round trip; each source holds at most one batch in memory
+BATCH_SIZE = 500
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def as_utc(value) -> datetime:
+    if isinstance(value, datetime):
+        # Backends without timezone support (SQLite) hand stored UTC values back naive
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    return datetime.combine(value, time.min, tzinfo=timezone.utc)
+
+
+def encode_cursor(key: tuple) -> str:
+    t, rank, row_id = key
+    return f"{(t - _EPOCH) // timedelta(microseconds=1)}:{rank}:{row_id}"
+
+
+def decode_cursor(cursor: str) -> tuple:
+    micros, rank, row_id = cursor.split(":")
+    return _EPOCH + timedelta(microseconds=int(micros)), int(rank), int(row_id)
+
+
+def _stream(db: Session, query):
+    # Server-side cursor where the driver supports it: rows arrive in batches as the merge asks for them
+    return db.execute(query.execution_options(yield_per=BATCH_SIZE))
+
+
+def _match_entries(db: Session, player_id: int, start: datetime, end: datetime):
+    rank = SOURCES.index("match")
+    query = select(MatchStat.id, MatchStat.match_date, MatchStat.goals, MatchStat.assists, MatchStat.pass_accuracy).where(
+        MatchStat.player_id == player_id)
+    # Dates are compared at day granularity; the exact window is applied to the merged stream
+    if start:
+        query = query.where(MatchStat.match_date >= start.date())
+    if end:
+        query = query.where(MatchStat.match_date <= end.date())
+    for r in _stream(db, query.order_by(MatchStat.match_date, MatchStat.id)):
+        yield (as_utc(r.match_date), rank, r.id), {
+            "goals": r.goals, "assists": r.assists, "pass_accuracy": r.pass_accuracy,
+        }
+
+
+def _status_entries(db: Session, player_id: int, start: datetime, end: datetime):
+    rank = SOURCES.index("status")
+    query = select(StatusInterval.id, StatusInterval.start_time, StatusInterval.end_time, StatusInterval.status_type,
+                   StatusInterval.status_description).where(StatusInterval.player_id == player_id,
+                                                            StatusInterval.start_time.isnot(None))
+    if start:
+        query = query.where(StatusInterval.start_time >= start)
+    if end:
+        query = query.where(StatusInterval.start_time < end)
+    for r in _stream(db, query.order_by(StatusInterval.start_time, StatusInterval.id)):
+        yield (as_utc(r.start_time), rank, r.id), {
+            "status_type": r.status_type, "description": r.status_description,
+            "end": as_utc(r.end_time).isoformat() if r.end_time else None,
+        }
+
+
+def _biometric_entries(db: Session, player_id: int, start: datetime, end: datetime):
+    rank = SOURCES.index("biometric")
+    query = select(FactBiometricMinute.id, FactBiometricMinute.timestamp, FactBiometricMinute.heart_rate_variability,
+                   FactBiometricMinute.sprint_count, FactBiometricMinute.minutes_played, FactBiometricMinute.device_type
+                   ).where(FactBiometricMinute.player_id == player_id, FactBiometricMinute.timestamp.isnot(None))
+    if start:
+        query = query.where(FactBiometricMinute.timestamp >= start)
+    if end:
+        query = query.where(FactBiometricMinute.timestamp < end)
+    for r in _stream(db, query.order_by(FactBiometricMinute.timestamp, FactBiometricMinute.id)):
+        yield (as_utc(r.timestamp), rank, r.id), {
+            "hrv": r.heart_rate_variability, "sprint_count": r.sprint_count,
+            "minutes_played": r.minutes_played, "device_type": r.device_type,
+        }
+
+
+_SOURCE_ENTRIES = {"match": _match_entries, "status": _status_entries, "biometric": _biometric_entries}
+
+
+def iter_timeline(db: Session, player_id: int, start: datetime = None, end: datetime = None,
+                  sources=SOURCES, after: tuple = None):
+    # One index-ordered query per source (player_id + time indexes), merged lazily by (timestamp, source, id).
+    # Nothing is read ahead of what the caller consumes, so memory stays at one batch per source.
+    start = as_utc(start) if start else None
+    end = as_utc(end) if end else None
+    if after and (start is None or after[0] > start):
+        start = after[0]
+    streams = [_SOURCE_ENTRIES[s](db, player_id, start, end) for s in SOURCES if s in sources]
+    merged = heapq.merge(*streams, key=lambda entry: entry[0])
+    if start:
+        merged = dropwhile(lambda entry: entry[0][0] < start, merged)
+    if after:
+        # Entries sharing the cursor's timestamp were partly returned on the previous page
+        merged = dropwhile(lambda entry: entry[0] <= after, merged)
+    if end:
+        merged = takewhile(lambda entry: entry[0][0] < end, merged)
+    for key, payload in merged:
+        yield key, {"t": key[0].isoformat(), "source": SOURCES[key[1]], "id": key[2], **payload}
+
+
+def get_timeline_page(db: Session, player_id: int, start: datetime = None, end: datetime = None,
+                      sources=SOURCES, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None) -> dict:
+    # Reads limit + 1 entries to know whether another page exists, and stops there
+    page = list(islice(iter_timeline(db, player_id, start, end, sources, decode_cursor(cursor) if cursor else None), limit + 1))
+    next_cursor = encode_cursor(page[limit - 1][0]) if len(page) > limit else None
+    return {"player_id": player_id, "entries": [entry for _, entry in page[:limit]], "next_cursor": next_cursor}
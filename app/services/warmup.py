@@ -0,0 +1,110 @@
+import os
+import time
+import threading
+import traceback
+
+from app.db.session import SessionLocal
+
+# Comma-separated subset of WARMUP_STEPS to run at startup; "none" makes a worker ready immediately
+WARMUP = os.getenv("WARMUP", "all")
+
+
+def _catalog(db):
+    from app.utils.catalog import get_catalog
+    return {"matches": len(get_catalog())}
+
+
+def _event_indexes(db):
+    from app.utils.statsbomb import available_match_ids
+    from app.utils.event_index import load_index
+    match_ids = available_match_ids()
+    for match_id in match_ids:
+        load_index(match_id)
+    return {"matches": len(match_ids)}
+
+
+def _player_store(db):
+    from app.services.player_store import get_player_store
+    store = get_player_store(db)
+    return {"players": len(store), "source": store.source}
+
+
+def _contract_scores(db):
+    from app.services.contract_model import get_contract_scores
+    return {"model_version": get_contract_scores(db).model_version}
+
+
+def _availability_index(db):
+    from app.services.availability import get_availability_index
+    get_availability_index(db)
+    return {}
+
+
+def _snapshot(db):
+    from app.utils.snapshot import get_snapshot
+    snapshot = get_snapshot()
+    return {"version": snapshot.version if snapshot else None}
+
+
+# Cheapest first, so a worker that is killed early has still built the most useful caches
+WARMUP_STEPS = {
+    "catalog": _catalog,
+    "snapshot": _snapshot,
+    "player_store": _player_store,
+    "contract_scores": _contract_scores,
+    "availability_index": _availability_index,
+    "event_indexes": _event_indexes,
+}
+
+
+class Warmup:
+    # Builds indexes and caches on a background thread; the worker serves traffic meanwhile
+    # and reports ready on /ready once every step has finished (failed steps fall back to lazy builds)
+    def __init__(self, steps: list):
+        self.steps = {name: {"status": "pending"} for name in steps}
+        self.started_at = time.time()
+        self.finished_at = None
+        self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None
+
+    def start(self) -> "Warmup":
+        if self.steps:
+            self._thread.start()
+        else:
+            self.finished_at = self.started_at
+        return self
+
+    def _run(self):
+        for name in self.steps:
+            self.steps[name] = {"status": "running"}
+            started = time.perf_counter()
+            db = SessionLocal()
+            try:
+                result = WARMUP_STEPS[name](db)
+                self.steps[name] = {"status": "done", "result": result}
+            except Exception as e:
+                self.steps[name] = {"status": "failed", "error": "".join(traceback.format_exception_only(type(e), e)).strip()}
+            finally:
+                db.close()
+            self.steps[name]["seconds"] = round(time.perf_counter() - started, 3)
+        self.finished_at = time.time()
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup_seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+            "steps": dict(self.steps),
+        }
+
+
+def start_warmup(selection: str = WARMUP) -> Warmup:
+    if selection == "none":
+        steps = []
+    elif selection == "all":
+        steps = list(WARMUP_STEPS)
+    else:
+        steps = [s.strip() for s in selection.split(",") if s.strip() in WARMUP_STEPS]
+    return Warmup(steps).start()
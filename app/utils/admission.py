@@ -0,0 +1,199 @@
+import os
+import json
+import math
+import time
+import asyncio
+from collections import deque, OrderedDict
+
+# Per expensive route: how many run at once, how many may wait, and how long they may wait
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "4"))
+ADMISSION_QUEUE = int(os.getenv("ADMISSION_QUEUE", "16"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2.0"))
+# Per user across all limited routes
+USER_RATE_PER_SECOND = float(os.getenv("USER_RATE_PER_SECOND", "2"))
+USER_BURST = float(os.getenv("USER_BURST", "10"))
+MAX_TRACKED_USERS = 10000
+MAX_BODY_PEEK = 64 * 1024
+
+LIMITED_ROUTES = [
+    ("POST", "/chat/ask"),
+    ("POST", "/chat/insight"),
+    ("POST", "/chat/compare"),
+]
+
+
+class ConcurrencyLimit:
+    # A semaphore with a bounded FIFO of waiters; a released slot is handed straight to the next waiter
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def acquire(self) -> bool:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # The slot arrived just as the deadline passed; take it
+                self.admitted += 1
+                return True
+            self._waiters.remove(waiter)
+            waiter.cancel()
+            self.timed_out += 1
+            return False
+        except asyncio.CancelledError:
+            # Client went away while queued: give back a slot that was already handed over
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            raise
+        self.admitted += 1
+        return True
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.timeout))
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class TokenBuckets:
+    def __init__(self, rate: float, burst: float, max_keys: int = MAX_TRACKED_USERS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self.throttled = 0
+
+    def take(self, key: str) -> float:
+        # Returns 0 when a token was taken, otherwise seconds until one is available
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+            self.throttled += 1
+        self._buckets[key] = (tokens, now)
+        # Least recently seen users fall off first; a forgotten user simply starts with a full bucket
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+route_limits = {route: ConcurrencyLimit(ADMISSION_CONCURRENCY, ADMISSION_QUEUE, ADMISSION_QUEUE_TIMEOUT) for route in LIMITED_ROUTES}
+user_buckets = TokenBuckets(USER_RATE_PER_SECOND, USER_BURST)
+
+
+def admission_stats() -> dict:
+    return {
+        "routes": {f"{method} {path}": limit.stats() for (method, path), limit in route_limits.items()},
+        "throttled_users": user_buckets.throttled,
+    }
+
+
+async def _send_rejection(send, status: int, retry_after: int, detail: str):
+    body = json.dumps({"error": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _query_user(scope) -> str:
+    for pair in scope.get("query_string", b"").decode("latin-1").split("&"):
+        key, _, value = pair.partition("=")
+        if key == "user_id" and value:
+            return value
+    return None
+
+
+class AdmissionControl:
+    # Plain ASGI middleware so rejected requests never reach the app or take a DB connection
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limit = route_limits.get((scope["method"], scope["path"]))
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        receive, user_id = await self._identify(scope, receive)
+        wait = user_buckets.take(user_id)
+        if wait > 0:
+            return await _send_rejection(send, 429, math.ceil(wait), "Rate limit exceeded, slow down")
+
+        if not await limit.acquire():
+            return await _send_rejection(send, 503, limit.retry_after(), "Server busy, retry shortly")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
+
+    async def _identify(self, scope, receive):
+        # user_id from the X-User-Id header, the query string or the JSON body (which is then replayed)
+        headers = dict(scope.get("headers", []))
+        user_id = headers.get(b"x-user-id", b"").decode("latin-1") or _query_user(scope)
+        if user_id:
+            return receive, user_id
+
+        messages, size = [], 0
+        while True:
+            message = await receive()
+            messages.append(message)
+            size += len(message.get("body", b""))
+            if message["type"] != "http.request" or not message.get("more_body") or size > MAX_BODY_PEEK:
+                break
+        if size <= MAX_BODY_PEEK and not messages[-1].get("more_body"):
+            try:
+                user_id = json.loads(b"".join(m.get("body", b"") for m in messages) or b"{}").get("user_id")
+            except (ValueError, AttributeError):
+                user_id = None
+
+        async def replay():
+            return messages.pop(0) if messages else await receive()
+
+        client = scope.get("client") or ("unknown", 0)
+        return replay, str(user_id) if user_id and user_id != "anon" else f"ip:{client[0]}"
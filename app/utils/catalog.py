@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import bisect
+import tempfile
+import threading
+
+from app.utils.statsbomb import BASE_DIR, MATCHES_DIR, COMPETITIONS_FILE, load_json
+
+# Persisted next to the other StatsBomb sidecars: <base>/.index/catalog.json
+CATALOG_FILE = os.path.join(BASE_DIR, ".index", "catalog.json")
+CATALOG_VERSION = 1
+# Source files are stat'ed at most this often
+CHECK_SECONDS = 2.0
+
+
+def _source_files() -> dict:
+    # {path relative to BASE_DIR: (size, mtime)} for competitions.json and every matches/**/*.json
+    sources = {}
+    paths = [COMPETITIONS_FILE]
+    for root, _, files in os.walk(MATCHES_DIR):
+        paths.extend(os.path.join(root, f) for f in files if f.endswith(".json"))
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        sources[os.path.relpath(path, BASE_DIR)] = (stat.st_size, stat.st_mtime)
+    return sources
+
+
+def match_summary(match: dict) -> dict:
+    return {
+        "match_id": match["match_id"],
+        "match_date": match.get("match_date"),
+        "kick_off": match.get("kick_off"),
+        "competition_id": match.get("competition", {}).get("competition_id"),
+        "competition_name": match.get("competition", {}).get("competition_name"),
+        "season_id": match.get("season", {}).get("season_id"),
+        "season_name": match.get("season", {}).get("season_name"),
+        "competition_stage": match.get("competition_stage", {}).get("name"),
+        "home_team": {"id": match.get("home_team", {}).get("home_team_id"), "name": match.get("home_team", {}).get("home_team_name")},
+        "away_team": {"id": match.get("away_team", {}).get("away_team_id"), "name": match.get("away_team", {}).get("away_team_name")},
+        "home_score": match.get("home_score"),
+        "away_score": match.get("away_score"),
+    }
+
+
+class Catalog:
+    def __init__(self, sources: dict, built_at: float = None):
+        # sources: {relative path: {"size", "mtime", "data"}}, data being the parsed JSON file
+        self.sources = sources
+        self.built_at = built_at or time.time()
+        self.checked_at = time.monotonic()
+
+        competitions = sources.get(os.path.relpath(COMPETITIONS_FILE, BASE_DIR), {}).get("data") or []
+        self.competitions = sorted(competitions, key=lambda c: (c["competition_id"], c["season_id"]))
+
+        # Every lookup list holds match ids in (date, id) order, so a selection never needs re-sorting
+        matches = {}
+        for path in sorted(sources):
+            if path.startswith("matches"):
+                for match in sources[path]["data"] or []:
+                    matches[match["match_id"]] = match
+        self._matches = matches
+        self._order = sorted(matches, key=lambda m: (matches[m].get("match_date") or "", m))
+        self._dates = [matches[m].get("match_date") or "" for m in self._order]
+        self._by = {"competition_id": {}, "season_id": {}, "team_id": {}}
+        for match_id in self._order:
+            match = matches[match_id]
+            self._by["competition_id"].setdefault(match.get("competition", {}).get("competition_id"), []).append(match_id)
+            self._by["season_id"].setdefault(match.get("season", {}).get("season_id"), []).append(match_id)
+            for side in ("home", "away"):
+                self._by["team_id"].setdefault(match.get(f"{side}_team", {}).get(f"{side}_team_id"), []).append(match_id)
+
+    def __len__(self):
+        return len(self._matches)
+
+    def match(self, match_id: int):
+        return self._matches.get(match_id)
+
+    def match_ids(self, competition_id: int = None, season_id: int = None, team_id: int = None,
+                  date_from: str = None, date_to: str = None) -> list:
+        # Start from the narrowest applicable lookup list and check the remaining filters per match
+        filters = {k: v for k, v in (("competition_id", competition_id), ("season_id", season_id), ("team_id", team_id)) if v is not None}
+        lo = bisect.bisect_left(self._dates, date_from) if date_from else 0
+        hi = bisect.bisect_right(self._dates, date_to) if date_to else len(self._dates)
+        candidates = [(hi - lo, None)] + [(len(self._by[k].get(v, [])), k) for k, v in filters.items()]
+        _, narrowest = min(candidates, key=lambda c: c[0])
+        if narrowest is None:
+            ids = self._order[lo:hi]
+        else:
+            ids = self._by[narrowest].get(filters.pop(narrowest), [])
+        if not filters and narrowest is None:
+            return list(ids)
+
+        out = []
+        for match_id in ids:
+            match = self._matches[match_id]
+            date = match.get("match_date") or ""
+            if (date_from and date < date_from) or (date_to and date > date_to):
+                continue
+            if "competition_id" in filters and match.get("competition", {}).get("competition_id") != filters["competition_id"]:
+                continue
+            if "season_id" in filters and match.get("season", {}).get("season_id") != filters["season_id"]:
+                continue
+            if "team_id" in filters and filters["team_id"] not in (
+                match.get("home_team", {}).get("home_team_id"), match.get("away_team", {}).get("away_team_id")
+            ):
+                continue
+            out.append(match_id)
+        return out
+
+    def matches(self, **filters) -> list:
+        # Full StatsBomb match records, as ingest expects them
+        return [self._matches[m] for m in self.match_ids(**filters)]
+
+    def teams(self) -> dict:
+        names = {}
+        for match in self._matches.values():
+            for side in ("home", "away"):
+                team = match.get(f"{side}_team", {})
+                names[team.get(f"{side}_team_id")] = team.get(f"{side}_team_name")
+        return names
+
+    def info(self) -> dict:
+        return {
+            "competitions": len({c["competition_id"] for c in self.competitions}),
+            "seasons": len(self.competitions),
+            "matches": len(self._matches),
+            "teams": len(self._by["team_id"]),
+            "sources": len(self.sources),
+            "built_at": self.built_at,
+        }
+
+
+def _read_persisted() -> dict:
+    try:
+        with open(CATALOG_FILE, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if stored.get("version") != CATALOG_VERSION or stored.get("base_dir") != os.path.abspath(BASE_DIR):
+        return {}
+    return stored.get("sources", {})
+
+
+def _persist(sources: dict):
+    # Every worker persists its own catalog: each writes a temp file of its own and the last replace wins.
+    # The file only speeds up the next start, so a failed write is reported and otherwise ignored.
+    tmp = None
+    try:
+        os.makedirs(os.path.dirname(CATALOG_FILE), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(CATALOG_FILE), prefix="catalog.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": CATALOG_VERSION, "base_dir": os.path.abspath(BASE_DIR), "sources": sources}, f)
+        os.replace(tmp, CATALOG_FILE)
+    except OSError as e:
+        print(f"⚠️ Could not persist the match catalog: {e}")
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def refresh_catalog(catalog: Catalog = None, force: bool = False) -> tuple:
+    # Re-parses only source files whose size or mtime changed; returns (catalog, changed paths)
+    stored = {} if force else (catalog.sources if catalog is not None else _read_persisted())
+    current = _source_files()
+    sources, changed = {}, []
+    for path, (size, mtime) in current.items():
+        entry = stored.get(path)
+        if entry is not None and entry["size"] == size and entry["mtime"] == mtime:
+            sources[path] = entry
+        else:
+            sources[path] = {"size": size, "mtime": mtime, "data": load_json(os.path.join(BASE_DIR, path))}
+            changed.append(path)
+    removed = [path for path in stored if path not in current]
+
+    if catalog is not None and not changed and not removed:
+        catalog.checked_at = time.monotonic()
+        return catalog, []
+    if changed or removed or not os.path.exists(CATALOG_FILE):
+        _persist(sources)
+    return Catalog(sources), changed + removed
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    global _catalog
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - catalog.checked_at < CHECK_SECONDS:
+        return catalog
+    with _catalog_lock:
+        if _catalog is None or time.monotonic() - _catalog.checked_at >= CHECK_SECONDS:
+            _catalog, _ = refresh_catalog(_catalog)
+        return _catalog
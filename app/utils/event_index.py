@@ -0,0 +1,167 @@
+import os
+import json
+import mmap
+import zipfile
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.utils.statsbomb import EVENTS_DIR, event_file
+
+# Sidecar indexes live next to the event files: events/.index/<match_id>.npz
+INDEX_DIR = os.path.join(EVENTS_DIR, ".index")
+INDEX_VERSION = 1
+CACHE_SIZE = 512
+
+_decoder = json.JSONDecoder()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def index_file(match_id) -> str:
+    return os.path.join(INDEX_DIR, f"{match_id}.npz")
+
+
+def _scan(text: str):
+    # Walk the top-level array object by object, tracking byte offsets alongside
+    # character offsets (files are UTF-8, so the two drift apart on non-ASCII names)
+    char_cursor = 0
+    byte_cursor = 0
+    pos = text.index("[") + 1
+    length = len(text)
+    while True:
+        while pos < length and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= length or text[pos] == "]":
+            return
+        event, end = _decoder.raw_decode(text, pos)
+        start = byte_cursor + len(text[char_cursor:pos].encode("utf-8"))
+        size = len(text[pos:end].encode("utf-8"))
+        yield start, size, event
+        char_cursor, byte_cursor, pos = end, start + size, end
+
+
+def build_index(match_id) -> dict:
+    path = event_file(match_id)
+    stat = os.stat(path)
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    offsets, sizes, indexes, periods, type_ids, player_ids, team_ids = [], [], [], [], [], [], []
+    type_names = {}
+    for offset, size, event in _scan(text):
+        offsets.append(offset)
+        sizes.append(size)
+        indexes.append(event.get("index", 0))
+        periods.append(event.get("period", 0))
+        type_id = event.get("type", {}).get("id", -1)
+        type_ids.append(type_id)
+        type_names[type_id] = event.get("type", {}).get("name", "")
+        player_ids.append(event.get("player", {}).get("id", -1))
+        team_ids.append(event.get("team", {}).get("id", -1))
+
+    index = {
+        "version": np.array([INDEX_VERSION]),
+        "source_size": np.array([stat.st_size]),
+        "source_mtime": np.array([stat.st_mtime]),
+        "offset": np.array(offsets, dtype=np.int64),
+        "size": np.array(sizes, dtype=np.int32),
+        "index": np.array(indexes, dtype=np.int32),
+        "period": np.array(periods, dtype=np.int8),
+        "type_id": np.array(type_ids, dtype=np.int16),
+        "player_id": np.array(player_ids, dtype=np.int64),
+        "team_id": np.array(team_ids, dtype=np.int64),
+        "type_name_ids": np.array(list(type_names.keys()), dtype=np.int16),
+        "type_names": np.array(list(type_names.values()), dtype=str),
+    }
+
+    # Workers warming up together may build the same index: each writes a temp file of its own and the last
+    # replace wins. The index is already in memory, so a failed write only costs a rebuild next start.
+    tmp = None
+    try:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=INDEX_DIR, prefix=f"{match_id}.", suffix=".tmp.npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **index)
+        os.replace(tmp, index_file(match_id))
+    except OSError as e:
+        print(f"⚠️ Could not persist the event index of match {match_id}: {e}")
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+    return index
+
+
+def _is_fresh(index, stat) -> bool:
+    return (
+        int(index["version"][0]) == INDEX_VERSION
+        and int(index["source_size"][0]) == stat.st_size
+        and float(index["source_mtime"][0]) == stat.st_mtime
+    )
+
+
+def load_index(match_id):
+    try:
+        stat = os.stat(event_file(match_id))
+    except OSError:
+        return None
+
+    with _cache_lock:
+        cached = _cache.get(match_id)
+        if cached is not None and _is_fresh(cached, stat):
+            _cache.move_to_end(match_id)
+            return cached
+
+    index = None
+    try:
+        with np.load(index_file(match_id)) as stored:
+            index = {k: stored[k] for k in stored.files}
+        if not _is_fresh(index, stat):
+            index = None
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        # Missing, or unreadable (e.g. left half-written by an older build): rebuilt below
+        index = None
+    if index is None:
+        index = build_index(match_id)
+
+    with _cache_lock:
+        _cache[match_id] = index
+        _cache.move_to_end(match_id)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
+
+
+def select_rows(index: dict, player_id=None, team_id=None, type_name=None, period=None) -> np.ndarray:
+    mask = np.ones(len(index["offset"]), dtype=bool)
+    if player_id is not None:
+        mask &= index["player_id"] == player_id
+    if team_id is not None:
+        mask &= index["team_id"] == team_id
+    if period is not None:
+        mask &= index["period"] == period
+    if type_name is not None:
+        ids = index["type_name_ids"][index["type_names"] == type_name]
+        mask &= np.isin(index["type_id"], ids)
+    return np.flatnonzero(mask)
+
+
+def read_events(match_id, index: dict, rows) -> list:
+    # Only the selected byte ranges are touched; the rest of the file is never parsed
+    if len(rows) == 0:
+        return []
+    with open(event_file(match_id), "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [
+                json.loads(mm[index["offset"][r]:index["offset"][r] + index["size"][r]])
+                for r in rows
+            ]
+
+
+def query_events(match_id, player_id=None, team_id=None, type_name=None, period=None) -> list:
+    index = load_index(match_id)
+    if index is None:
+        return []
+    rows = select_rows(index, player_id=player_id, team_id=team_id, type_name=type_name, period=period)
+    return read_events(match_id, index, rows)
@@ -1,64 +1,105 @@
 import pandas as pd
 import re
-from app.db.session import SessionLocal, engine
+from datetime import datetime
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.orm import Session
+from app.db.session import SessionLocal, get_engine
 from app.db.models import Base, Team, Player
+from app.services.team_rollups import refresh_team_rollups
 
-# Create all tables (safe if already done via Alembic)
-Base.metadata.create_all(bind=engine)
-
-# Read CSV
-df = pd.read_csv("FootballPlayers.csv")
+CSV_PATH = "FootballPlayers.csv"
 
 # Clean age field to extract integer
 def extract_age(age_str):
     match = re.search(r"\d+", age_str)
     return int(match.group()) if match else None
 
-# Start DB session
-db = SessionLocal()
+# Birth date from the same field, e.g. "26 years old (25-02-1999)"
+def extract_birth_date(age_str):
+    match = re.search(r"\((\d{2}-\d{2}-\d{4})\)", str(age_str))
+    try:
+        return datetime.strptime(match.group(1), "%d-%m-%Y").date() if match else None
+    except ValueError:
+        return None
+
+def ingest_csv(db: Session, csv_path: str = CSV_PATH, progress=None):
+    # Read CSV
+    df = pd.read_csv(csv_path)
+
+    # Iterate over each player
+    team_ids = set()
+    for i, (_, row) in enumerate(df.iterrows(), start=1):
+        team_name = row["Current Team"]
+
+        # Check if team already exists in DB
+        existing_team = db.query(Team).filter_by(name=team_name).first()
+
+        if existing_team:
+            team = existing_team
+        else:
+            team = Team(name=team_name)
+            db.add(team)
+            db.commit()
+            db.refresh(team)
+
+        # Create Player record
+        player = Player(
+            name=row["Name"],
+            age=extract_age(row["Age"]),
+            birth_date=extract_birth_date(row["Age"]),
+            nationality=row["Nationality"],
+            position=row["PositionsSummary"],
+            appearances=row["Apps"],
+            minutes=row["Mins"],
+            goals=row["Goals"],
+            assists=row["Assists"],
+            yellow_cards=row["Yel"],
+            red_cards=row["Red"],
+            shots_per_game=row["SpG"],
+            pass_success=row["PS%"],
+            aerials_won=row["AerialsWon"],
+            motm=row["MotM"],
+            rating=row["Rating"],
+            team_id=team.id
+        )
 
-# Track added teams to avoid duplicates
-team_cache = {}
+        db.add(player)
+        team_ids.add(team.id)
+        if progress and i % 100 == 0:
+            progress(i / len(df), f"Ingested {i} players")
 
-# Iterate over each player
-for _, row in df.iterrows():
-    team_name = row["Current Team"]
-    
-    # Check if team already exists in DB
-    existing_team = db.query(Team).filter_by(name=team_name).first()
+    # Commit all changes
+    refresh_team_rollups(db, team_ids)
+    db.commit()
+    return {"players": len(df)}
 
-    if existing_team:
-        team = existing_team
-    else:
-        team = Team(name=team_name)
-        db.add(team)
-        db.commit()
-        db.refresh(team)
+def backfill_birth_dates(db: Session, csv_path: str = CSV_PATH) -> int:
+    # Rows imported before birth_date existed, matched back to the CSV by name and team
+    df = pd.read_csv(csv_path)
+    teams = dict(db.execute(select(Team.name, Team.id)).all())
+    rows = [
+        {"p_name": row["Name"], "p_team_id": teams.get(row["Current Team"]), "p_birth_date": extract_birth_date(row["Age"])}
+        for _, row in df.iterrows()
+    ]
+    rows = [r for r in rows if r["p_birth_date"] and r["p_team_id"]]
+    if rows:
+        db.execute(
+            update(Player.__table__)
+            .where(Player.__table__.c.name == bindparam("p_name"), Player.__table__.c.team_id == bindparam("p_team_id"),
+                   Player.__table__.c.birth_date.is_(None))
+            .values(birth_date=bindparam("p_birth_date")),
+            rows,
+        )
+    db.commit()
+    return len(rows)
 
-    # Create Player record
-    player = Player(
-        name=row["Name"],
-        age=extract_age(row["Age"]),
-        nationality=row["Nationality"],
-        position=row["PositionsSummary"],
-        appearances=row["Apps"],
-        minutes=row["Mins"],
-        goals=row["Goals"],
-        assists=row["Assists"],
-        yellow_cards=row["Yel"],
-        red_cards=row["Red"],
-        shots_per_game=row["SpG"],
-        pass_success=row["PS%"],
-        aerials_won=row["AerialsWon"],
-        motm=row["MotM"],
-        rating=row["Rating"],
-        team_id=team.id
-    )
-    
-    db.add(player)
+if __name__ == "__main__":
+    # Create all tables (safe if already done via Alembic)
+    Base.metadata.create_all(bind=get_engine())
 
-# Commit all changes
-db.commit()
-db.close()
+    # Start DB session
+    db = SessionLocal()
+    ingest_csv(db)
+    db.close()
 
-print("✅ Data successfully ingested from CSV.")
\ No newline at end of file
+    print("✅ Data successfully ingested from CSV.")
@@ -0,0 +1,302 @@
+import os
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import select, update, delete, case, bindparam, func
+from sqlalchemy.orm import Session
+from app.db.models import Team, Player, MatchStat, PlayerMatchMinutes
+from app.db.upsert import insert_for
+from app.utils.statsbomb import EVENTS_DIR, load_json, lineup_file, new_player_stats, apply_event, pass_accuracy
+from app.utils.event_index import query_events
+from app.utils.catalog import get_catalog
+from app.services.team_rollups import refresh_team_rollups
+
+# Match clock at the start of each period (index = period; 5 is the shoot-out)
+PERIOD_START = np.array([0, 0, 45, 90, 105, 120], dtype=np.float64) * 60
+DEFAULT_PERIOD_LENGTH = np.array([0, 45, 45, 15, 15, 0], dtype=np.float64) * 60
+
+
+def upsert_teams(db: Session, teams: dict) -> dict:
+    # teams: {statsbomb_team_id: name} -> {statsbomb_team_id: teams.id}
+    if not teams:
+        return {}
+    # Teams created by name before natural keys existed (or by the CSV import) are adopted, not duplicated
+    known = set(db.scalars(select(Team.statsbomb_id).where(Team.statsbomb_id.in_(list(teams)))))
+    adopt = {name: sb_id for sb_id, name in teams.items() if sb_id not in known}
+    if adopt:
+        db.execute(
+            update(Team)
+            .where(Team.name.in_(list(adopt)), Team.statsbomb_id.is_(None))
+            .values(statsbomb_id=case(adopt, value=Team.name))
+            .execution_options(synchronize_session=False)
+        )
+    stmt = insert_for(db)(Team.__table__)
+    db.execute(
+        stmt.on_conflict_do_update(index_elements=[Team.__table__.c.statsbomb_id],
+                                   set_={"name": stmt.excluded.name, "row_version": Team.__table__.c.row_version + 1}),
+        [{"statsbomb_id": sb_id, "name": name} for sb_id, name in teams.items()],
+    )
+    return dict(db.execute(select(Team.statsbomb_id, Team.id).where(Team.statsbomb_id.in_(list(teams)))).all())
+
+
+def upsert_players(db: Session, players: dict) -> dict:
+    # players: {statsbomb_player_id: {"name", "nickname", "team_id"[, "nationality", "birth_date"]}} -> {statsbomb_player_id: players.id}
+    if not players:
+        return {}
+    # Rows ingested by (name, team) before natural keys existed get their StatsBomb id attached
+    known = set(db.scalars(select(Player.statsbomb_id).where(Player.statsbomb_id.in_(list(players)))))
+    wanted = {(p["name"], p["team_id"]): sb_id for sb_id, p in players.items() if sb_id not in known}
+    legacy = db.execute(
+        select(Player.id, Player.name, Player.team_id)
+        .where(Player.statsbomb_id.is_(None), Player.name.in_({name for name, _ in wanted}))
+        .order_by(Player.id)
+    ).all()
+    adopt = {}
+    for r in legacy:
+        # The oldest row wins if earlier ingests left duplicates behind
+        if (r.name, r.team_id) in wanted:
+            adopt.setdefault(wanted.pop((r.name, r.team_id)), r.id)
+    adopt = [{"pid": pid, "sb_id": sb_id} for sb_id, pid in adopt.items()]
+    if adopt:
+        db.execute(
+            update(Player.__table__).where(Player.__table__.c.id == bindparam("pid")).values(statsbomb_id=bindparam("sb_id")),
+            adopt,
+        )
+
+    stmt = insert_for(db)(Player.__table__)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Player.__table__.c.statsbomb_id],
+            set_={
+                "name": stmt.excluded.name,
+                "team_id": stmt.excluded.team_id,
+                # Only lineups carry these; event-only upserts leave what is already stored
+                "nickname": func.coalesce(stmt.excluded.nickname, Player.__table__.c.nickname),
+                "nationality": func.coalesce(stmt.excluded.nationality, Player.__table__.c.nationality),
+                "birth_date": func.coalesce(stmt.excluded.birth_date, Player.__table__.c.birth_date),
+                # ON CONFLICT updates skip onupdate defaults
+                "row_version": Player.__table__.c.row_version + 1,
+            },
+        ),
+        [{"statsbomb_id": sb_id, **p} for sb_id, p in players.items()],
+    )
+    return dict(db.execute(select(Player.statsbomb_id, Player.id).where(Player.statsbomb_id.in_(list(players)))).all())
+
+
+def current_teams(db: Session, statsbomb_player_ids) -> set:
+    # Teams these players belong to before an upsert, so rollups of teams they leave are refreshed too
+    return set(db.scalars(select(Player.team_id).where(Player.statsbomb_id.in_(list(statsbomb_player_ids))).distinct()))
+
+
+def get_team(statsbomb_id, name, db: Session):
+    return db.get(Team, upsert_teams(db, {statsbomb_id: name})[statsbomb_id])
+
+
+def get_player(statsbomb_id, name, team_id, db: Session, nickname=None):
+    player_ids = upsert_players(db, {statsbomb_id: {"name": name, "nickname": nickname, "team_id": team_id}})
+    return db.get(Player, player_ids[statsbomb_id])
+
+
+def ingest_match(match, db: Session):
+    match_id = match["match_id"]
+    match_date = datetime.strptime(match["match_date"], "%Y-%m-%d").date()
+
+    home_team_name = match["home_team"]["home_team_name"]
+    away_team_name = match["away_team"]["away_team_name"]
+
+    event_file = os.path.join(EVENTS_DIR, f"{match_id}.json")
+    if not os.path.exists(event_file):
+        print(f"⚠️ Skipping match {match_id} — event file missing.")
+        return
+
+    print(f"📥 Ingesting Match {match_id}: {home_team_name} vs {away_team_name}")
+    events = [
+        e for e in load_json(event_file)
+        if e.get("type", {}).get("name") in ("Pass", "Shot") and e.get("player")
+    ]
+
+    # Resolve every team and player in the match with two bulk upserts instead of a lookup per event
+    teams = {e["team"]["id"]: e["team"]["name"] for e in events}
+    team_ids = upsert_teams(db, teams)
+    previous_teams = current_teams(db, {e["player"]["id"] for e in events})
+    player_ids = upsert_players(db, {
+        e["player"]["id"]: {"name": e["player"]["name"], "nickname": None, "team_id": team_ids[e["team"]["id"]]}
+        for e in events
+    })
+
+    player_stats = {}
+    for event in events:
+        stats = player_stats.setdefault(player_ids[event["player"]["id"]], new_player_stats())
+        apply_event(stats, event)
+
+    # match_stats has no match id; a player's row for this date is this match's, so a re-run (job retry,
+    # recovered job, re-submission) replaces the rows an earlier run committed instead of adding to them
+    db.execute(delete(MatchStat).where(MatchStat.player_id.in_(list(player_stats)), MatchStat.match_date == match_date))
+    for player_id, stats in player_stats.items():
+        match_stat = MatchStat(
+            player_id=player_id,
+            match_date=match_date,
+            goals=stats["goals"],
+            assists=stats["assists"],
+            pass_accuracy=pass_accuracy(stats)
+        )
+        db.add(match_stat)
+
+    refresh_team_rollups(db, previous_teams | set(team_ids.values()))
+    db.commit()
+    print(f"✅ Match {match_id} committed.")
+
+
+def _clock_seconds(clock: str) -> float:
+    minutes, seconds = clock.split(":")
+    return int(minutes) * 60 + int(seconds)
+
+
+def _period_ends(match_id) -> np.ndarray:
+    # Match clock at which each period ended, read from the "Half End" events via the sidecar index;
+    # nan marks a period that wasn't played. Without event data a regulation 90 minutes is assumed.
+    ends = np.full(len(PERIOD_START), np.nan)
+    for event in query_events(match_id, type_name="Half End"):
+        period = event.get("period", 0)
+        if 1 <= period <= 4:
+            ends[period] = np.fmax(ends[period], event["minute"] * 60 + event["second"])
+    if np.isnan(ends[1:3]).all():
+        ends[1:3] = PERIOD_START[1:3] + DEFAULT_PERIOD_LENGTH[1:3]
+    return ends
+
+
+def playing_time(intervals: dict, period_ends: np.ndarray) -> tuple:
+    # intervals: equal-length arrays match_idx, from_clock, from_period, to_clock (nan = final whistle),
+    # to_period (0 = final whistle); period_ends: (n_matches, 6) clock at the end of each period, nan if not played
+    played = ~np.isnan(period_ends)
+    ends = np.where(played, period_ends, PERIOD_START)
+    lengths = (ends - PERIOD_START).clip(min=0)
+    # Playing time elapsed before each period starts, per match; shoot-outs add nothing
+    elapsed_before = np.concatenate([np.zeros((len(lengths), 1)), np.cumsum(lengths[:, :-1], axis=1)], axis=1)
+    last_period = np.where(played[:, 1:5], np.arange(1, 5), 1).max(axis=1)
+
+    m = intervals["match_idx"]
+    from_period = np.clip(intervals["from_period"], 1, 5)
+    to_period = np.where(intervals["to_period"] > 0, intervals["to_period"], last_period[m]).clip(1, 5)
+    to_clock = np.where(np.isnan(intervals["to_clock"]), ends[m, to_period], intervals["to_clock"])
+
+    def elapsed(clock, period):
+        return elapsed_before[m, period] + np.clip(clock - PERIOD_START[period], 0, lengths[m, period])
+
+    # Minutes of playing time at which each interval starts and ends
+    return elapsed(intervals["from_clock"], from_period) / 60, elapsed(to_clock, to_period) / 60
+
+
+def ingest_lineups(db: Session, matches: list = None, progress=None):
+    matches = list_matches() if matches is None else matches
+    matches = [m for m in sorted(matches, key=lambda m: m["match_date"]) if os.path.exists(lineup_file(m["match_id"]))]
+
+    # One pass over every lineup file: rosters, then flat interval arrays for the vectorized minutes
+    teams, players, roster = {}, {}, []
+    cols = {k: [] for k in ("match_idx", "player", "from_clock", "from_period", "to_clock", "to_period", "started", "position")}
+    period_ends = np.empty((len(matches), 6))
+    for i, match in enumerate(matches):
+        period_ends[i] = _period_ends(match["match_id"])
+        for team in load_json(lineup_file(match["match_id"])):
+            teams[team["team_id"]] = team["team_name"]
+            for p in team["lineup"]:
+                # Matches are read oldest first, so a player's latest team wins
+                players[p["player_id"]] = {"name": p["player_name"], "nickname": p.get("player_nickname"), "team": team["team_id"],
+                                           "nationality": (p.get("country") or {}).get("name"), "birth_date": p.get("birth_date")}
+                roster.append((i, p["player_id"], team["team_id"]))
+                for pos in p.get("positions", []):
+                    cols["match_idx"].append(i)
+                    cols["player"].append(p["player_id"])
+                    cols["from_clock"].append(_clock_seconds(pos["from"]))
+                    cols["from_period"].append(pos.get("from_period") or 1)
+                    cols["to_clock"].append(_clock_seconds(pos["to"]) if pos.get("to") else np.nan)
+                    cols["to_period"].append(pos.get("to_period") or (pos.get("from_period") or 1 if pos.get("to") else 0))
+                    cols["started"].append(pos.get("start_reason") == "Starting XI")
+                    cols["position"].append(pos.get("position"))
+        if progress:
+            progress(0.5 * (i + 1) / max(len(matches), 1), f"Read lineups for match {match['match_id']}")
+
+    team_ids = upsert_teams(db, teams)
+    previous_teams = current_teams(db, players)
+    player_ids = upsert_players(db, {
+        sb_id: {"name": p["name"], "nickname": p["nickname"], "team_id": team_ids[p["team"]], "nationality": p["nationality"],
+                "birth_date": datetime.strptime(p["birth_date"], "%Y-%m-%d").date() if p["birth_date"] else None}
+        for sb_id, p in players.items()
+    })
+
+    intervals = {
+        "match_idx": np.array(cols["match_idx"], dtype=np.int64),
+        "from_clock": np.array(cols["from_clock"], dtype=np.float64),
+        "from_period": np.array(cols["from_period"], dtype=np.int64),
+        "to_clock": np.array(cols["to_clock"], dtype=np.float64),
+        "to_period": np.array(cols["to_period"], dtype=np.int64),
+    }
+    start, end = playing_time(intervals, period_ends) if len(intervals["match_idx"]) else (np.zeros(0), np.zeros(0))
+
+    # Group intervals per (match, player), ordered by start within each group
+    stride = max(players, default=0) + 1
+    interval_keys = intervals["match_idx"] * stride + np.array(cols["player"], dtype=np.int64)
+    keys, inverse = np.unique(interval_keys, return_inverse=True)
+    by_start = np.lexsort((start, inverse))
+    # Tactical shifts can overlap the interval they replace: count only time not already covered earlier in
+    # the group. Groups are offset so one running maximum over the whole array never leaks across them.
+    offset = inverse[by_start] * (end.max(initial=0) + 1)
+    covered = np.maximum.accumulate(end[by_start] + offset) - offset
+    covered = np.r_[-np.inf, covered[:-1]] if len(covered) else covered
+    group_start = np.r_[True, inverse[by_start][1:] != inverse[by_start][:-1]] if len(by_start) else by_start.astype(bool)
+    covered[group_start] = -np.inf
+    minutes = np.empty_like(start)
+    minutes[by_start] = np.clip(end[by_start] - np.maximum(start[by_start], covered), 0, None)
+
+    # Sum per (match, player); the longest interval's position is the player's position for the match
+    total = np.bincount(inverse, weights=minutes, minlength=len(keys))
+    started = np.bincount(inverse, weights=np.array(cols["started"], dtype=np.float64), minlength=len(keys)) > 0
+    order = np.lexsort((-minutes, inverse))
+    first = order[np.r_[True, inverse[order][1:] != inverse[order][:-1]]] if len(order) else order
+    position = np.array(cols["position"], dtype=object)[first]
+
+    rows = []
+    for match_idx, sb_player, sb_team in roster:
+        k = np.searchsorted(keys, match_idx * stride + sb_player)
+        played = k < len(keys) and keys[k] == match_idx * stride + sb_player
+        match = matches[match_idx]
+        rows.append({
+            "match_id": match["match_id"],
+            "player_id": player_ids[sb_player],
+            "team_id": team_ids[sb_team],
+            "match_date": datetime.strptime(match["match_date"], "%Y-%m-%d").date(),
+            "started": bool(started[k]) if played else False,
+            "minutes_played": round(float(total[k]), 2) if played else 0.0,
+            "position": position[k] if played else None,
+        })
+
+    if rows:
+        table = PlayerMatchMinutes.__table__
+        stmt = insert_for(db)(table)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.match_id, table.c.player_id],
+                set_={c: stmt.excluded[c] for c in ("team_id", "match_date", "started", "minutes_played", "position")},
+            ),
+            rows,
+        )
+    refresh_team_rollups(db, previous_teams | set(team_ids.values()))
+    db.commit()
+    if progress:
+        progress(1.0, f"Loaded lineups for {len(matches)} matches")
+    return {"matches": len(matches), "players": len(players), "appearances": len(rows)}
+
+
+def list_matches(competition_id: int = None, season_id: int = None) -> list:
+    # Served from the match catalog; only match files that changed since the last call are re-read
+    return get_catalog().matches(competition_id=competition_id, season_id=season_id)
+
+
+def ingest_all(db: Session, matches: list = None, progress=None):
+    matches = list_matches() if matches is None else matches
+    for i, match in enumerate(matches, start=1):
+        ingest_match(match, db)
+        if progress:
+            progress(0.9 * i / len(matches), f"Ingested match {match['match_id']}")
+    lineups = ingest_lineups(db, matches)
+    return {"matches": len(matches), "appearances": lineups["appearances"]}
@@ -3,6 +3,7 @@ import random
 
 from app.db.session import SessionLocal
 from app.db.models import Player, StatusInterval, FactBiometricMinute
+from app.services.biometric_rollups import record_biometrics
 
 db = SessionLocal()
 
@@ -36,6 +37,7 @@ for player in players:
 # --------------------------
 # Insert into fact_biometric_minute
 # --------------------------
+readings = []
 for player in players:
     for i in range(5):  # 5 biometric entries per player
         data = FactBiometricMinute(
@@ -48,7 +50,10 @@ for player in players:
             sprint_count=random.randint(5, 20),
             minutes_played=random.uniform(70, 90),
         )
-        db.add(data)
+        readings.append(data)
+
+# Raw rows and their 5min/hour/day rollups are written together
+record_biometrics(db, readings)
 
 db.commit()
 db.close()
@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event, inspect, text
+
+SNAPSHOT_DIR = os.getenv("QUERY_PLAN_DIR", "data/query_plans")
+
+_sqlite_step = re.compile(r"^(SCAN|SEARCH) (?:TABLE )?(\w+)(?: USING (.*?))?(?: \(.*\))?$")
+_select_list_tokens = re.compile(r"\(|\)|\bSELECT\b|\bFROM\b")
+
+
+@contextmanager
+def capture_sql(engine, selects_only: bool = True):
+    # Records (statement, parameters) exactly as handed to the DB driver, so they can be EXPLAINed verbatim
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if executemany or (selects_only and not statement.lstrip().upper().startswith(("SELECT", "WITH"))):
+            return
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def table_rows(engine) -> dict:
+    with engine.connect() as conn:
+        return {t: conn.execute(text(f'SELECT count(*) FROM "{t}"')).scalar() for t in inspect(engine).get_table_names()}
+
+
+# -------------------------
+# EXPLAIN, normalized across dialects
+# -------------------------
+
+def _walk_postgres(node: dict, plan: dict):
+    relation, index = node.get("Relation Name"), node.get("Index Name")
+    node_type = node["Node Type"]
+    plan["operations"].append({"op": node_type, "table": relation, "index": index})
+    if node_type == "Seq Scan":
+        plan["full_scans"].append(relation)
+    if index:
+        plan["indexes"].append(index)
+    if node_type == "Sort":
+        plan["sorts"] += 1
+    if relation:
+        # Rows read from the relation: returned plus discarded by the filter, per loop
+        loops = node.get("Actual Loops", 1) or 1
+        plan["rows_scanned"] += (node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)
+                                 + node.get("Rows Removed by Index Recheck", 0)) * loops
+    for child in node.get("Plans", []):
+        _walk_postgres(child, plan)
+
+
+def _explain_postgres(conn, statement: str, parameters, analyze: bool) -> dict:
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    raw = conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters).scalar()
+    root = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+    plan = {"operations": [], "full_scans": [], "indexes": [], "sorts": 0, "rows_scanned": 0,
+            "cost": root["Plan"]["Total Cost"], "time_ms": root.get("Execution Time")}
+    _walk_postgres(root["Plan"], plan)
+    if not analyze:
+        plan["rows_scanned"] = None
+    return plan
+
+
+def _explain_sqlite(conn, statement: str, parameters, analyze: bool, rows: dict) -> dict:
+    details = [r[3] for r in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()]
+    plan = {"operations": [], "full_scans": [], "indexes": [], "sorts": 0, "rows_scanned": 0, "cost": None, "time_ms": None}
+    for detail in details:
+        step = _sqlite_step.match(detail)
+        if step:
+            op, table, using = step.groups()
+            index = using.rsplit(" ", 1)[-1] if using and "INDEX" in using else (using or None)
+            plan["operations"].append({"op": op, "table": table, "index": index})
+            if index:
+                plan["indexes"].append(index)
+            elif op == "SCAN" and (not rows or table in rows):
+                # Only unindexed scans of real tables (not subqueries) have a known cost: every row
+                plan["full_scans"].append(table)
+                plan["rows_scanned"] += rows.get(table, 0)
+        elif "TEMP B-TREE" in detail:
+            plan["operations"].append({"op": detail, "table": None, "index": None})
+            plan["sorts"] += 1
+    if analyze:
+        # SQLite has no EXPLAIN ANALYZE: time one real execution instead
+        started = time.perf_counter()
+        conn.exec_driver_sql(statement, parameters).fetchall()
+        plan["time_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return plan
+
+
+def explain(engine, statement: str, parameters, analyze: bool = True, rows: dict = None) -> dict:
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            plan = _explain_postgres(conn, statement, parameters, analyze)
+        else:
+            plan = _explain_sqlite(conn, statement, parameters, analyze, rows or {})
+        conn.rollback()
+    plan["sql"] = " ".join(statement.split())
+    return plan
+
+
+# -------------------------
+# Assertions and snapshots
+# -------------------------
+
+def check_plan(plan: dict, allow_full_scan=(), max_rows_scanned: int = None, max_cost: float = None,
+               require_index: str = None) -> list:
+    # Returns human-readable violations; an empty list means the plan is acceptable
+    violations = []
+    for table in plan["full_scans"]:
+        if table not in allow_full_scan:
+            violations.append(f"sequential scan on {table}")
+    if max_rows_scanned is not None and plan["rows_scanned"] is not None and plan["rows_scanned"] > max_rows_scanned:
+        violations.append(f"scanned {plan['rows_scanned']} rows (limit {max_rows_scanned})")
+    if max_cost is not None and plan["cost"] is not None and plan["cost"] > max_cost:
+        violations.append(f"estimated cost {plan['cost']:.1f} (limit {max_cost})")
+    if require_index and require_index not in plan["indexes"]:
+        violations.append(f"expected index {require_index}, used {sorted(set(plan['indexes'])) or 'none'}")
+    return violations
+
+
+def plan_shape(plan: dict) -> list:
+    # The stable part of a plan: which operations touch which tables through which indexes
+    return [[o["op"], o["table"], o["index"]] for o in plan["operations"]]
+
+
+def snapshot_path(dialect: str, scenario: str, directory: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(directory, dialect, f"{scenario}.json")
+
+
+def load_snapshot(dialect: str, scenario: str, directory: str = SNAPSHOT_DIR):
+    try:
+        with open(snapshot_path(dialect, scenario, directory), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_snapshot(dialect: str, scenario: str, plans: list, directory: str = SNAPSHOT_DIR):
+    path = snapshot_path(dialect, scenario, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    stored = [{"sql": p["sql"], "shape": plan_shape(p), "rows_scanned": p["rows_scanned"], "cost": p["cost"]} for p in plans]
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(stored, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def statement_key(sql: str) -> str:
+    # The SQL with every select list (nested ones included) collapsed to "...", so a column added to a
+    # model doesn't turn the queries that load it into "new" ones; FROM, WHERE, ORDER BY etc. still count
+    out, pos, depth, skip_depth = [], 0, 0, None
+    for m in _select_list_tokens.finditer(sql):
+        token = m.group()
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif token == "SELECT" and skip_depth is None:
+            out.append(sql[pos:m.end()] + " ... ")
+            pos, skip_depth = m.end(), depth
+        elif token == "FROM" and depth == skip_depth:
+            pos, skip_depth = m.start(), None
+    if skip_depth is not None:
+        # A SELECT without FROM keeps its list: there is nothing else to compare
+        out[-1] = out[-1][:-len(" ... ")]
+    out.append(sql[pos:])
+    return " ".join("".join(out).split())
+
+
+def diff_snapshot(snapshot: list, plans: list) -> list:
+    # Plan shapes that differ from the saved snapshot, matched in order by normalized statement
+    saved = {}
+    for s in snapshot:
+        saved.setdefault(statement_key(s["sql"]), []).append(s["shape"])
+    changes = []
+    for plan in plans:
+        shapes = saved.get(statement_key(plan["sql"]))
+        shape = shapes.pop(0) if shapes else None
+        if shape is None:
+            changes.append(f"new query: {plan['sql'][:120]}")
+        elif shape != plan_shape(plan):
+            changes.append(f"plan changed from {shape} to {plan_shape(plan)}: {plan['sql'][:120]}")
+    return changes
@@ -0,0 +1,337 @@
+import os
+import json
+import mmap
+import time
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Player, Team, MatchStat, BiometricRollup
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshots")
+CURRENT_FILE = "CURRENT"
+MAGIC = b"FASNAP02"
+ALIGN = 64
+KEEP_SNAPSHOTS = 3
+# Workers stat the CURRENT pointer at most this often
+CHECK_SECONDS = 2.0
+WORKLOAD_DAYS = 28
+
+# Same layout as the in-process player store, so it can use the mapped arrays as they are:
+# counts as int32 with a NULL sentinel, rates and ratings as float64 with NaN
+NULL_INT = np.iinfo(np.int32).min
+PLAYER_NUMERIC = [
+    ("team_id", "<i4"), ("age", "<i4"), ("appearances", "<i4"), ("minutes", "<i4"), ("goals", "<i4"),
+    ("assists", "<i4"), ("yellow_cards", "<i4"), ("red_cards", "<i4"), ("shots_per_game", "<f8"),
+    ("pass_success", "<f8"), ("aerials_won", "<f8"), ("motm", "<i4"), ("rating", "<f8"),
+]
+PLAYER_STRINGS = ["name", "nationality", "position"]
+# Per-player aggregates stored next to the player columns; workload covers the WORKLOAD_DAYS before built_at
+PLAYER_AGGREGATES = ["matches", "match_goals", "match_assists", "avg_pass_accuracy", "last_match_day",
+                     "workload_samples", "sprints", "avg_hrv"]
+
+
+# -------------------------
+# Writing
+# -------------------------
+
+def encode_strings(values) -> tuple:
+    encoded = [(v or "").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+class _Writer:
+    def __init__(self):
+        self.blocks = []
+        self.size = 0
+
+    def add(self, array: np.ndarray) -> dict:
+        array = np.ascontiguousarray(array)
+        self.size += -self.size % ALIGN
+        entry = {"dtype": array.dtype.str, "offset": self.size, "length": int(array.shape[0])}
+        self.blocks.append((self.size, array))
+        self.size += array.nbytes
+        return entry
+
+    def write(self, path: str, header: dict):
+        header_bytes = json.dumps(header).encode("utf-8")
+        # Data offsets in the header are relative to the first aligned byte after it
+        start = len(MAGIC) + 8 + len(header_bytes)
+        start += -start % ALIGN
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.uint64(len(header_bytes)).tobytes())
+            f.write(header_bytes)
+            for offset, array in self.blocks:
+                f.seek(start + offset)
+                f.write(array.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def player_aggregates(db: Session, ids: np.ndarray, as_of: datetime, restrict: bool = False) -> dict:
+    # ids sorted ascending; restrict=True reads only those players' rows (a handful, not the whole table)
+    n = len(ids)
+    out = {name: np.zeros(n) for name in ("matches", "match_goals", "match_assists", "workload_samples", "sprints")}
+    out["avg_pass_accuracy"] = np.full(n, np.nan)
+    out["avg_hrv"] = np.full(n, np.nan)
+    out["last_match_day"] = np.full(n, -1, dtype="<i4")
+
+    def place(player_ids):
+        idx = np.minimum(np.searchsorted(ids, player_ids), max(n - 1, 0))
+        ok = ids[idx] == player_ids if n else np.zeros(len(player_ids), dtype=bool)
+        return idx, ok
+
+    stats = select(MatchStat.player_id, func.count(MatchStat.id), func.sum(MatchStat.goals),
+                   func.sum(MatchStat.assists), func.avg(MatchStat.pass_accuracy), func.max(MatchStat.match_date))
+    if restrict:
+        stats = stats.where(MatchStat.player_id.in_(ids.tolist()))
+    stats = db.execute(stats.group_by(MatchStat.player_id)).all()
+    if stats:
+        pid = np.array([r[0] for r in stats], dtype=np.int64)
+        idx, ok = place(pid)
+        epoch = date(1970, 1, 1)
+        for name, col in (("matches", 1), ("match_goals", 2), ("match_assists", 3), ("avg_pass_accuracy", 4)):
+            out[name][idx[ok]] = np.array([r[col] if r[col] is not None else np.nan for r in stats], dtype=np.float64)[ok]
+        out["last_match_day"][idx[ok]] = np.array(
+            [(_as_date(r[5]) - epoch).days if r[5] else -1 for r in stats], dtype="<i4")[ok]
+
+    workload = (
+        select(BiometricRollup.player_id, func.sum(BiometricRollup.samples),
+               func.sum(BiometricRollup.sprint_count_sum), func.sum(BiometricRollup.hrv_sum), func.sum(BiometricRollup.hrv_samples))
+        .where(BiometricRollup.resolution == "day", BiometricRollup.bucket_start >= as_of - timedelta(days=WORKLOAD_DAYS))
+    )
+    if restrict:
+        workload = workload.where(BiometricRollup.player_id.in_(ids.tolist()))
+    workload = db.execute(workload.group_by(BiometricRollup.player_id)).all()
+    if workload:
+        pid = np.array([r[0] for r in workload], dtype=np.int64)
+        idx, ok = place(pid)
+        samples = np.array([r[1] or 0 for r in workload], dtype=np.float64)
+        out["workload_samples"][idx[ok]] = samples[ok]
+        out["sprints"][idx[ok]] = np.array([r[2] or 0 for r in workload], dtype=np.float64)[ok]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            hrv_samples = np.array([r[4] or 0 for r in workload], dtype=np.float64)
+            hrv = np.array([r[3] or 0.0 for r in workload], dtype=np.float64) / hrv_samples
+        out["avg_hrv"][idx[ok]] = np.where(hrv_samples > 0, hrv, np.nan)[ok]
+    return out
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) and not isinstance(value, datetime) else date.fromisoformat(str(value)[:10])
+
+
+def build_snapshot(db: Session, directory: str = SNAPSHOT_DIR) -> dict:
+    from app.services.player_store import players_version
+    as_of = datetime.now(timezone.utc)
+    writer = _Writer()
+    tables = {}
+    data_version = players_version(db)
+
+    players = db.execute(
+        select(Player.id, *[getattr(Player, name) for name, _ in PLAYER_NUMERIC], *[getattr(Player, s) for s in PLAYER_STRINGS])
+        .order_by(Player.id)
+    ).all()
+    columns = list(zip(*players)) if players else [()] * (1 + len(PLAYER_NUMERIC) + len(PLAYER_STRINGS))
+    ids = np.array(columns[0], dtype="<i8")
+    player_columns = {"id": writer.add(ids)}
+    for (name, dtype), values in zip(PLAYER_NUMERIC, columns[1:]):
+        missing = NULL_INT if dtype == "<i4" else np.nan
+        player_columns[name] = writer.add(np.array([missing if v is None else v for v in values], dtype=dtype))
+    for name, values in zip(PLAYER_STRINGS, columns[1 + len(PLAYER_NUMERIC):]):
+        offsets, data = encode_strings(values)
+        player_columns[name] = {"strings": {"offsets": writer.add(offsets), "data": writer.add(data)}}
+    for name, array in player_aggregates(db, ids, as_of).items():
+        player_columns[name] = writer.add(array)
+    tables["players"] = {"rows": len(ids), "columns": player_columns}
+
+    teams = db.execute(select(Team.id, Team.name).order_by(Team.id)).all()
+    offsets, data = encode_strings([t.name for t in teams])
+    tables["teams"] = {"rows": len(teams), "columns": {
+        "id": writer.add(np.array([t.id for t in teams], dtype="<i8")),
+        "name": {"strings": {"offsets": writer.add(offsets), "data": writer.add(data)}},
+    }}
+
+    # The player store maps the snapshot only while the players table still has the version read here;
+    # a write that landed while the rows were read leaves the snapshot without one
+    if players_version(db) != data_version:
+        data_version = None
+
+    # Versions only ever increase, so a worker can tell newer from older without reading the file
+    version = max(time.time_ns() // 1_000_000, _current_version(directory) + 1)
+    os.makedirs(directory, exist_ok=True)
+    name = f"snapshot-{version}.fasnap"
+    header = {"version": version, "built_at": as_of.isoformat(), "players_version": data_version, "tables": tables}
+    writer.write(os.path.join(directory, name + ".tmp"), header)
+    os.replace(os.path.join(directory, name + ".tmp"), os.path.join(directory, name))
+
+    # Atomic pointer swap: readers see either the old or the new CURRENT, never a partial file
+    pointer_tmp = os.path.join(directory, CURRENT_FILE + ".tmp")
+    with open(pointer_tmp, "w") as f:
+        f.write(name)
+    os.replace(pointer_tmp, os.path.join(directory, CURRENT_FILE))
+
+    _prune(directory, keep=name)
+    return {"version": version, "path": os.path.join(directory, name),
+            "players": len(ids), "teams": len(teams), "bytes": os.path.getsize(os.path.join(directory, name))}
+
+
+def _current_version(directory: str) -> int:
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return int(f.read().strip()[len("snapshot-"):-len(".fasnap")])
+    except (OSError, ValueError):
+        return 0
+
+
+def _prune(directory: str, keep: str):
+    # Unlinking a file another worker still has mapped is safe; its pages live until unmapped
+    snapshots = sorted(
+        (f for f in os.listdir(directory) if f.startswith("snapshot-") and f.endswith(".fasnap")),
+        key=lambda f: int(f[len("snapshot-"):-len(".fasnap")]),
+    )
+    for f in snapshots[:-KEEP_SNAPSHOTS]:
+        if f != keep:
+            os.remove(os.path.join(directory, f))
+
+
+# -------------------------
+# Reading
+# -------------------------
+
+class StringColumn:
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def tolist(self) -> list:
+        raw = self.data.tobytes()
+        return [raw[a:b].decode("utf-8") for a, b in zip(self.offsets[:-1], self.offsets[1:])]
+
+
+class Snapshot:
+    # Every array is a read-only view into one shared mapping, so N workers cost one page-cache copy
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not an analytics snapshot")
+        header_len = int(np.frombuffer(self._mm, dtype="<u8", count=1, offset=len(MAGIC))[0])
+        header_end = len(MAGIC) + 8 + header_len
+        header = json.loads(self._mm[len(MAGIC) + 8:header_end])
+        self._base = header_end + (-header_end % ALIGN)
+        self.version = header["version"]
+        self.built_at = header["built_at"]
+        self.players_version = header.get("players_version")
+        self._tables = header["tables"]
+
+    def _array(self, entry: dict) -> np.ndarray:
+        return np.frombuffer(self._mm, dtype=np.dtype(entry["dtype"]), count=entry["length"],
+                             offset=self._base + entry["offset"])
+
+    def rows(self, table: str) -> int:
+        return self._tables[table]["rows"]
+
+    def columns(self, table: str) -> list:
+        return list(self._tables[table]["columns"])
+
+    def column(self, table: str, name: str):
+        entry = self._tables[table]["columns"][name]
+        if "strings" in entry:
+            return StringColumn(self._array(entry["strings"]["offsets"]), self._array(entry["strings"]["data"]))
+        return self._array(entry)
+
+    def row_of(self, table: str, entity_id: int):
+        ids = self.column(table, "id")
+        i = int(np.searchsorted(ids, entity_id))
+        return i if i < len(ids) and ids[i] == entity_id else None
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "built_at": self.built_at,
+            "players_version": self.players_version,
+            "path": self.path,
+            "bytes": len(self._mm),
+            "tables": {name: t["rows"] for name, t in self._tables.items()},
+        }
+
+
+_snapshot = None
+_checked_at = 0.0
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot(directory: str = SNAPSHOT_DIR):
+    # Cheap staleness check: re-read the CURRENT pointer every few seconds and remap on change.
+    # The previous mapping is released once no caller holds arrays from it.
+    global _snapshot, _checked_at
+    if _snapshot is not None and time.monotonic() - _checked_at < CHECK_SECONDS:
+        return _snapshot
+    with _snapshot_lock:
+        _checked_at = time.monotonic()
+        try:
+            with open(os.path.join(directory, CURRENT_FILE)) as f:
+                name = f.read().strip()
+        except OSError:
+            return _snapshot
+        path = os.path.join(directory, name)
+        if _snapshot is None or _snapshot.path != path:
+            try:
+                _snapshot = Snapshot(path)
+            except (OSError, ValueError):
+                pass
+        return _snapshot
+
+
+def _aggregate_row(values: dict, as_of: str) -> dict:
+    def rate(v):
+        return None if np.isnan(v) else round(float(v), 2)
+
+    last_day = int(values["last_match_day"])
+    return {
+        "as_of": as_of,
+        "matches": int(np.nan_to_num(values["matches"])),
+        "match_goals": int(np.nan_to_num(values["match_goals"])),
+        "match_assists": int(np.nan_to_num(values["match_assists"])),
+        "avg_pass_accuracy": rate(values["avg_pass_accuracy"]),
+        "last_match_date": (date(1970, 1, 1) + timedelta(days=last_day)).isoformat() if last_day >= 0 else None,
+        "workload_days": WORKLOAD_DAYS,
+        "workload_samples": int(values["workload_samples"]),
+        "sprints": int(values["sprints"]),
+        "avg_hrv": rate(values["avg_hrv"]),
+    }
+
+
+def get_player_aggregates(db: Session, player_ids) -> dict:
+    # {player_id: aggregates} as of the mapped snapshot; players it doesn't hold yet are computed on the spot
+    snapshot = get_snapshot()
+    out, missing = {}, []
+    for player_id in dict.fromkeys(player_ids):
+        i = snapshot.row_of("players", player_id) if snapshot else None
+        if i is None:
+            missing.append(player_id)
+            continue
+        out[player_id] = _aggregate_row({name: snapshot.column("players", name)[i] for name in PLAYER_AGGREGATES},
+                                        snapshot.built_at)
+    if missing:
+        as_of = datetime.now(timezone.utc)
+        ids = np.array(sorted(missing), dtype=np.int64)
+        computed = player_aggregates(db, ids, as_of, restrict=True)
+        for i, player_id in enumerate(ids.tolist()):
+            out[player_id] = _aggregate_row({name: computed[name][i] for name in PLAYER_AGGREGATES}, as_of.isoformat())
+    return out
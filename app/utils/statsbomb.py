@@ -0,0 +1,67 @@
+import os
+import json
+
+# Root of the StatsBomb open-data checkout (sample folder by default)
+BASE_DIR = os.getenv("STATSBOMB_DIR", "data/statsbomb/sample")
+MATCHES_DIR = os.path.join(BASE_DIR, "matches")
+EVENTS_DIR = os.path.join(BASE_DIR, "events")
+LINEUPS_DIR = os.path.join(BASE_DIR, "lineups")
+COMPETITIONS_FILE = os.path.join(BASE_DIR, "competitions.json")
+
+
+def load_json(filepath):
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"❌ Error loading {filepath}: {e}")
+        return []
+
+
+def event_file(match_id) -> str:
+    return os.path.join(EVENTS_DIR, f"{match_id}.json")
+
+
+def lineup_file(match_id) -> str:
+    return os.path.join(LINEUPS_DIR, f"{match_id}.json")
+
+
+def available_match_ids() -> list:
+    return sorted(int(f[:-5]) for f in os.listdir(EVENTS_DIR) if f.endswith(".json"))
+
+
+def load_events(match_id) -> list:
+    return load_json(event_file(match_id))
+
+
+def file_mtime(filepath):
+    try:
+        return os.stat(filepath).st_mtime
+    except OSError:
+        return None
+
+
+# Per-player match counters shared by batch ingest and the live replay feed
+def new_player_stats() -> dict:
+    return {"passes": 0, "passes_completed": 0, "goals": 0, "assists": 0}
+
+
+def apply_event(stats: dict, event: dict) -> bool:
+    # Returns True when the event changed one of the counters
+    event_type = event.get("type", {}).get("name")
+    if event_type == "Pass":
+        stats["passes"] += 1
+        if event.get("pass", {}).get("outcome") is None:
+            stats["passes_completed"] += 1
+        if event.get("pass", {}).get("goal_assist"):
+            stats["assists"] += 1
+        return True
+    if event_type == "Shot" and event.get("shot", {}).get("outcome", {}).get("name") == "Goal":
+        stats["goals"] += 1
+        return True
+    return False
+
+
+def pass_accuracy(stats: dict) -> float:
+    accuracy = (stats["passes_completed"] / stats["passes"]) * 100 if stats["passes"] else 0
+    return round(accuracy, 2)
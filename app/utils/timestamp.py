@@ -1,6 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
+def utc_now() -> datetime:
+    # What gets stored: timezone-aware UTC. Localization happens only when formatting a response.
+    return datetime.now(timezone.utc)
+
 def format_timestamp(tz_str: str = "UTC", dt: datetime = None) -> str:
     try:
         tz = ZoneInfo(tz_str)
@@ -8,6 +12,9 @@ def format_timestamp(tz_str: str = "UTC", dt: datetime = None) -> str:
         tz = ZoneInfo("UTC")
 
     dt = dt or datetime.now(tz)
+    if dt.tzinfo is None:
+        # Backends without timezone support (SQLite) hand stored UTC values back naive
+        dt = dt.replace(tzinfo=timezone.utc)
     dt = dt.astimezone(tz)
 
     offset = dt.strftime('%z')  # e.g., +0530
@@ -1,44 +1,55 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta
-from app.db.models import Player, FactBiometricMinute, Team
+import numpy as np
+from app.db.models import BiometricRollup
+from app.services.player_store import get_player_store
 from app.utils.timestamp import format_timestamp
 
 
 def get_trending_players(db: Session, timezone: str = "UTC", limit: int = 5):
     one_week_ago = datetime.utcnow() - timedelta(days=7)
 
-    # Fetch biometric stats per player over the last week
-    player_data = (
+    # Fetch biometric stats per player over the last week from the hourly rollups
+    rows = (
         db.query(
-            Player.id.label("player_id"),
-            Player.name.label("player_name"),
-            Player.rating.label("avg_rating"),
-            Team.name.label("team_name"),
-            Player.position.label("position"),
-            func.avg(FactBiometricMinute.sprint_count).label("avg_sprint"),
-            func.avg(FactBiometricMinute.heart_rate_variability).label("avg_hrv")
+            BiometricRollup.player_id,
+            func.sum(BiometricRollup.sprint_count_sum),
+            func.sum(BiometricRollup.hrv_sum),
+            func.sum(BiometricRollup.samples),
+            func.sum(BiometricRollup.hrv_samples)
         )
-        .join(FactBiometricMinute, FactBiometricMinute.player_id == Player.id)
-        .join(Team, Player.team_id == Team.id)
-        .filter(FactBiometricMinute.timestamp >= one_week_ago)
-        .group_by(Player.id, Team.name)
-        .order_by(func.avg(FactBiometricMinute.sprint_count).desc())
-        .limit(limit)
+        .filter(BiometricRollup.resolution == "hour", BiometricRollup.bucket_start >= one_week_ago)
+        .group_by(BiometricRollup.player_id)
         .all()
     )
+    if not rows:
+        return []
+
+    # Player details come from the column store; ranking is one vectorized sort
+    store = get_player_store(db)
+    player_ids, sprints, hrv, samples, hrv_samples = (np.array(c, dtype=np.float64) for c in zip(*[
+        (r[0], r[1] or 0, r[2] or 0.0, r[3] or 0, r[4] or 0) for r in rows
+    ]))
+    idx = store.indices_of(player_ids.astype(np.int64))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_sprint = np.where(samples > 0, sprints / samples, 0.0)
+        avg_hrv = np.where(hrv_samples > 0, hrv / hrv_samples, 0.0)
+    ranked = [i for i in np.argsort(-avg_sprint, kind="stable")
+              if idx[i] >= 0 and int(store.team_ids[idx[i]]) in store.team_names][:limit]
 
     trending = []
-    for p in player_data:
+    for i in ranked:
+        p = store.get(int(player_ids[i]))
         trending.append({
-            "player_id": p.player_id,
-            "name": p.player_name,
+            "player_id": p.id,
+            "name": p.name,
             "team": p.team_name,
             "position": p.position,
-            "avg_rating": round(p.avg_rating or 0, 2),
-            "sprint_change_pct": round((p.avg_sprint or 0) / 10 * 100, 2),
-            "hrv_change_pct": round((p.avg_hrv or 0) / 100 * 100, 2),
-            "confidence": round(min(1.0, (p.avg_sprint or 0) / 10), 2),
+            "avg_rating": round(p.rating or 0, 2),
+            "sprint_change_pct": round(float(avg_sprint[i]) / 10 * 100, 2),
+            "hrv_change_pct": round(float(avg_hrv[i]) / 100 * 100, 2),
+            "confidence": round(min(1.0, float(avg_sprint[i]) / 10), 2),
             "generated_at": format_timestamp(timezone)
         })
 
@@ -0,0 +1,27 @@
+import os
+import sys
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services.log_retention import apply_retention, RETENTION_MONTHS
+
+# ✅ Usage: python scripts/apply_log_retention.py [retention_months]
+def main():
+    retention_months = int(sys.argv[1]) if len(sys.argv) > 1 else RETENTION_MONTHS
+
+    db = SessionLocal()
+    try:
+        result = apply_retention(db, retention_months=retention_months)
+    finally:
+        db.close()
+
+    for name in result["partitions_created"]:
+        print(f"🧱 Created partition {name}")
+    for entry in result["archived"]:
+        print(f"📦 {entry['table']} {entry['month']}: {entry['rows']} rows -> {entry['path']}")
+    print(f"✅ Log retention applied (cutoff {result['cutoff']}).")
+
+if __name__ == "__main__":
+    main()
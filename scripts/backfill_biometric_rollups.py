@@ -0,0 +1,26 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services.biometric_rollups import rebuild_rollups
+
+# ✅ Usage: python scripts/backfill_biometric_rollups.py [YYYY-MM-DD]
+def main():
+    since = None
+    if len(sys.argv) > 1:
+        since = datetime.strptime(sys.argv[1], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+    db = SessionLocal()
+    try:
+        total = rebuild_rollups(db, since=since)
+    finally:
+        db.close()
+
+    print(f"✅ Rolled up {total} biometric readings into 5min/hour/day buckets.")
+
+if __name__ == "__main__":
+    main()
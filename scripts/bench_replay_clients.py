@@ -0,0 +1,66 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+import httpx
+import websockets
+
+# ✅ Usage: python scripts/bench_replay_clients.py --clients 2000 --match 22921 --speed 60 --duration 30
+parser = argparse.ArgumentParser(description="Open many WebSocket subscribers on a match replay and report delivery stats")
+parser.add_argument("--host", default="127.0.0.1:8000")
+parser.add_argument("--match", type=int, default=22921)
+parser.add_argument("--clients", type=int, default=1000)
+parser.add_argument("--speed", type=float, default=60.0)
+parser.add_argument("--duration", type=float, default=30.0)
+args = parser.parse_args()
+
+async def subscriber(results: list, ready: asyncio.Event, deadline: float):
+    received = 0
+    lags = []
+    try:
+        async with websockets.connect(f"ws://{args.host}/ws/replay/{args.match}", max_queue=None) as ws:
+            await ready.wait()
+            while time.time() < deadline:
+                try:
+                    message = json.loads(await asyncio.wait_for(ws.recv(), timeout=deadline - time.time()))
+                except asyncio.TimeoutError:
+                    break
+                received += 1
+                if "sent_at" in message:
+                    lags.append(time.time() - message["sent_at"])
+    except (OSError, websockets.WebSocketException) as e:
+        results.append({"error": str(e)})
+        return
+    results.append({"received": received, "lags": lags})
+
+async def main():
+    results = []
+    ready = asyncio.Event()
+    deadline = time.time() + args.duration + 5
+
+    print(f"🔌 Connecting {args.clients} clients to match {args.match}...")
+    tasks = [asyncio.create_task(subscriber(results, ready, deadline)) for _ in range(args.clients)]
+    await asyncio.sleep(min(5, 0.002 * args.clients))
+
+    async with httpx.AsyncClient() as client:
+        await client.post(f"http://{args.host}/replay/{args.match}/start", params={"speed": args.speed})
+    print(f"▶️ Replay started at {args.speed}x")
+    ready.set()
+    await asyncio.gather(*tasks)
+
+    errors = [r for r in results if "error" in r]
+    ok = [r for r in results if "error" not in r]
+    lags = sorted(l for r in ok for l in r["lags"])
+    total = sum(r["received"] for r in ok)
+
+    print(f"✅ {len(ok)} clients connected, {len(errors)} failed")
+    print(f"📨 {total} messages delivered ({total / max(len(ok), 1):.1f} per client)")
+    if lags:
+        pct = lambda p: lags[min(len(lags) - 1, int(p * len(lags)))] * 1000
+        print(f"⏱️ Fan-out lag p50={pct(0.5):.1f}ms p95={pct(0.95):.1f}ms p99={pct(0.99):.1f}ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import statistics
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# ✅ Usage: python scripts/bench_startup.py --runs 10 [--factory] [--warmup none]
+# Starts a fresh uvicorn worker per run and measures how long until it serves "/" and until "/ready" returns 200.
+parser = argparse.ArgumentParser(description="Cold-start latency of the API worker")
+parser.add_argument("--runs", type=int, default=10)
+parser.add_argument("--factory", action="store_true", help="start with `--factory app.main:create_app`")
+parser.add_argument("--warmup", default=None, help="override WARMUP for the worker (e.g. none, catalog,player_store)")
+parser.add_argument("--timeout", type=float, default=120.0)
+args = parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(client: httpx.Client, url: str, started: float, ok=lambda r: True):
+    while time.perf_counter() - started < args.timeout:
+        try:
+            if ok(client.get(url, timeout=1.0)):
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    return None
+
+
+def import_seconds() -> float:
+    out = subprocess.run([sys.executable, "-c", "import time; t = time.perf_counter(); import app.main; "
+                          "app.main.create_app(); print(time.perf_counter() - t)"],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+
+def one_run() -> tuple:
+    port = free_port()
+    target = ["--factory", "app.main:create_app"] if args.factory else ["app.main:app"]
+    env = dict(os.environ)
+    if args.warmup is not None:
+        env["WARMUP"] = args.warmup
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", *target, "--port", str(port), "--log-level", "warning"],
+                            cwd=ROOT, env=env)
+    try:
+        with httpx.Client() as client:
+            serving = wait_for(client, f"http://127.0.0.1:{port}/", started)
+            ready = wait_for(client, f"http://127.0.0.1:{port}/ready", started, ok=lambda r: r.status_code == 200)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return serving, ready
+
+
+def summary(label: str, values: list):
+    values = [v for v in values if v is not None]
+    if not values:
+        print(f"{label:<18} timed out")
+        return
+    values.sort()
+    p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+    print(f"{label:<18} median {statistics.median(values) * 1000:8.1f} ms   p95 {p95 * 1000:8.1f} ms   (n={len(values)})")
+
+
+def main():
+    print(f"🚀 {args.runs} cold starts of {'create_app (factory)' if args.factory else 'app.main:app'}...")
+    imports = [import_seconds() for _ in range(min(args.runs, 5))]
+    runs = [one_run() for _ in range(args.runs)]
+    summary("import + create", imports)
+    summary("first response", [s for s, _ in runs])
+    summary("ready", [r for _, r in runs])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import os
+import sys
+import time
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.catalog import refresh_catalog
+
+# ✅ Usage: python scripts/build_catalog.py [--force]   (only changed competition/match files are re-read)
+def main():
+    started = time.perf_counter()
+    catalog, changed = refresh_catalog(force="--force" in sys.argv)
+    info = catalog.info()
+    print(f"📂 Re-indexed {len(changed)} of {info['sources']} source files.")
+    print(f"✅ Catalog ready: {info['competitions']} competitions, {info['seasons']} seasons, "
+          f"{info['matches']} matches, {info['teams']} teams in {time.perf_counter() - started:.2f}s.")
+
+if __name__ == "__main__":
+    main()
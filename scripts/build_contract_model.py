@@ -0,0 +1,30 @@
+import os
+import sys
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.services.contract_model import feature_matrix, fit_artifact, save_artifact, MODEL_PATH, FEATURE_COLUMNS
+from app.db.models import Player
+
+# ✅ Usage: python scripts/build_contract_model.py [output_path]
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(select(*FEATURE_COLUMNS).order_by(Player.id)).all()
+    finally:
+        db.close()
+
+    _, X, _ = feature_matrix(rows)
+    artifact = fit_artifact(X)
+    save_artifact(artifact, path)
+    # Only the feature normalization is estimated from the data; the head weights are the fixed DEFAULT_HEADS
+    print(f"✅ Contract model {artifact['model_version']} normalized on {len(X)} players (fixed head weights) → {path}")
+
+if __name__ == "__main__":
+    main()
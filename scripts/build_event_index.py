@@ -0,0 +1,20 @@
+import os
+import sys
+import time
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.statsbomb import available_match_ids
+from app.utils.event_index import load_index
+
+# ✅ Usage: python scripts/build_event_index.py   (only missing or stale indexes are rebuilt)
+def main():
+    started = time.perf_counter()
+    match_ids = available_match_ids()
+    for match_id in match_ids:
+        load_index(match_id)
+    print(f"✅ Event indexes ready for {len(match_ids)} matches in {time.perf_counter() - started:.2f}s.")
+
+if __name__ == "__main__":
+    main()
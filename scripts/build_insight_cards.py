@@ -0,0 +1,23 @@
+import os
+import sys
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services.insight_cards import build_insight_cards
+
+# ✅ Usage: python scripts/build_insight_cards.py
+def main():
+    db = SessionLocal()
+    try:
+        result = build_insight_cards(db)
+    finally:
+        db.close()
+
+    print(f"✅ Insight batch {result['batch_id']}: {result['cards']} card(s) for {result['players']} players.")
+    for key, count in sorted(result["by_key"].items()):
+        print(f"   {key}: {count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+import sys
+import time
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services.possession_chains import refresh_possession_chains
+
+# ✅ Usage: python scripts/build_possession_chains.py [--force] [match_id ...]
+def main():
+    args = sys.argv[1:]
+    force = "--force" in args
+    match_ids = [int(a) for a in args if a != "--force"] or None
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        result = refresh_possession_chains(db, match_ids=match_ids, force=force)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    if not result["recomputed"]:
+        print("ℹ️ Possession chains are up to date.")
+    else:
+        print(f"✅ {result['chains']} chains rebuilt for {len(result['recomputed'])} matches in {elapsed:.2f}s.")
+
+if __name__ == "__main__":
+    main()
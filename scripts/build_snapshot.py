@@ -0,0 +1,22 @@
+import os
+import sys
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.utils.snapshot import build_snapshot
+
+# ✅ Usage: python scripts/build_snapshot.py
+def main():
+    db = SessionLocal()
+    try:
+        result = build_snapshot(db)
+    finally:
+        db.close()
+
+    print(f"✅ Snapshot {result['version']}: {result['players']} players, {result['teams']} teams, "
+          f"{result['bytes'] / 1024:.1f} KiB → {result['path']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import os
+import sys
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services.team_rollups import refresh_team_rollups
+
+# ✅ Usage: python scripts/build_team_rollups.py [team_id ...]   (no arguments rebuilds every team)
+def main():
+    team_ids = [int(t) for t in sys.argv[1:]] or None
+
+    db = SessionLocal()
+    try:
+        result = refresh_team_rollups(db, team_ids)
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"✅ Rolled up {result['teams']} teams and {result['team_matches']} team-match rows.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import os
+import sys
+import argparse
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import create_engine, insert, text, func, select
+from sqlalchemy.orm import sessionmaker
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.base import Base
+from app.db.models import Team, Player, MatchStat, BiometricRollup, InsightBatch, InsightCard
+from app.services.player_store import invalidate_player_store
+from app.services.team_rollups import refresh_team_rollups
+from app.utils.query_plans import (
+    capture_sql, explain, check_plan, table_rows, load_snapshot, save_snapshot, diff_snapshot, SNAPSHOT_DIR,
+)
+
+# ✅ Usage: python scripts/check_query_plans.py [--database-url postgresql://.../plans] [--scale 20000] [--update-snapshots]
+# Seeds a scratch database (never point it at a real one), captures the SQL each service emits,
+# EXPLAINs it and fails on sequential scans, row/cost thresholds or plans that drift from the snapshots.
+parser = argparse.ArgumentParser(description="Query-plan regression checks for service-layer SQL")
+parser.add_argument("--database-url", default=os.getenv("QUERY_PLAN_DATABASE_URL", f"sqlite:///{SNAPSHOT_DIR}/bench.db"))
+parser.add_argument("--scale", type=int, default=20000, help="players to seed; other tables scale with it")
+parser.add_argument("--reseed", action="store_true")
+parser.add_argument("--update-snapshots", action="store_true", help="accept the current plans as the new baseline")
+args = parser.parse_args()
+
+POSITIONS = ["Goalkeeper", "Defender", "Defender", "Midfielder", "Defensive Midfielder",
+             "Attacking Midfielder", "Forward", "Attacking Winger"]
+MATCHES_PER_PLAYER = 10
+ROLLUP_DAYS = 14
+# Estimated-cost budget (PostgreSQL planner units; SQLite reports no cost) per row a query may touch: a
+# sequential page is 1.0 and a random one 4.0, so a plan that goes from index lookups to repeated or
+# nested scans blows through it while normal plan jitter stays well inside
+COST_PER_SCAN_ROW = 0.25
+COST_PER_INDEX_ROW = 5.0
+
+
+def seed(engine, scale: int):
+    rng = np.random.default_rng(7)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    teams = max(1, scale // 25)
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    with engine.begin() as conn:
+        conn.execute(insert(Team), [{"id": t + 1, "name": f"Team {t + 1}"} for t in range(teams)])
+        ratings = rng.normal(6.8, 0.5, scale).round(2)
+        conn.execute(insert(Player), [
+            {"id": i + 1, "name": f"Player {i + 1:06d}", "age": int(rng.integers(17, 38)), "position": POSITIONS[i % len(POSITIONS)],
+             "appearances": int(rng.integers(0, 38)), "minutes": int(rng.integers(0, 3400)), "goals": int(rng.poisson(3)),
+             "assists": int(rng.poisson(2)), "pass_success": float(rng.uniform(60, 95)), "rating": float(ratings[i]),
+             "team_id": i % teams + 1}
+            for i in range(scale)
+        ])
+        first_match = date.today() - timedelta(days=7 * MATCHES_PER_PLAYER)
+        conn.execute(insert(MatchStat), [
+            {"player_id": p + 1, "match_date": first_match + timedelta(days=7 * m), "goals": int(rng.poisson(0.2)),
+             "assists": int(rng.poisson(0.15)), "pass_accuracy": float(rng.uniform(60, 95))}
+            for p in range(scale) for m in range(MATCHES_PER_PLAYER)
+        ])
+        # Hourly rollups for a slice of the squad, twice as far back as the trending window
+        tracked = range(1, scale + 1, 20)
+        hours = [now - timedelta(hours=h) for h in range(24 * ROLLUP_DAYS)]
+        conn.execute(insert(BiometricRollup), [
+            {"resolution": "hour", "player_id": p, "bucket_start": h, "samples": 60,
+             "sprint_count_sum": int(rng.integers(0, 40)), "hrv_sum": float(rng.uniform(3000, 6000)), "hrv_samples": 60,
+             "minutes_played_sum": 60.0}
+            for p in tracked for h in hours
+        ])
+        conn.execute(insert(InsightBatch), [{"id": 1, "model_version": "plan-check", "players": scale, "cards": scale // 10}])
+        conn.execute(insert(InsightCard), [
+            {"card_id": f"plan-check-{r}", "batch_id": 1, "rank": r, "player_id": r * 10 + 1, "team_id": (r * 10) % teams + 1,
+             "i18n_key": "insight.trending_up", "confidence": 0.5, "recommendation": "Keep an eye on this player."}
+            for r in range(scale // 10)
+        ])
+    with sessionmaker(bind=engine)() as db:
+        refresh_team_rollups(db)
+        db.commit()
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def scenarios(scale: int) -> list:
+    # (name, service call, rules applied to every query the call emits)
+    from app.utils.trending import get_trending_players
+    from app.services.player_comparator import compare_players
+    from app.services.insight_generator import generate_insight
+    from app.utils.search import parse_question_and_search
+    from app.services.team_rollups import league_table, get_team_summary
+
+    a, b = f"Player {scale // 3:06d}", f"Player {scale // 2:06d}"
+    # The player column store loads players/teams in full by design, once per data version; no single
+    # query may read more than that (its version fingerprint reads teams twice: count and row_version sum)
+    store_scans = {"players", "teams"}
+    store_rows = scale + 2 * (scale // 25)
+    trending_rows = store_rows + (scale // 20 + 1) * 24 * 8
+    return [
+        ("trending_players", lambda db: get_trending_players(db),
+         {"allow_full_scan": store_scans, "max_rows_scanned": trending_rows, "max_cost": trending_rows * COST_PER_SCAN_ROW}),
+        ("compare_players", lambda db: compare_players(a, b, db),
+         {"allow_full_scan": store_scans, "max_rows_scanned": store_rows, "max_cost": store_rows * COST_PER_SCAN_ROW}),
+        ("generate_insight", lambda db: generate_insight(f"How did {a} perform?", "", db),
+         {"allow_full_scan": store_scans, "max_rows_scanned": store_rows, "max_cost": store_rows * COST_PER_SCAN_ROW}),
+        ("search_by_position", lambda db: parse_question_and_search(db, "show me a good defender"),
+         {"require_index": "ix_players_rating", "max_rows_scanned": 500, "max_cost": 500 * COST_PER_INDEX_ROW}),
+        ("search_top_rated", lambda db: parse_question_and_search(db, "who are the best players?"),
+         {"require_index": "ix_players_rating", "max_rows_scanned": 100, "max_cost": 100 * COST_PER_INDEX_ROW}),
+        ("league_table", lambda db: league_table(db, sort="strength", limit=20),
+         {"require_index": "ix_team_rollups_strength", "max_rows_scanned": 0, "max_cost": 2 * 20 * COST_PER_INDEX_ROW}),
+        ("team_summary", lambda db: get_team_summary(db, 1),
+         {"max_rows_scanned": 0, "max_cost": 2 * 10 * COST_PER_INDEX_ROW}),
+    ]
+
+
+def main():
+    if args.database_url.startswith("sqlite:///"):
+        os.makedirs(os.path.dirname(args.database_url[len("sqlite:///"):]) or ".", exist_ok=True)
+    engine = create_engine(args.database_url)
+    Session = sessionmaker(bind=engine)
+    dialect = engine.dialect.name
+
+    with Session() as db:
+        try:
+            seeded = db.scalar(select(func.count(Player.id)))
+        except Exception:
+            seeded = None
+    if args.reseed or seeded != args.scale:
+        print(f"🌱 Seeding {args.scale} players into {engine.url.render_as_string(hide_password=True)}...")
+        seed(engine, args.scale)
+    rows = table_rows(engine)
+
+    failures = 0
+    for name, call, rules in scenarios(args.scale):
+        # Every scenario starts cold, so the SQL behind cached lookups is checked too
+        invalidate_player_store()
+        with Session() as db, capture_sql(engine) as captured:
+            call(db)
+        plans = [explain(engine, statement, parameters, rows=rows) for statement, parameters in captured]
+
+        problems = []
+        for plan in plans:
+            problems += [f"{v}: {plan['sql'][:120]}" for v in check_plan(
+                plan, allow_full_scan=rules.get("allow_full_scan", ()), max_rows_scanned=rules.get("max_rows_scanned"),
+                max_cost=rules.get("max_cost"))]
+        required = rules.get("require_index")
+        if required and not any(required in p["indexes"] for p in plans):
+            problems.append(f"no query used {required}")
+
+        snapshot = load_snapshot(dialect, name)
+        if args.update_snapshots or snapshot is None:
+            save_snapshot(dialect, name, plans)
+        else:
+            problems += diff_snapshot(snapshot, plans)
+
+        slowest = max((p["time_ms"] or 0 for p in plans), default=0)
+        if problems:
+            failures += 1
+            print(f"❌ {name}: {len(plans)} queries, slowest {slowest:.2f} ms")
+            for problem in problems:
+                print(f"   - {problem}")
+        else:
+            print(f"✅ {name}: {len(plans)} queries, slowest {slowest:.2f} ms")
+
+    if failures:
+        print(f"\n{failures} scenario(s) have plan regressions. Re-run with --update-snapshots if the change is intended.")
+        sys.exit(1)
+    print("\n🎉 All query plans within bounds.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import os
+import sys
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.utils.ingest_statsbomb import ingest_lineups, list_matches
+
+# ✅ Usage: python scripts/ingest_lineups.py [competition_id [season_id]]
+def main():
+    competition_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    season_id = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    db = SessionLocal()
+    try:
+        result = ingest_lineups(db, list_matches(competition_id, season_id))
+    finally:
+        db.close()
+
+    print(f"✅ Loaded lineups for {result['matches']} matches: {result['players']} players, {result['appearances']} match appearances.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+
+import httpx
+
+# ✅ Usage: python scripts/load_test_admission.py --host 127.0.0.1:8000 --workers 200 --users 20 --duration 20
+parser = argparse.ArgumentParser(description="Saturate the chat endpoints and measure latency of cheap endpoints meanwhile")
+parser.add_argument("--host", default="127.0.0.1:8000")
+parser.add_argument("--workers", type=int, default=200, help="concurrent clients hammering the chat endpoints")
+parser.add_argument("--users", type=int, default=20, help="distinct user_ids spread across those clients")
+parser.add_argument("--duration", type=float, default=20.0)
+parser.add_argument("--probe-interval", type=float, default=0.05, help="seconds between cheap-endpoint probes")
+args = parser.parse_args()
+
+PROMPTS = [
+    ("/chat/ask", {"prompt": "How did Achraf Hakimi play?"}),
+    ("/chat/ask", {"prompt": "Compare Hakimi and Mbappe"}),
+    ("/chat/insight", {"prompt": "Give me an insight on Vitinha", "context": ""}),
+    ("/chat/compare", {"player1": "Hakimi", "player2": "Marquinhos"}),
+]
+
+def pct(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000 if values else float("nan")
+
+async def hammer(client: httpx.AsyncClient, worker: int, deadline: float, statuses: Counter, latencies: list):
+    user_id = f"load-user-{worker % args.users}"
+    while time.time() < deadline:
+        path, body = random.choice(PROMPTS)
+        started = time.perf_counter()
+        try:
+            response = await client.post(f"http://{args.host}{path}", json={**body, "user_id": user_id})
+        except httpx.HTTPError:
+            statuses["error"] += 1
+            continue
+        statuses[response.status_code] += 1
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - started)
+        elif response.status_code in (429, 503):
+            # Well-behaved clients honour Retry-After (capped so the test keeps pressure on)
+            await asyncio.sleep(min(float(response.headers.get("retry-after", 1)), 1.0))
+
+async def probe(client: httpx.AsyncClient, path: str, deadline: float, latencies: list, statuses: Counter):
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(f"http://{args.host}{path}")
+            statuses[response.status_code] += 1
+            latencies.append(time.perf_counter() - started)
+        except httpx.HTTPError:
+            statuses["error"] += 1
+        await asyncio.sleep(args.probe_interval)
+
+async def main():
+    deadline = time.time() + args.duration
+    expensive_statuses, cheap_statuses = Counter(), Counter()
+    expensive_latencies = []
+    cheap_latencies = {"/": [], "/metrics": []}
+
+    limits = httpx.Limits(max_connections=args.workers + 10, max_keepalive_connections=args.workers + 10)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        print(f"🔥 {args.workers} clients on chat endpoints for {args.duration:.0f}s, probing / and /metrics...")
+        await asyncio.gather(
+            *[hammer(client, w, deadline, expensive_statuses, expensive_latencies) for w in range(args.workers)],
+            *[probe(client, path, deadline, latencies, cheap_statuses) for path, latencies in cheap_latencies.items()],
+        )
+
+    print(f"📊 Chat responses: {dict(expensive_statuses)}")
+    print(f"⏱️ Chat (admitted) p50={pct(expensive_latencies, 0.5):.1f}ms p95={pct(expensive_latencies, 0.95):.1f}ms")
+    print(f"📊 Cheap responses: {dict(cheap_statuses)}")
+    for path, latencies in cheap_latencies.items():
+        print(f"⏱️ GET {path} p50={pct(latencies, 0.5):.1f}ms p95={pct(latencies, 0.95):.1f}ms p99={pct(latencies, 0.99):.1f}ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
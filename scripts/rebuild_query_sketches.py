@@ -0,0 +1,25 @@
+import os
+import sys
+from datetime import timedelta
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services.query_sketches import rebuild_sketches
+from app.utils.timestamp import utc_now
+
+# ✅ Usage: python scripts/rebuild_query_sketches.py [days]   (no argument rebuilds from the full logs)
+def main():
+    since = utc_now().date() - timedelta(days=int(sys.argv[1]) - 1) if len(sys.argv) > 1 else None
+
+    db = SessionLocal()
+    try:
+        result = rebuild_sketches(db, since=since)
+    finally:
+        db.close()
+
+    print(f"✅ Rebuilt {result['sketches']} daily sketches from {result['queries']} logged queries.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import os
+import sys
+import argparse
+
+# Setup for absolute import
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services.entity_resolution import resolve_players, merge_players
+from app.utils.ingest_csv import backfill_birth_dates, CSV_PATH
+
+# ✅ Usage: python scripts/resolve_players.py [--backfill-birth-dates] [--merge]
+# Links CSV-imported players to StatsBomb players in player_links; --merge folds matched pairs into one row.
+parser = argparse.ArgumentParser(description="Resolve duplicate players between the CSV import and StatsBomb")
+parser.add_argument("--backfill-birth-dates", action="store_true", help=f"read birth dates for existing CSV rows from {CSV_PATH}")
+parser.add_argument("--csv-path", default=CSV_PATH)
+parser.add_argument("--merge", action="store_true", help="merge matched pairs (CSV stats move onto the StatsBomb row)")
+args = parser.parse_args()
+
+
+def main():
+    db = SessionLocal()
+    try:
+        if args.backfill_birth_dates:
+            print(f"📅 Read {backfill_birth_dates(db, args.csv_path)} birth dates from {args.csv_path}")
+        result = resolve_players(db, progress=lambda fraction, message: print(f"   {fraction:4.0%} {message}"))
+        print(f"🔗 {result['matched']} matched and {result['candidates']} candidate links "
+              f"from {result['pairs']} compared pairs ({result['csv_players']} CSV x {result['statsbomb_players']} StatsBomb players)")
+        if args.merge:
+            print(f"✅ Merged {merge_players(db)['merged']} players.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.db.models import Player, MatchStat
+from app.services.team_rollups import refresh_team_rollups
 from datetime import date
 
 def seed_match_stats():
@@ -94,6 +95,8 @@ def seed_match_stats():
     else:
         print("ℹ️ Pedri match stat already exists.")
 
+    refresh_team_rollups(db, {player.team_id, pedri.team_id})
+    db.commit()
     db.close()
 
 if __name__ == "__main__":